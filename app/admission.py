@@ -0,0 +1,148 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config import Config
+from app.metrics import metrics
+
+class Overloaded(Exception):
+    """Raised instead of queueing when the estimated wait is too long"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Estimated wait {retry_after:.1f}s exceeds the admission limit")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency for LLM-backed requests, with a weighted fair wait queue.
+
+    At most ``max_concurrent`` requests run at once; the rest wait in line.
+    The expected wait is estimated from a moving average of how long
+    requests hold their slot, and a request that would wait longer than
+    ``max_queue_wait`` is rejected straight away so the client can retry
+    later instead of hanging until the proxy times out.
+
+    Waiting requests are served by weighted fair queuing: each principal
+    (user or guest IP) gets its own virtual queue, a request's finish tag
+    advances by its class's service time divided by the class weight, and
+    the lowest tag goes next. A burst from one principal therefore can't
+    starve the others, and interactive classes overtake bulk ones.
+    """
+
+    SMOOTHING = 0.2
+
+    def __init__(self, max_concurrent: Optional[int] = None, max_queue_wait: Optional[float] = None,
+                 initial_service_time: Optional[float] = None, weights: Optional[Dict[str, float]] = None):
+        self.max_concurrent = max_concurrent or Config.ADMISSION_MAX_CONCURRENT
+        self.max_queue_wait = Config.ADMISSION_MAX_QUEUE_WAIT if max_queue_wait is None else max_queue_wait
+        self.service_time = initial_service_time or Config.ADMISSION_INITIAL_SERVICE_SECONDS
+        self.weights = weights or Config.ADMISSION_WEIGHTS
+        self.class_service_time: Dict[str, float] = defaultdict(lambda: self.service_time)
+        self.in_flight = 0
+        self.waiters: List[tuple] = []  # Heap of (finish_tag, seq, future, job_class)
+        self.virtual_time = 0.0
+        self.last_finish: Dict[str, float] = {}
+        self.class_stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"admitted": 0, "wait_seconds": 0.0})
+        self._seq = itertools.count()
+
+    def estimated_wait(self) -> float:
+        """Seconds a request arriving now would wait for a slot"""
+        if self.in_flight < self.max_concurrent and not self.waiters:
+            return 0.0
+        return (len(self.waiters) + 1) * self.service_time / self.max_concurrent
+
+    def check(self) -> None:
+        """Raise Overloaded if a new request should be turned away"""
+        wait = self.estimated_wait()
+        if wait > self.max_queue_wait:
+            metrics.incr("admission_rejected")
+            raise Overloaded(wait)
+
+    def _finish_tag(self, job_class: str, principal: str) -> float:
+        start = max(self.virtual_time, self.last_finish.get(principal, 0.0))
+        tag = start + self.class_service_time[job_class] / self.weights.get(job_class, 1)
+        self.last_finish[principal] = tag
+        if len(self.last_finish) > 1000:
+            # Principals whose tags are already in the past no longer affect ordering
+            self.last_finish = {p: t for p, t in self.last_finish.items() if t > self.virtual_time}
+        return tag
+
+    async def acquire(self, job_class: str = "plan", principal: str = "anonymous") -> None:
+        self.check()
+        start = time.perf_counter()
+        if self.in_flight < self.max_concurrent and not self.waiters:
+            self.in_flight += 1
+            self._admitted(job_class, 0.0)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (self._finish_tag(job_class, principal), next(self._seq), waiter, job_class))
+        try:
+            await waiter  # release() hands its slot straight to us
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # Got the slot just as we were cancelled; pass it on
+            else:
+                self.waiters = [entry for entry in self.waiters if entry[2] is not waiter]
+                heapq.heapify(self.waiters)
+            raise
+        self._admitted(job_class, time.perf_counter() - start)
+
+    def _admitted(self, job_class: str, waited: float) -> None:
+        stats = self.class_stats[job_class]
+        stats["admitted"] += 1
+        stats["wait_seconds"] += waited
+        if waited:
+            metrics.incr("admission_queued")
+            metrics.incr(f"admission_wait_seconds_{job_class}", waited)
+
+    def release(self, held_seconds: Optional[float] = None, job_class: Optional[str] = None) -> None:
+        if held_seconds is not None:
+            self.service_time += self.SMOOTHING * (held_seconds - self.service_time)
+            if job_class is not None:
+                self.class_service_time[job_class] += self.SMOOTHING * (held_seconds - self.class_service_time[job_class])
+        while self.waiters:
+            tag, _, waiter, _ = heapq.heappop(self.waiters)
+            if not waiter.done():
+                self.virtual_time = max(self.virtual_time, tag)
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, job_class: str = "plan", principal: str = "anonymous") -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block"""
+        await self.acquire(job_class, principal)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start, job_class)
+
+    def get_stats(self) -> Dict[str, Any]:
+        queued = defaultdict(int)
+        for _, _, waiter, job_class in self.waiters:
+            if not waiter.done():
+                queued[job_class] += 1
+        classes = {}
+        for job_class in set(self.class_stats) | set(queued):
+            stats = self.class_stats[job_class]
+            classes[job_class] = {
+                "weight": self.weights.get(job_class, 1),
+                "queued": queued[job_class],
+                "admitted": stats["admitted"],
+                "avg_wait_seconds": round(stats["wait_seconds"] / stats["admitted"], 3) if stats["admitted"] else 0.0
+            }
+        return {
+            "in_flight": self.in_flight,
+            "queued": sum(queued.values()),
+            "max_concurrent": self.max_concurrent,
+            "estimated_wait_seconds": round(self.estimated_wait(), 2),
+            "classes": classes
+        }
+
+admission = AdmissionController()
@@ -1,20 +1,59 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Callable
 from app.llm import get_llm_client
+from app.metrics import metrics
 
 class BaseAgent(ABC):
     """Base class for all agents"""
     
+    # Context keys this agent reads, and the key its result is stored under.
+    # The orchestrator uses these to run independent agents concurrently.
+    consumes: List[str] = []
+    produces: str = ""
+    
+    # Optional callback for partial results (e.g. itinerary days) while processing
+    on_partial: Optional[Callable[["BaseAgent", Any], None]] = None
+    
+    # True when the last result (or part of it) came from fallback() instead of the LLM
+    degraded: bool = False
+    
     def __init__(self, name: str, role: str):
         self.name = name
         self.role = role
-        self.llm = get_llm_client()
+        self.llm = get_llm_client(cache_policy=name)
     
     @abstractmethod
-    def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Process the context and return results"""
         pass
     
     def create_prompt(self, template: str, context: Dict[str, Any]) -> str:
         """Create prompt from template and context"""
-        return template.format(**context)
\ No newline at end of file
+        return template.format(**context)
+    
+    async def ask_json(self, prompt: str, system_prompt: str) -> Any:
+        """Ask the LLM for JSON; returns None if the call fails so the agent can fall back"""
+        try:
+            return await self.llm.agenerate_json(prompt, system_prompt)
+        except Exception as e:
+            # Includes CircuitOpenError, raised instantly while the provider is down
+            print(f"{self.name} LLM call failed, using fallback: {e}")
+            metrics.incr("agent_fallbacks")
+            return None
+    
+    @abstractmethod
+    def fallback(self, context: Dict[str, Any]) -> Any:
+        """Generic result used when the LLM can't answer in time or at all"""
+        pass
+    
+    def use_fallback(self, context: Dict[str, Any]) -> Any:
+        self.degraded = True
+        return self.fallback(context)
+    
+    def publish(self, context: Dict[str, Any], result: Any) -> None:
+        """Store this agent's result in the shared context"""
+        context[self.produces] = result
+    
+    def summarize(self, result: Any, context: Dict[str, Any]) -> str:
+        """Describe the result for the agent_messages log"""
+        return f"{self.name} finished"
@@ -1,13 +1,25 @@
+import asyncio
 from app.agents.base_agent import BaseAgent
+from app.knowledge import get_budget_models
 from typing import Dict, Any
 
 class BudgetAgent(BaseAgent):
     """Agent responsible for budget analysis"""
     
+    consumes = ["destination"]
+    produces = "budget_analysis"
+    
     def __init__(self):
         super().__init__("BudgetAgent", "Travel Budget Analyst")
     
-    def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Earlier answers for the same route and month, rescaled to this trip length
+        models = get_budget_models()
+        if models is not None:
+            estimate = await asyncio.to_thread(models.estimate, context['origin_city'], context['destination'], context['month'], context['days'])
+            if estimate is not None:
+                return estimate
+        
         system_prompt = """You are a travel budget expert. Analyze the trip cost breakdown.
         
         Return your response as JSON in this exact format:
@@ -34,22 +46,37 @@ class BudgetAgent(BaseAgent):
         Provide realistic cost breakdown in USD.
         """
         
-        response = self.llm.generate_json(prompt, system_prompt)
+        response = await self.ask_json(prompt, system_prompt)
         
         if isinstance(response, dict) and "breakdown" in response:
+            if models is not None:
+                await asyncio.to_thread(models.observe, context['origin_city'], context['destination'], context['month'], context['days'], response)
             return response
         else:
-            # Fallback budget
-            per_day = context['budget_total'] / context['days']
-            return {
-                "breakdown": {
-                    "flights": context['budget_total'] * 0.35,
-                    "accommodation": context['budget_total'] * 0.25,
-                    "food": context['budget_total'] * 0.20,
-                    "activities": context['budget_total'] * 0.15,
-                    "transport": context['budget_total'] * 0.05
-                },
-                "total": context['budget_total'],
-                "daily_average": per_day,
-                "budget_tips": ["Book in advance", "Use public transport"]
-            }
\ No newline at end of file
+            return self.use_fallback(context)
+    
+    def fallback(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Split the stated budget using typical proportions
+        per_day = context['budget_total'] / context['days']
+        return {
+            "breakdown": {
+                "flights": context['budget_total'] * 0.35,
+                "accommodation": context['budget_total'] * 0.25,
+                "food": context['budget_total'] * 0.20,
+                "activities": context['budget_total'] * 0.15,
+                "transport": context['budget_total'] * 0.05
+            },
+            "total": context['budget_total'],
+            "daily_average": per_day,
+            "budget_tips": ["Book in advance", "Use public transport"]
+        }
+    
+    @staticmethod
+    def total_cost(budget_analysis: Dict[str, Any]) -> float:
+        """Total estimated cost of a budget analysis"""
+        if 'breakdown' in budget_analysis:
+            return sum(budget_analysis['breakdown'].values())
+        return budget_analysis.get('total', 0)
+    
+    def summarize(self, result: Dict[str, Any], context: Dict[str, Any]) -> str:
+        return f"Estimated total cost: ${self.total_cost(result):.2f} (Budget: ${context['budget_total']})"
@@ -1,14 +1,18 @@
 from app.agents.base_agent import BaseAgent
+from app.destinations import display_name
 from typing import Dict, Any
 import json
 
 class DestinationAgent(BaseAgent):
    """Agent responsible for selecting the best destination"""
    
+   produces = "destination_info"
+   
    def __init__(self):
        super().__init__("DestinationAgent", "Travel Destination Expert")
    
-   def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
+   async def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
+       # The traveler's name stays out of the prompts, so plans can be shared between guests
        # Check if user provided a preferred destination
        if context.get('preferred_destination') and context['preferred_destination'].strip():
            # User specified a destination - validate and provide details
@@ -25,7 +29,6 @@ class DestinationAgent(BaseAgent):
            
            prompt = f"""
            The traveler wants to visit: {context['preferred_destination']}
-           Traveler: {context['traveler_name']}
            From: {context['origin_city']}
            Duration: {context['days']} days
            Month: {context['month']}
@@ -49,7 +52,6 @@ class DestinationAgent(BaseAgent):
            }"""
            
            prompt = f"""
-           Traveler: {context['traveler_name']}
            From: {context['origin_city']}
            Duration: {context['days']} days
            Month: {context['month']}
@@ -60,15 +62,26 @@ class DestinationAgent(BaseAgent):
            Select the best destination and explain why.
            """
        
-       response = self.llm.generate_json(prompt, system_prompt)
+       response = await self.ask_json(prompt, system_prompt)
        
        # Ensure we have the required fields
        if isinstance(response, dict) and "destination" in response:
+           # Kept as validated; cache keys canonicalize it themselves
+           response['destination'] = str(response['destination'])
            return response
        else:
-           # Fallback
-           return {
-               "destination": context.get('preferred_destination', 'Bali, Indonesia'),
-               "reason": "Perfect for your interests and budget",
-               "highlights": ["Beaches", "Temples", "Culture"]
-           }
+           return self.use_fallback(context)
+   
+   def fallback(self, context: Dict[str, Any]) -> Dict[str, Any]:
+       return {
+           "destination": display_name(context.get('preferred_destination') or 'Bali, Indonesia'),
+           "reason": "Perfect for your interests and budget",
+           "highlights": ["Beaches", "Temples", "Culture"]
+       }
+   
+   def publish(self, context: Dict[str, Any], result: Dict[str, Any]) -> None:
+       super().publish(context, result)
+       context['destination'] = result['destination']
+   
+   def summarize(self, result: Dict[str, Any], context: Dict[str, Any]) -> str:
+       return f"Selected {result['destination']}: {result.get('reason', '')}"
@@ -1,15 +1,18 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any, List
+from app.config import Config
+from app.llm.json_stream import aiter_array_items
+from app.metrics import metrics
+from typing import Dict, Any, List, Optional
+import asyncio
 
 class ItineraryAgent(BaseAgent):
     """Agent responsible for creating detailed itineraries"""
-    
-    def __init__(self):
-        super().__init__("ItineraryAgent", "Travel Itinerary Planner")
-    
-    def process(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
-        system_prompt = """You are a travel itinerary expert. Create a day-by-day itinerary.
-        
+
+    consumes = ["destination"]
+    produces = "itinerary"
+
+    SYSTEM_PROMPT = """You are a travel itinerary expert. Create a day-by-day itinerary.
+
         Return your response as JSON in this exact format:
         {
             "itinerary": [
@@ -17,36 +20,135 @@ class ItineraryAgent(BaseAgent):
                     "day": 1,
                     "title": "Arrival and Exploration",
                     "morning": "Activity description",
-                    "afternoon": "Activity description", 
+                    "afternoon": "Activity description",
                     "evening": "Activity description",
                     "meal_suggestions": ["restaurant1", "restaurant2"]
                 }
             ]
         }"""
-        
+
+    OUTLINE_SYSTEM_PROMPT = """You are a travel itinerary expert. Outline a multi-day trip with one short theme per day,
+        so that each part of the trip can be planned in detail separately without repeating activities.
+
+        Return your response as JSON in this exact format:
+        {
+            "outline": [
+                {"day": 1, "theme": "Arrival and old town"}
+            ]
+        }"""
+
+    def __init__(self):
+        super().__init__("ItineraryAgent", "Travel Itinerary Planner")
+
+    async def process(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        days = context['days']
+        chunk_days = max(1, Config.ITINERARY_CHUNK_DAYS)
+
+        if days <= chunk_days:
+            return await self.generate_days(context, 1, days)
+
+        # Long trips: plan day ranges concurrently around a shared outline so
+        # each response fits within MAX_TOKENS and the days don't repeat
+        outline = await self.generate_outline(context)
+        ranges = [(first, min(first + chunk_days - 1, days)) for first in range(1, days + 1, chunk_days)]
+        chunks = await asyncio.gather(*[
+            self.generate_days(context, first, last, outline) for first, last in ranges
+        ])
+        return [day for chunk in chunks for day in chunk]
+
+    async def generate_outline(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
         prompt = f"""
+        Outline a {context['days']}-day trip to {context['destination']}.
+        Traveler interests: {', '.join(context['interests'])}
+        Month of travel: {context['month']}
+
+        Give one short theme per day, for every day from 1 to {context['days']}.
+        """
+
+        response = await self.ask_json(prompt, self.OUTLINE_SYSTEM_PROMPT)
+        if isinstance(response, dict) and isinstance(response.get("outline"), list):
+            return response["outline"]
+        return []
+
+    async def generate_days(self, context: Dict[str, Any], first: int, last: int,
+                            outline: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Generate days ``first``..``last``, numbered and padded to exactly that range"""
+        if first == 1 and last == context['days']:
+            prompt = f"""
         Create a {context['days']}-day itinerary for {context['destination']}.
         Traveler interests: {', '.join(context['interests'])}
         Month of travel: {context['month']}
         Budget level: ${context['budget_total']} for entire trip
-        
+
         Include specific activities, landmarks, and meal recommendations.
         """
-        
-        response = self.llm.generate_json(prompt, system_prompt)
-        
-        if isinstance(response, dict) and "itinerary" in response:
-            return response["itinerary"]
         else:
-            # Fallback itinerary
-            return [
-                {
-                    "day": i + 1,
-                    "title": f"Day {i + 1}",
-                    "morning": "Explore local area",
-                    "afternoon": "Visit main attractions",
-                    "evening": "Dinner and relaxation",
-                    "meal_suggestions": ["Local restaurant"]
-                }
-                for i in range(context['days'])
-            ]
\ No newline at end of file
+            outline_text = "\n".join(
+                f"        Day {item.get('day')}: {item.get('theme', '')}" for item in outline or []
+            )
+            prompt = f"""
+        Create days {first} to {last} of a {context['days']}-day itinerary for {context['destination']}.
+        Traveler interests: {', '.join(context['interests'])}
+        Month of travel: {context['month']}
+        Budget level: ${context['budget_total']} for entire trip
+
+        Trip outline (other days are planned separately, follow it and avoid repeating them):
+{outline_text or '        (no outline available)'}
+
+        Return only days {first} to {last}, numbered {first} to {last}.
+        Include specific activities, landmarks, and meal recommendations.
+        """
+
+        # Parse days as they stream in so callers can show day 1 early
+        days = []
+        count = last - first + 1
+        text = []
+
+        def take(day: Any) -> None:
+            if not isinstance(day, dict) or len(days) == count:
+                return
+            day["day"] = first + len(days)
+            days.append(day)
+            if self.on_partial:
+                self.on_partial(self, day)
+
+        async def recorded():
+            async for chunk in self.llm.agenerate_stream(prompt, self.SYSTEM_PROMPT):
+                text.append(chunk)
+                yield chunk
+
+        try:
+            async for day in aiter_array_items(recorded(), "itinerary"):
+                take(day)
+        except Exception as e:
+            # Keep the days that arrived; a tripped breaker fails here instantly
+            print(f"{self.name} LLM stream failed, using fallback days: {e}")
+            metrics.incr("agent_fallbacks")
+
+        if not days and text:
+            # Nothing parsed as it streamed; try the whole response the way ask_json would
+            response = self.llm.parse_json("".join(text))
+            for day in response.get("itinerary", []) if isinstance(response, dict) else []:
+                take(day)
+
+        # Fill any days lost to truncation, bad output or LLM errors with a generic plan
+        if len(days) < count:
+            self.degraded = True
+        return days + [self.fallback_day(number) for number in range(first + len(days), last + 1)]
+    
+    def fallback(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [self.fallback_day(number) for number in range(1, context['days'] + 1)]
+
+    @staticmethod
+    def fallback_day(number: int) -> Dict[str, Any]:
+        return {
+            "day": number,
+            "title": f"Day {number}",
+            "morning": "Explore local area",
+            "afternoon": "Visit main attractions",
+            "evening": "Dinner and relaxation",
+            "meal_suggestions": ["Local restaurant"]
+        }
+
+    def summarize(self, result: List[Dict[str, Any]], context: Dict[str, Any]) -> str:
+        return f"Created {len(result)}-day detailed itinerary"
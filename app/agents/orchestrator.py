@@ -0,0 +1,190 @@
+from app.agents.base_agent import BaseAgent
+from app.agents.destination_agent import DestinationAgent
+from app.agents.itinerary_agent import ItineraryAgent
+from app.agents.budget_agent import BudgetAgent
+from app.agents.safety_agent import SafetyAgent
+from app.config import Config
+from app.deadline import remaining
+from app.destinations import display_name, same_destination
+from app.metrics import metrics
+from typing import Dict, Any, List, Callable, Optional
+import asyncio
+import time
+
+class AgentOrchestrator:
+    """Runs agents concurrently as soon as the context keys they consume are available"""
+
+    def __init__(self, agents: List[BaseAgent],
+                 on_complete: Optional[Callable[[BaseAgent, Dict[str, Any]], None]] = None):
+        self.agents = agents
+        self.timings: Dict[str, float] = {}
+        # Called with (agent, context) once an agent's final result is published
+        self.on_complete = on_complete
+
+    async def run(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Run all agents, publishing each result into the context as it completes"""
+        pending = list(self.agents)
+        running = {}
+
+        try:
+            while pending or running:
+                ready = [agent for agent in pending if all(key in context for key in agent.consumes)]
+                for agent in ready:
+                    pending.remove(agent)
+                    running[asyncio.create_task(self._timed(agent, context))] = agent
+
+                if not running:
+                    missing = {agent.name: [key for key in agent.consumes if key not in context] for agent in pending}
+                    raise ValueError(f"Unresolvable agent dependencies: {missing}")
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    agent = running.pop(task)
+                    agent.publish(context, task.result())
+                    self._notify(agent, context)
+        except BaseException:
+            # A failed agent, or the whole run being cancelled, stops the rest
+            for task in running:
+                task.cancel()
+            raise
+
+        return context
+
+    async def run_speculative(self, context: Dict[str, Any], key: str, guess: Any,
+                              matches: Callable[[Any, Any], bool]) -> Dict[str, Any]:
+        """Run agents that consume ``key`` early, assuming it will equal ``guess``.
+
+        The remaining agents run normally on the real context. If the value they
+        produce for ``key`` matches the guess the speculative results are kept,
+        otherwise the speculative agents are cancelled and re-run on the real
+        value as soon as it is published.
+        """
+        speculative = [
+            agent for agent in self.agents
+            if key in agent.consumes and all(k in context or k == key for k in agent.consumes)
+        ]
+        confirmed = [agent for agent in self.agents if agent not in speculative]
+
+        speculative_context = dict(context, **{key: guess})
+        ahead = AgentOrchestrator(speculative)
+        rerun = AgentOrchestrator(speculative, self.on_complete)
+        rerun_task: Optional[asyncio.Task] = None
+        resolved = False
+
+        def on_base_complete(agent: BaseAgent, ctx: Dict[str, Any]) -> None:
+            nonlocal rerun_task, resolved
+            self._notify(agent, ctx)
+            if resolved or key not in ctx:
+                return
+            resolved = True
+            if not matches(guess, ctx[key]):
+                # Don't wait for the rest of the confirmed agents to find out
+                metrics.incr("speculation_misses")
+                print(f"Speculation miss: guessed {guess!r}, got {ctx[key]!r}; re-running {[a.name for a in speculative]}")
+                ahead_task.cancel()
+                rerun_task = asyncio.create_task(rerun.run(ctx))
+
+        base = AgentOrchestrator(confirmed, on_base_complete)
+        start = time.perf_counter()
+        base_task = asyncio.create_task(base.run(context))
+        ahead_task = asyncio.create_task(ahead.run(speculative_context))
+        try:
+            await base_task
+            head_start = time.perf_counter() - start
+            if rerun_task is None:
+                await ahead_task
+            else:
+                await asyncio.gather(ahead_task, return_exceptions=True)
+                await rerun_task
+        except BaseException:
+            for task in (base_task, ahead_task, rerun_task):
+                if task is not None:
+                    task.cancel()
+            raise
+        self.timings.update(base.timings)
+        self.timings.update(ahead.timings)
+        self.timings.update(rerun.timings)
+
+        if rerun_task is None:
+            metrics.incr("speculation_hits")
+            metrics.incr("speculation_seconds_saved", head_start)
+            for agent in speculative:
+                agent.publish(context, speculative_context[agent.produces])
+                self._notify(agent, context)
+
+        return context
+
+    def _notify(self, agent: BaseAgent, context: Dict[str, Any]) -> None:
+        if self.on_complete is not None:
+            self.on_complete(agent, context)
+
+    async def _timed(self, agent: BaseAgent, context: Dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        agent.degraded = False
+        try:
+            time_left = remaining()
+            if time_left is None:
+                return await agent.process(context)
+            try:
+                return await asyncio.wait_for(agent.process(context), max(0.0, time_left))
+            except asyncio.TimeoutError:
+                # Out of time: cancel the agent's LLM calls and answer with its fallback
+                print(f"{agent.name} hit the request deadline, using fallback")
+                metrics.incr("agent_deadline_fallbacks")
+                return agent.use_fallback(context)
+        finally:
+            self.timings[agent.name] = time.perf_counter() - start
+
+
+def trip_agents() -> List[BaseAgent]:
+    """Agents that make up the trip planning pipeline"""
+    return [DestinationAgent(), ItineraryAgent(), BudgetAgent(), SafetyAgent()]
+
+
+def agent_messages(agents: List[BaseAgent], context: Dict[str, Any], timings: Dict[str, float]) -> List[Dict[str, str]]:
+    """Build the agent_messages log, in pipeline order, with per-agent timing"""
+    return [
+        {
+            "agent": agent.name,
+            "role": agent.role,
+            "content": agent.summarize(context[agent.produces], context),
+            "duration": f"{timings.get(agent.name, 0):.2f}s"
+        }
+        for agent in agents
+        if agent.produces in context
+    ]
+
+
+async def plan_trip(context: Dict[str, Any],
+                    on_complete: Optional[Callable[[BaseAgent, Dict[str, Any]], None]] = None,
+                    on_partial: Optional[Callable[[BaseAgent, Any], None]] = None) -> Dict[str, Any]:
+    """Run the trip planning pipeline and return the complete plan.
+
+    ``on_complete`` is called with (agent, context) as each agent finishes and
+    ``on_partial`` with (agent, item) for partial results such as single
+    itinerary days, which lets callers stream sections before the whole plan
+    is ready. Under a request deadline, agents still running when it expires
+    are cancelled and their sections listed in ``degraded_sections``.
+    """
+    agents = trip_agents()
+    for agent in agents:
+        agent.on_partial = on_partial
+    orchestrator = AgentOrchestrator(agents, on_complete)
+
+    preferred = (context.get('preferred_destination') or '').strip()
+    if preferred and Config.SPECULATIVE_EXECUTION:
+        # Start downstream agents on the user's destination while it is validated
+        await orchestrator.run_speculative(context, 'destination', display_name(preferred), same_destination)
+    else:
+        await orchestrator.run(context)
+
+    return {
+        "destination": context['destination'],
+        "destination_info": context['destination_info'],
+        "itinerary": context['itinerary'],
+        "budget_analysis": context['budget_analysis'],
+        "safety_info": context['safety_info'],
+        "within_budget": BudgetAgent.total_cost(context['budget_analysis']) <= context['budget_total'],
+        "agent_messages": agent_messages(agents, context, orchestrator.timings),
+        "degraded_sections": [agent.produces for agent in agents if agent.degraded]
+    }
@@ -1,13 +1,25 @@
+import asyncio
 from app.agents.base_agent import BaseAgent
+from app.knowledge import get_safety_cache
 from typing import Dict, Any, List
 
 class SafetyAgent(BaseAgent):
     """Agent responsible for safety and travel advisories"""
     
+    consumes = ["destination"]
+    produces = "safety_info"
+    
     def __init__(self):
         super().__init__("SafetyAgent", "Travel Safety Advisor")
     
-    def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Safety info only depends on destination, passport and month, so it is shared across users
+        cache = get_safety_cache()
+        if cache is not None:
+            cached = await asyncio.to_thread(cache.get, context['destination'], context['visa_passport'], context['month'])
+            if cached is not None:
+                return cached
+        
         system_prompt = """You are a travel safety expert. Provide safety advice and important information.
         
         Return your response as JSON in this exact format:
@@ -32,24 +44,31 @@ class SafetyAgent(BaseAgent):
         Include visa requirements, health advisories, and safety tips.
         """
         
-        response = self.llm.generate_json(prompt, system_prompt)
+        response = await self.ask_json(prompt, system_prompt)
         
         if isinstance(response, dict) and "safety_tips" in response:
+            if cache is not None:
+                await asyncio.to_thread(cache.set, context['destination'], context['visa_passport'], context['month'], response)
             return response
         else:
-            # Fallback safety info
-            return {
-                "safety_level": "Low",
-                "visa_required": False,
-                "vaccinations": ["Routine vaccines up to date"],
-                "safety_tips": [
-                    "Keep copies of important documents",
-                    "Register with your embassy",
-                    "Get travel insurance"
-                ],
-                "emergency_contacts": {
-                    "police": "911",
-                    "medical": "Emergency services"
-                },
-                "weather_advisory": f"Typical weather for {context['month']}"
-            }
\ No newline at end of file
+            return self.use_fallback(context)
+    
+    def fallback(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "safety_level": "Low",
+            "visa_required": False,
+            "vaccinations": ["Routine vaccines up to date"],
+            "safety_tips": [
+                "Keep copies of important documents",
+                "Register with your embassy",
+                "Get travel insurance"
+            ],
+            "emergency_contacts": {
+                "police": "911",
+                "medical": "Emergency services"
+            },
+            "weather_advisory": f"Typical weather for {context['month']}"
+        }
+    
+    def summarize(self, result: Dict[str, Any], context: Dict[str, Any]) -> str:
+        return f"Safety level: {result.get('safety_level', 'Unknown')}, Visa required: {result.get('visa_required', 'Check requirements')}"
@@ -26,6 +26,7 @@ class User(Base):
     trips = relationship("Trip", back_populates="user", cascade="all, delete-orphan")
     feedback = relationship("Feedback", back_populates="user", cascade="all, delete-orphan")
     sessions = relationship("UserSession", back_populates="user", cascade="all, delete-orphan")
+    plan_jobs = relationship("PlanJob", back_populates="user", cascade="all, delete-orphan")
 
 class UserPreference(Base):
     __tablename__ = "user_preferences"
@@ -66,6 +67,26 @@ class Trip(Base):
     user = relationship("User", back_populates="trips")
     feedback = relationship("Feedback", back_populates="trip", cascade="all, delete-orphan")
 
+class PlanJob(Base):
+    __tablename__ = "plan_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed
+    request_data = Column(JSONB, nullable=False)  # TripRequest as submitted
+    partial_result = Column(JSONB, default={})  # Sections finished so far, by name
+    result = Column(JSONB)  # TripResponse once completed
+    trip_id = Column(UUID(as_uuid=True), ForeignKey("trips.id", ondelete="SET NULL"))
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_expires_at = Column(DateTime(timezone=True))  # Renewed by the worker running the job
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True))
+    
+    # Relationship
+    user = relationship("User", back_populates="plan_jobs")
+
 class Feedback(Base):
     __tablename__ = "feedback"
     
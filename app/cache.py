@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MISSING = object()
+
+class MemoryCache:
+    """Bounded in-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return default
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache shared by every worker process on the host"""
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, table: str = "cache", max_entries: int = 50000):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) for a live entry, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            if row[1] < time.time():
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def update(self, key: str, fn: Callable[[Any], Any], ttl: float) -> Any:
+        """Atomically replace a value with ``fn(current)`` and return it.
+
+        ``current`` is None for a missing or expired key. The read and write
+        share one transaction, so concurrent updates from other workers
+        aren't lost.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # Serializes workers on the file lock
+            try:
+                row = self._conn.execute(
+                    f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                value = fn(json.loads(row[0]) if row is not None and row[1] >= now else None)
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now + ttl, now)
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(now)
+        return value
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def entries(self) -> List[Tuple[str, Any, float, float]]:
+        """Live (key, value, expires_at, created_at) rows, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value, expires_at, created_at FROM {self.table} WHERE expires_at >= ? ORDER BY created_at",
+                (time.time(),)
+            ).fetchall()
+        return [(key, json.loads(value), expires_at, created_at) for key, value, expires_at, created_at in rows]
+
+    def _prune(self, now: float) -> None:
+        expired = self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,)).rowcount
+        self.stats["expirations"] += expired
+        overflow = self._conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN "
+            f"(SELECT key FROM {self.table} ORDER BY created_at LIMIT max(0, (SELECT COUNT(*) FROM {self.table}) - ?))",
+            (self.max_entries,)
+        ).rowcount
+        self.stats["evictions"] += overflow
+
+
+class TieredCache:
+    """In-memory LRU in front of an optional shared on-disk tier"""
+
+    def __init__(self, memory: MemoryCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.memory.get(key, MISSING)
+        if value is not MISSING:
+            return json.loads(value)
+        if self.disk is None:
+            return default
+        return self._promote(key, self.disk.get_entry(key), default)
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """get() for async callers: the disk tier is read in a thread, off the event loop"""
+        value = self.memory.get(key, MISSING)
+        if value is not MISSING:
+            return json.loads(value)
+        if self.disk is None:
+            return default
+        return self._promote(key, await asyncio.to_thread(self.disk.get_entry, key), default)
+
+    def _promote(self, key: str, entry: Optional[Tuple[Any, float]], default: Any) -> Any:
+        if entry is None:
+            return default
+        # Promote to memory for the rest of the disk entry's lifetime
+        value, expires_at = entry
+        self.memory.set(key, json.dumps(value), expires_at - time.time())
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        # Values are stored serialized so callers never share mutable results
+        self.memory.set(key, json.dumps(value), ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+    async def aset(self, key: str, value: Any, ttl: float) -> None:
+        """set() for async callers: the disk tier is written in a thread, off the event loop"""
+        self.memory.set(key, json.dumps(value), ttl)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"memory": dict(self.memory.stats, size=len(self.memory))}
+        if self.disk is not None:
+            stats["disk"] = dict(self.disk.stats, size=len(self.disk))
+        return stats
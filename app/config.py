@@ -14,12 +14,115 @@ class Config:
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
     TOGETHER_API_KEY = os.getenv("TOGETHER_API_KEY")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # Override for proxies and local testing
     
     # LLM Settings
     LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
     MODEL_TEMPERATURE = float(os.getenv("MODEL_TEMPERATURE", "0.7"))
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "1000"))
     
+    # LLM HTTP connection pool (shared by all agents in a worker)
+    LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20"))
+    LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10"))
+    LLM_POOL_KEEPALIVE_EXPIRY = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "60"))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+    LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    
+    # LLM response cache: in-process LRU in front of a SQLite file shared by workers
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./cache/llm_cache.db")  # Empty for memory only
+    
+    # Cache TTL (seconds) per agent; chat is never cached
+    LLM_CACHE_TTLS = {
+        "DestinationAgent": int(os.getenv("LLM_CACHE_TTL_DESTINATION", "86400")),
+        "ItineraryAgent": int(os.getenv("LLM_CACHE_TTL_ITINERARY", "21600")),
+        "BudgetAgent": int(os.getenv("LLM_CACHE_TTL_BUDGET", "21600")),
+        "SafetyAgent": int(os.getenv("LLM_CACHE_TTL_SAFETY", "86400")),
+    }
+    
+    # Destination knowledge shared by all users, keyed by canonical destination (SQLite file shared by workers)
+    KNOWLEDGE_CACHE_PATH = os.getenv("KNOWLEDGE_CACHE_PATH", "./cache/knowledge.db")
+    SAFETY_CACHE_ENABLED = os.getenv("SAFETY_CACHE_ENABLED", "true").lower() == "true"
+    SAFETY_CACHE_TTL = int(os.getenv("SAFETY_CACHE_TTL", "604800"))  # One week
+    # Budgets rescaled by trip length from per-route cost models learned from BudgetAgent answers
+    BUDGET_MODEL_ENABLED = os.getenv("BUDGET_MODEL_ENABLED", "true").lower() == "true"
+    BUDGET_MODEL_TTL = int(os.getenv("BUDGET_MODEL_TTL", "604800"))  # Samples older than this are ignored
+    BUDGET_MODEL_MIN_SAMPLES = int(os.getenv("BUDGET_MODEL_MIN_SAMPLES", "3"))
+    BUDGET_MODEL_MAX_ERROR = float(os.getenv("BUDGET_MODEL_MAX_ERROR", "0.15"))  # Relative RMS error of the fit
+    BUDGET_MODEL_MAX_EXTRAPOLATION = float(os.getenv("BUDGET_MODEL_MAX_EXTRAPOLATION", "2"))  # x shortest/longest trip seen
+    
+    # Whole /plan-guest results for requests that differ only in traveler_name (skipped with ?fresh=true)
+    GUEST_PLAN_CACHE_ENABLED = os.getenv("GUEST_PLAN_CACHE_ENABLED", "true").lower() == "true"
+    GUEST_PLAN_CACHE_TTL = int(os.getenv("GUEST_PLAN_CACHE_TTL", "21600"))
+    GUEST_PLAN_CACHE_MAX_ENTRIES = int(os.getenv("GUEST_PLAN_CACHE_MAX_ENTRIES", "500"))
+    GUEST_PLAN_CACHE_PATH = os.getenv("GUEST_PLAN_CACHE_PATH", "./cache/guest_plans.db")  # Empty for memory only
+    
+    # Key for the /admin endpoints (X-Admin-Key header); empty disables them
+    ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+    
+    # Multi-provider routing: used when more than one provider has an API key
+    LLM_ROUTING_ENABLED = os.getenv("LLM_ROUTING_ENABLED", "true").lower() == "true"
+    LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "10"))  # Until a provider's p95 is known
+    LLM_ROUTER_MIN_SAMPLES = int(os.getenv("LLM_ROUTER_MIN_SAMPLES", "5"))
+    LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "100"))
+    
+    # Retries of transient LLM errors; the budget caps retries per worker per window
+    LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1"))
+    LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "10"))
+    LLM_RETRY_AFTER_MAX = float(os.getenv("LLM_RETRY_AFTER_MAX", "30"))  # Longer Retry-After: give up
+    LLM_RETRY_BUDGET = int(os.getenv("LLM_RETRY_BUDGET", "20"))
+    LLM_RETRY_BUDGET_WINDOW = float(os.getenv("LLM_RETRY_BUDGET_WINDOW", "60"))
+    
+    # Client-side provider quotas (token buckets shared by workers through a SQLite file).
+    # Calls queue for capacity and fail after LLM_RATE_LIMIT_MAX_WAIT seconds; 0 = unlimited
+    LLM_RATE_LIMIT_ENABLED = os.getenv("LLM_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    LLM_RATE_LIMIT_PATH = os.getenv("LLM_RATE_LIMIT_PATH", "./cache/rate_limits.db")  # Empty for per-worker
+    LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", "30"))
+    LLM_RATE_LIMITS = {
+        "groq": {"rpm": int(os.getenv("GROQ_RPM", "30")), "tpm": int(os.getenv("GROQ_TPM", "0"))},
+        "gemini": {"rpm": int(os.getenv("GEMINI_RPM", "15")), "tpm": int(os.getenv("GEMINI_TPM", "0"))},
+    }
+    
+    # Per-provider circuit breaker: open after N consecutive failures, retry after a cooldown
+    LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RECOVERY_SECONDS = float(os.getenv("LLM_BREAKER_RECOVERY_SECONDS", "30"))
+    LLM_BREAKER_HALF_OPEN_CALLS = int(os.getenv("LLM_BREAKER_HALF_OPEN_CALLS", "1"))
+    
+    # Admission control for LLM-backed endpoints (per worker): beyond the concurrency
+    # limit requests queue, and are refused with 503 if the expected wait is too long
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "8"))
+    ADMISSION_MAX_QUEUE_WAIT = float(os.getenv("ADMISSION_MAX_QUEUE_WAIT", "20"))
+    ADMISSION_INITIAL_SERVICE_SECONDS = float(os.getenv("ADMISSION_INITIAL_SERVICE_SECONDS", "10"))
+    # Weighted fair queuing between request classes; higher weight = larger share when queued
+    ADMISSION_WEIGHTS = {
+        "chat": float(os.getenv("ADMISSION_WEIGHT_CHAT", "4")),
+        "plan": float(os.getenv("ADMISSION_WEIGHT_PLAN", "2")),
+        "guest_chat": float(os.getenv("ADMISSION_WEIGHT_GUEST_CHAT", "2")),
+        "guest_plan": float(os.getenv("ADMISSION_WEIGHT_GUEST_PLAN", "1")),
+    }
+    
+    # Idempotency-Key results for /plan and /plan-guest (memory LRU + SQLite file shared by workers)
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "3600"))
+    IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "1000"))
+    IDEMPOTENCY_PATH = os.getenv("IDEMPOTENCY_PATH", "./cache/idempotency.db")  # Empty for memory only
+    
+    # Background plan jobs (POST /plan/jobs); state lives in the plan_jobs table
+    PLAN_JOB_WORKERS = int(os.getenv("PLAN_JOB_WORKERS", "2"))  # Per backend process, 0 disables
+    PLAN_JOB_DEADLINE_SECONDS = float(os.getenv("PLAN_JOB_DEADLINE_SECONDS", "300"))
+    PLAN_JOB_LEASE_SECONDS = float(os.getenv("PLAN_JOB_LEASE_SECONDS", "60"))  # Running jobs not renewed within this are resumed
+    PLAN_JOB_MAX_ATTEMPTS = int(os.getenv("PLAN_JOB_MAX_ATTEMPTS", "3"))
+    PLAN_JOB_POLL_SECONDS = float(os.getenv("PLAN_JOB_POLL_SECONDS", "2"))
+    
+    # Pipeline Settings
+    # /plan answers within this many seconds of arrival (nginx gives up at 60), using fallbacks if needed
+    PLAN_DEADLINE_SECONDS = float(os.getenv("PLAN_DEADLINE_SECONDS", "50"))
+    # Start itinerary/budget/safety on preferred_destination before it is validated
+    SPECULATIVE_EXECUTION = os.getenv("SPECULATIVE_EXECUTION", "true").lower() == "true"
+    # Trips longer than this are planned in concurrent day ranges of this size
+    ITINERARY_CHUNK_DAYS = int(os.getenv("ITINERARY_CHUNK_DAYS", "5"))
+    
     # Model names for each provider
     MODELS = {
         "groq": "llama-3.3-70b-versatile",  # Fast and good
@@ -45,4 +148,15 @@ class Config:
         elif cls.TOGETHER_API_KEY:
             return LLMProvider.TOGETHER
         
-        raise ValueError("No valid API keys found. Please set at least one API key.")
\ No newline at end of file
+        raise ValueError("No valid API keys found. Please set at least one API key.")
+    
+    @classmethod
+    def get_available_providers(cls):
+        """Providers with an API key and a client implementation, active one first"""
+        keys = {
+            LLMProvider.GROQ: cls.GROQ_API_KEY,
+            LLMProvider.GEMINI: cls.GEMINI_API_KEY,
+        }
+        active = cls.get_active_provider()
+        available = [provider for provider, key in keys.items() if key]
+        return sorted(available, key=lambda provider: provider != active)
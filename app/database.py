@@ -62,7 +62,7 @@ def create_tables():
     """Create all tables in the database"""
     try:
         # Import all models to ensure they're registered
-        from app.auth.models import User, UserPreference, Trip, Feedback, UserSession
+        from app.auth.models import User, UserPreference, Trip, Feedback, UserSession, PlanJob
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
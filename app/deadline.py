@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Absolute time.monotonic() by which the current request must be answered.
+# Context variables are copied into asyncio tasks, so every agent and LLM
+# call started under a deadline sees it.
+_expires_at: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current request's deadline, or None if it has none"""
+    expires_at = _expires_at.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+@contextmanager
+def deadline(seconds: float, started_at: Optional[float] = None) -> Iterator[None]:
+    """Run the block under a deadline ``seconds`` after ``started_at`` (default: now).
+
+    An enclosing deadline that expires sooner still wins.
+    """
+    expires_at = (time.monotonic() if started_at is None else started_at) + seconds
+    outer = _expires_at.get()
+    token = _expires_at.set(expires_at if outer is None else min(outer, expires_at))
+    try:
+        yield
+    finally:
+        _expires_at.reset(token)
@@ -0,0 +1,107 @@
+import json
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, Optional
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "destinations.json")
+
+def normalize(text: str) -> str:
+    """Case-, accent-, punctuation- and whitespace-insensitive form of free text.
+
+    Commas are kept so callers can still split off qualifiers such as a country.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = re.sub(r"[^\w,]+", " ", text)
+    return ", ".join(part for part in (re.sub(r"\s+", " ", p).strip() for p in text.split(",")) if part)
+
+
+class DestinationIndex:
+    """Maps free-text destinations to a canonical id and display name.
+
+    "Bali", "bali, indonesia", "Báli ", "Bali Indonesia" and "Denpasar, Bali"
+    all resolve to the id "bali" and the name "Bali, Indonesia". A text
+    matches a known destination only as a whole or as a place followed by
+    qualifiers that agree with it (its country, or another of its aliases),
+    so "Paris, Texas" and "London, Ontario" stay their own places rather
+    than becoming Paris, France and London, UK. Aliases come only from the
+    bundled data file, so every worker resolves a text the same way.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, str] = {}  # Normalized alias -> id
+        self.names: Dict[str, str] = {}  # Id -> display name
+        self.countries: Dict[str, str] = {}  # Id -> normalized country from its display name
+        self.country_aliases: Dict[str, str] = {}  # "united states" -> "usa"
+
+    @classmethod
+    def load(cls, path: str = DATA_PATH) -> "DestinationIndex":
+        index = cls()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        index.country_aliases.update(
+            (normalize(alias), normalize(country)) for alias, country in data.get("country_aliases", {}).items()
+        )
+        for entry in data["destinations"]:
+            index.add(entry["id"], entry["name"], entry.get("aliases", []))
+        return index
+
+    def add(self, dest_id: str, name: str, aliases: Iterable[str] = ()) -> None:
+        parts = normalize(name).split(", ")
+        if len(parts) > 1:
+            self.countries[dest_id] = parts[-1]
+        self.names[dest_id] = name
+        for alias in [dest_id, name, parts[0], *aliases]:
+            self._ids.setdefault(normalize(alias), dest_id)
+
+    def agrees(self, dest_id: str, qualifier: str) -> bool:
+        """Whether a qualifier such as "indonesia" or "bali" fits a known destination"""
+        country = self.country_aliases.get(qualifier, qualifier)
+        return self.countries.get(dest_id) == country or self._ids.get(qualifier) == dest_id
+
+    def lookup(self, text: str) -> Optional[str]:
+        """Id of a known destination, or None"""
+        normalized = normalize(text)
+        dest_id = self._ids.get(normalized)
+        if dest_id is not None:
+            return dest_id
+        place, *qualifiers = normalized.split(", ")
+        if qualifiers:
+            dest_id = self._ids.get(place)
+            if dest_id is not None and all(self.agrees(dest_id, q) for q in qualifiers):
+                return dest_id
+            return None
+        words = place.split(" ")
+        for size in (3, 2, 1):  # "Bali Indonesia": a country without the comma
+            if len(words) > size:
+                dest_id = self._ids.get(" ".join(words[:-size]))
+                if dest_id is not None and self.agrees(dest_id, " ".join(words[-size:])):
+                    return dest_id
+        return None
+
+    def canonical_id(self, text: str) -> str:
+        """Id for ``text``; unknown places get their whole normalized text"""
+        return self.lookup(text) or normalize(text)
+
+    def display_name(self, text: str) -> str:
+        dest_id = self.lookup(text)
+        return self.names[dest_id] if dest_id is not None else (text or "").strip()
+
+
+destination_index = DestinationIndex.load()
+
+def canonicalize(name: str) -> str:
+    """Canonical id of a free-text destination.
+
+    "Bali, Indonesia", " bali ", "Báli" and "Denpasar, Bali" all become "bali".
+    """
+    return destination_index.canonical_id(name)
+
+def display_name(name: str) -> str:
+    """Canonical display name ("Bali, Indonesia") for a known destination, else the name as given"""
+    return destination_index.display_name(name)
+
+def same_destination(a: str, b: str) -> bool:
+    """Whether two destination strings refer to the same place"""
+    return canonicalize(a) == canonicalize(b)
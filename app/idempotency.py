@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.cache import MISSING, MemoryCache, SQLiteCache, TieredCache
+from app.config import Config
+from app.metrics import metrics
+
+class IdempotencyConflict(Exception):
+    """An Idempotency-Key was reused for a different request body"""
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class Flight:
+    """One in-progress computation that every request with the same key waits on"""
+
+    def __init__(self, digest: str, compute: Callable[[], Awaitable[Any]],
+                 on_done: Callable[[asyncio.Task], None]):
+        self.digest = digest
+        self.compute = compute
+        self.on_done = on_done
+        self.task: Optional[asyncio.Task] = None
+        self.saving: Optional[asyncio.Task] = None
+        self.waiters = 0
+
+    async def wait(self) -> Any:
+        if self.task is None:
+            # Started by the first waiter so it inherits that request's deadline and call ledger
+            self.task = asyncio.ensure_future(self.compute())
+            self.task.add_done_callback(self.on_done)
+        self.waiters += 1
+        try:
+            return await asyncio.shield(self.task)
+        finally:
+            self.waiters -= 1
+            if self.waiters == 0 and not self.task.done():
+                self.task.cancel()  # Everyone waiting for it has gone away
+
+
+class IdempotencyStore:
+    """Runs each Idempotency-Key's request once.
+
+    A repeat that arrives while the first is running waits for the same
+    computation; one that arrives later gets the stored result until it
+    expires. Finished results live in a bounded TTL cache shared by workers,
+    in-flight computations only in the worker running them.
+    """
+
+    def __init__(self, cache: TieredCache, ttl: float):
+        self.cache = cache
+        self.ttl = ttl
+        self._flights: Dict[str, Flight] = {}
+
+    async def lookup(self, key: str, payload: Dict[str, Any]) -> Any:
+        """Stored result for ``key``, or MISSING"""
+        entry = await self.cache.aget(key, MISSING)
+        if entry is MISSING:
+            return MISSING
+        if entry["fingerprint"] != fingerprint(payload):
+            raise IdempotencyConflict(key)
+        metrics.incr("idempotent_replays")
+        return entry["result"]
+
+    def flight(self, key: str, payload: Dict[str, Any], compute: Callable[[], Awaitable[Any]]) -> Flight:
+        """The running computation for ``key``, starting a new one if there is none"""
+        digest = fingerprint(payload)
+        flight = self._flights.get(key)
+        if flight is not None:
+            if flight.digest != digest:
+                raise IdempotencyConflict(key)
+            metrics.incr("idempotent_attaches")
+            return flight
+
+        def done(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception() is None:
+                # Stays attachable until the result is stored, so a repeat can't miss both
+                flight.saving = asyncio.ensure_future(self._save(key, flight, task.result()))
+            else:
+                self._forget(key, flight)
+
+        flight = Flight(digest, compute, done)
+        self._flights[key] = flight
+        return flight
+
+    async def _save(self, key: str, flight: Flight, result: Any) -> None:
+        try:
+            await self.cache.aset(key, {"fingerprint": flight.digest, "result": result}, self.ttl)
+        finally:
+            self._forget(key, flight)
+
+    def _forget(self, key: str, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+_store: Optional[IdempotencyStore] = None
+
+def get_idempotency_store() -> IdempotencyStore:
+    global _store
+    if _store is None:
+        disk = SQLiteCache(Config.IDEMPOTENCY_PATH, table="idempotency") if Config.IDEMPOTENCY_PATH else None
+        _store = IdempotencyStore(TieredCache(MemoryCache(Config.IDEMPOTENCY_MAX_ENTRIES), disk), Config.IDEMPOTENCY_TTL)
+    return _store
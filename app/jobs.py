@@ -0,0 +1,248 @@
+import asyncio
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.auth.models import PlanJob
+from app.config import Config
+from app.metrics import metrics
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# handler(job, on_section) -> (TripResponse dict, save); on_section(name, data) records progress and
+# save(db) adds the trip to the session without committing and returns its id
+TripSaver = Callable[[Session], Any]
+JobHandler = Callable[[PlanJob, Callable[[str, Any], None]], Awaitable[Tuple[Dict[str, Any], TripSaver]]]
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class PlanJobWorkers:
+    """Worker pool for asynchronous trip planning.
+
+    Jobs are rows in ``plan_jobs``, so they outlive the process that accepted
+    them. Each backend process runs ``workers`` tasks that claim the oldest
+    queued job with a conditional UPDATE and renew a lease while planning.
+    A running job whose lease lapses (its process died or was restarted) is
+    queued again for any worker to resume, or marked failed once it has used
+    ``max_attempts``. The attempt number doubles as a fencing token: a worker
+    that lost its lease can no longer write to the job, and the trip is saved
+    in the same transaction that completes the job, so it is saved only by
+    the worker that completes it. Database calls run in threads, off the
+    event loop the planning runs on.
+    """
+
+    def __init__(self, handler: JobHandler, session_factory: Callable[[], Session],
+                 workers: Optional[int] = None, lease_seconds: Optional[float] = None,
+                 max_attempts: Optional[int] = None, poll_interval: Optional[float] = None):
+        self.handler = handler
+        self.session_factory = session_factory
+        self.workers = Config.PLAN_JOB_WORKERS if workers is None else workers
+        self.lease_seconds = lease_seconds or Config.PLAN_JOB_LEASE_SECONDS
+        self.max_attempts = max_attempts or Config.PLAN_JOB_MAX_ATTEMPTS
+        self.poll_interval = poll_interval or Config.PLAN_JOB_POLL_SECONDS
+        self.busy = 0
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+
+    def submit(self, db: Session, user_id, request_data: Dict[str, Any]) -> PlanJob:
+        """Queue a job and wake an idle worker"""
+        job = PlanJob(user_id=user_id, status=QUEUED, request_data=request_data, partial_result={})
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        metrics.incr("plan_jobs_submitted")
+        if self._wake is not None:
+            self._wake.set()
+        return job
+
+    def start(self) -> None:
+        if self._tasks or self.workers <= 0:
+            return
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        print(f"Started {self.workers} plan job workers")
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they were running go back in the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                print(f"Plan job worker could not claim a job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.busy += 1
+            try:
+                await self._run(job)
+            finally:
+                self.busy -= 1
+
+    async def _claim(self) -> Optional[PlanJob]:
+        claiming = asyncio.ensure_future(asyncio.to_thread(self.claim))
+        try:
+            return await asyncio.shield(claiming)
+        except asyncio.CancelledError:
+            # Stopped mid-claim: hand back the job the thread may just have taken
+            job = (await asyncio.gather(claiming, return_exceptions=True))[0]
+            if isinstance(job, PlanJob):
+                await asyncio.to_thread(self._update, job, {PlanJob.status: QUEUED, PlanJob.lease_expires_at: None})
+            raise
+
+    def claim(self) -> Optional[PlanJob]:
+        """Take the oldest queued job, or None if there is nothing to do"""
+        self.recover()
+        db = self.session_factory()
+        try:
+            for _ in range(5):  # Another worker may claim the same row first
+                job = db.query(PlanJob).filter(PlanJob.status == QUEUED).order_by(PlanJob.created_at).first()
+                if job is None:
+                    return None
+                claimed = db.query(PlanJob).filter(PlanJob.id == job.id, PlanJob.status == QUEUED).update({
+                    PlanJob.status: RUNNING,
+                    PlanJob.attempts: PlanJob.attempts + 1,
+                    PlanJob.lease_expires_at: utcnow() + timedelta(seconds=self.lease_seconds)
+                }, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    db.refresh(job)
+                    return job
+            return None
+        finally:
+            db.close()
+
+    def recover(self) -> None:
+        """Requeue running jobs whose worker stopped renewing their lease"""
+        db = self.session_factory()
+        try:
+            now = utcnow()
+            lapsed = db.query(PlanJob).filter(PlanJob.status == RUNNING, PlanJob.lease_expires_at < now)
+            failed = lapsed.filter(PlanJob.attempts >= self.max_attempts).update({
+                PlanJob.status: FAILED,
+                PlanJob.error: "Planning was interrupted too many times",
+                PlanJob.lease_expires_at: None,
+                PlanJob.finished_at: now
+            }, synchronize_session=False)
+            resumed = lapsed.filter(PlanJob.attempts < self.max_attempts).update({
+                PlanJob.status: QUEUED,
+                PlanJob.lease_expires_at: None
+            }, synchronize_session=False)
+            db.commit()
+            if failed or resumed:
+                print(f"Plan jobs with lapsed leases: {resumed} resumed, {failed} failed")
+                metrics.incr("plan_jobs_resumed", resumed)
+                metrics.incr("plan_jobs_failed", failed)
+        finally:
+            db.close()
+
+    def _update(self, job: PlanJob, values: Dict[Any, Any]) -> bool:
+        """Write to a job this worker still holds; False if its lease was lost"""
+        db = self.session_factory()
+        try:
+            updated = db.query(PlanJob).filter(
+                PlanJob.id == job.id, PlanJob.status == RUNNING, PlanJob.attempts == job.attempts
+            ).update(values, synchronize_session=False)
+            db.commit()
+            return bool(updated)
+        finally:
+            db.close()
+
+    def _complete(self, job: PlanJob, result: Dict[str, Any], save: TripSaver) -> bool:
+        """Save the trip and complete the job in one transaction; False (nothing saved) if the lease was lost"""
+        db = self.session_factory()
+        try:
+            trip_id = save(db)
+            updated = db.query(PlanJob).filter(
+                PlanJob.id == job.id, PlanJob.status == RUNNING, PlanJob.attempts == job.attempts
+            ).update({
+                PlanJob.status: COMPLETED,
+                PlanJob.result: result,
+                PlanJob.trip_id: trip_id,
+                PlanJob.lease_expires_at: None,
+                PlanJob.finished_at: utcnow()
+            }, synchronize_session=False)
+            if not updated:
+                db.rollback()
+                # Another worker holds the job now; its result (and trip) will be the one kept
+                print(f"Plan job {job.id} lost its lease (attempt {job.attempts}); discarding this result")
+                metrics.incr("plan_jobs_lease_lost")
+                return False
+            db.commit()
+            print(f"✅ Plan job {job.id} saved as trip {trip_id}")
+            metrics.incr("plan_jobs_completed")
+            return True
+        finally:
+            db.close()
+
+    async def _renew_lease(self, job: PlanJob) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            renewed = await asyncio.to_thread(
+                self._update, job, {PlanJob.lease_expires_at: utcnow() + timedelta(seconds=self.lease_seconds)}
+            )
+            if not renewed:
+                return
+
+    async def _save_sections(self, previous: Optional[asyncio.Task], job: PlanJob, sections: Dict[str, Any]) -> None:
+        if previous is not None:
+            await previous  # In order, so an older snapshot never overwrites a newer one
+        try:
+            await asyncio.to_thread(self._update, job, {PlanJob.partial_result: sections})
+        except Exception as e:
+            print(f"Could not record progress for plan job {job.id}: {e}")
+
+    async def _run(self, job: PlanJob) -> None:
+        print(f"Running plan job {job.id} (attempt {job.attempts})")
+        sections: Dict[str, Any] = {}
+        progress: Optional[asyncio.Task] = None
+
+        def on_section(name: str, data: Any) -> None:
+            nonlocal progress
+            sections[name] = data
+            progress = asyncio.create_task(self._save_sections(progress, job, dict(sections)))
+
+        lease = asyncio.create_task(self._renew_lease(job))
+        try:
+            result, save = await self.handler(job, on_section)
+            if progress is not None:
+                await progress
+            await asyncio.to_thread(self._complete, job, result, save)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back rather than waiting for the lease to lapse
+            await asyncio.to_thread(self._update, job, {PlanJob.status: QUEUED, PlanJob.lease_expires_at: None})
+            raise
+        except Exception as e:
+            print(f"Plan job {job.id} failed: {str(e)}")
+            print(traceback.format_exc())
+            metrics.incr("plan_jobs_failed")
+            await asyncio.to_thread(self._update, job, {
+                PlanJob.status: FAILED,
+                PlanJob.error: "An error occurred while generating your trip plan. Please try again.",
+                PlanJob.lease_expires_at: None,
+                PlanJob.finished_at: utcnow()
+            })
+        finally:
+            lease.cancel()
+            if progress is not None:
+                progress.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"workers": len(self._tasks), "busy": self.busy}
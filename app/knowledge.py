@@ -0,0 +1,232 @@
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.cache import SQLiteCache
+from app.config import Config
+from app.destinations import canonicalize, normalize
+from app.metrics import metrics
+
+def safety_key(destination: str, passport: str, month: str) -> str:
+    """Cache key for safety info, which depends only on where, who and when"""
+    return "|".join([canonicalize(destination), normalize(passport), normalize(month)])
+
+
+class SafetyCache:
+    """Shared SafetyAgent results per (destination, passport, month).
+
+    Entries live in a SQLite table every worker reads and writes, so the first
+    plan for a destination pays for the LLM call and later ones, from any
+    user, are answered from disk. Purges take effect in all workers at once.
+    """
+
+    def __init__(self, store: SQLiteCache, ttl: float):
+        self.store = store
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, destination: str, passport: str, month: str) -> Optional[Dict[str, Any]]:
+        value = self.store.get(safety_key(destination, passport, month))
+        if value is None:
+            self.misses += 1
+            metrics.incr("safety_cache_misses")
+        else:
+            self.hits += 1
+            metrics.incr("safety_cache_hits")
+        return value
+
+    def set(self, destination: str, passport: str, month: str, safety_info: Dict[str, Any]) -> None:
+        self.store.set(safety_key(destination, passport, month), safety_info, self.ttl)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        result = []
+        for key, value, expires_at, created_at in self.store.entries():
+            destination, passport, month = key.split("|")
+            result.append({
+                "destination": destination,
+                "passport": passport,
+                "month": month,
+                "created_at": created_at,
+                "expires_at": expires_at,
+                "safety_info": value
+            })
+        return result
+
+    def purge(self, destination: Optional[str] = None, passport: Optional[str] = None,
+              month: Optional[str] = None) -> int:
+        """Delete entries matching every given field (all entries if none are given)"""
+        wanted = safety_key(destination or "", passport or "", month or "").split("|")
+        purged = 0
+        for key, *_ in self.store.entries():
+            if all(not want or want == have for want, have in zip(wanted, key.split("|"))):
+                self.store.delete(key)
+                purged += 1
+        return purged
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.store),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+def route_key(origin: str, destination: str, month: str) -> str:
+    return "|".join([canonicalize(origin), canonicalize(destination), normalize(month)])
+
+def is_cost(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value) and value >= 0
+
+
+class BudgetModelCache:
+    """Per-route cost models learned from BudgetAgent answers.
+
+    Budget breakdowns for one origin, destination and month are close to
+    linear in trip length: flights are a fixed cost while accommodation, food
+    and local transport scale per day. Each category is fitted as
+    ``fixed + per_day * days`` by least squares over the route's recent
+    answers, keeping only the newest answer per trip length so repeats of
+    one request can't pass for agreement. A request is answered from the
+    model only when it is confident: at least three (and ``min_samples``)
+    trip lengths, since two always fit a line exactly, a trip length not too
+    far outside the ones seen, and a small fit error. Otherwise the agent asks the LLM and its answer becomes
+    another sample.
+    """
+
+    FIXED_CATEGORIES = {"flights"}
+
+    def __init__(self, store: SQLiteCache, ttl: float, min_samples: int = 3, max_error: float = 0.15,
+                 max_extrapolation: float = 2.0, max_samples: int = 12):
+        self.store = store
+        self.ttl = ttl
+        self.min_samples = min_samples
+        self.max_error = max_error
+        self.max_extrapolation = max_extrapolation
+        self.max_samples = max_samples
+        self.hits = 0
+        self.misses = 0
+
+    def samples(self, origin: str, destination: str, month: str) -> List[Dict[str, Any]]:
+        """Route samples younger than the TTL, newest per trip length, oldest first"""
+        entry = self.store.get(route_key(origin, destination, month)) or {"samples": []}
+        return self._live(entry["samples"])
+
+    def _live(self, samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        cutoff = time.time() - self.ttl
+        latest: Dict[int, Dict[str, Any]] = {}
+        for sample in samples:
+            if sample["at"] >= cutoff:
+                latest.pop(sample["days"], None)
+                latest[sample["days"]] = sample
+        return list(latest.values())
+
+    def observe(self, origin: str, destination: str, month: str, days: int, budget_analysis: Dict[str, Any]) -> None:
+        """Add an LLM answer to the route's samples, replacing any for the same trip length"""
+        breakdown = budget_analysis.get("breakdown")
+        if not isinstance(breakdown, dict) or not breakdown or not all(is_cost(v) for v in breakdown.values()):
+            return  # Not numeric enough to learn from
+        sample = {"days": days, "breakdown": breakdown, "tips": budget_analysis.get("budget_tips", []), "at": time.time()}
+
+        def add(entry):
+            # Read and written in one transaction so other workers' samples aren't dropped
+            samples = (entry or {"samples": []})["samples"] + [sample]
+            return {"samples": self._live(samples)[-self.max_samples:]}
+
+        self.store.update(route_key(origin, destination, month), add, self.ttl)
+
+    def fit(self, samples: List[Dict[str, Any]]) -> Tuple[Dict[str, Tuple[float, float]], float]:
+        """Per-category (fixed, per_day) and the relative RMS error of the fitted totals"""
+        days = [sample["days"] for sample in samples]
+        categories = {category for sample in samples for category in sample["breakdown"]}
+        mean_days = sum(days) / len(days)
+        spread = sum((d - mean_days) ** 2 for d in days)
+        model = {}
+        for category in categories:
+            costs = [sample["breakdown"].get(category, 0) for sample in samples]
+            mean_cost = sum(costs) / len(costs)
+            if spread == 0:
+                if category in self.FIXED_CATEGORIES:
+                    model[category] = (mean_cost, 0.0)
+                else:
+                    model[category] = (0.0, mean_cost / mean_days)
+                continue
+            per_day = sum((d - mean_days) * (c - mean_cost) for d, c in zip(days, costs)) / spread
+            fixed = mean_cost - per_day * mean_days
+            if per_day < 0:
+                fixed, per_day = mean_cost, 0.0
+            elif fixed < 0:
+                fixed, per_day = 0.0, sum(d * c for d, c in zip(days, costs)) / sum(d * d for d in days)
+            model[category] = (fixed, per_day)
+
+        totals = [sum(sample["breakdown"].values()) for sample in samples]
+        predicted = [sum(fixed + per_day * d for fixed, per_day in model.values()) for d in days]
+        rms = math.sqrt(sum((t - p) ** 2 for t, p in zip(totals, predicted)) / len(totals))
+        mean_total = sum(totals) / len(totals)
+        return model, (rms / mean_total if mean_total else 1.0)
+
+    def estimate(self, origin: str, destination: str, month: str, days: int) -> Optional[Dict[str, Any]]:
+        """Budget analysis for ``days`` from the route's model, or None if it isn't trustworthy"""
+        samples = self.samples(origin, destination, month)
+        confident = (
+            len(samples) >= max(self.min_samples, 3)  # One sample per trip length, so distinct lengths
+            and min(s["days"] for s in samples) / self.max_extrapolation <= days <= max(s["days"] for s in samples) * self.max_extrapolation
+        )
+        if confident:
+            model, error = self.fit(samples)
+            confident = error <= self.max_error
+        if not confident:
+            self.misses += 1
+            metrics.incr("budget_model_misses")
+            return None
+
+        self.hits += 1
+        metrics.incr("budget_model_hits")
+        breakdown = {category: round(fixed + per_day * days, 2) for category, (fixed, per_day) in model.items()}
+        total = round(sum(breakdown.values()), 2)
+        return {
+            "breakdown": breakdown,
+            "total": total,
+            "daily_average": round(total / days, 2),
+            "budget_tips": samples[-1]["tips"]
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "routes": len(self.store),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+_safety_cache: Optional[SafetyCache] = None
+_budget_models: Optional[BudgetModelCache] = None
+_lock = threading.Lock()
+
+def get_safety_cache() -> Optional[SafetyCache]:
+    """Process-wide safety cache, or None when disabled"""
+    global _safety_cache
+    if not Config.SAFETY_CACHE_ENABLED or not Config.KNOWLEDGE_CACHE_PATH:
+        return None
+    with _lock:
+        if _safety_cache is None:
+            _safety_cache = SafetyCache(SQLiteCache(Config.KNOWLEDGE_CACHE_PATH, table="safety_info"), Config.SAFETY_CACHE_TTL)
+        return _safety_cache
+
+def get_budget_models() -> Optional[BudgetModelCache]:
+    """Process-wide budget cost models, or None when disabled"""
+    global _budget_models
+    if not Config.BUDGET_MODEL_ENABLED or not Config.KNOWLEDGE_CACHE_PATH:
+        return None
+    with _lock:
+        if _budget_models is None:
+            _budget_models = BudgetModelCache(
+                SQLiteCache(Config.KNOWLEDGE_CACHE_PATH, table="budget_models"), Config.BUDGET_MODEL_TTL,
+                Config.BUDGET_MODEL_MIN_SAMPLES, Config.BUDGET_MODEL_MAX_ERROR, Config.BUDGET_MODEL_MAX_EXTRAPOLATION
+            )
+        return _budget_models
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterator, AsyncIterator
+import asyncio
 import json
 
 class BaseLLM(ABC):
@@ -16,11 +17,37 @@ class BaseLLM(ABC):
         """Generate response from LLM"""
         pass
     
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Generate response from LLM without blocking the event loop.
+        
+        Providers with an async SDK should override this; the default runs
+        the blocking ``generate`` in a worker thread.
+        """
+        return await asyncio.to_thread(self.generate, prompt, system_prompt)
+    
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """Yield the response in chunks as the provider produces them.
+        
+        Providers without streaming support yield the whole response at once.
+        """
+        yield self.generate(prompt, system_prompt)
+    
+    async def agenerate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Async version of ``generate_stream``"""
+        yield await self.agenerate(prompt, system_prompt)
+    
     def generate_json(self, prompt: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
         """Generate JSON response from LLM"""
         response = self.generate(prompt, system_prompt)
-        
-        # Try to extract JSON from response
+        return self.parse_json(response)
+    
+    async def agenerate_json(self, prompt: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """Generate JSON response from LLM without blocking the event loop"""
+        response = await self.agenerate(prompt, system_prompt)
+        return self.parse_json(response)
+    
+    def parse_json(self, response: str) -> Dict[str, Any]:
+        """Extract JSON from a raw LLM response"""
         try:
             # Look for JSON between ```json and ``` markers
             if "```json" in response:
@@ -33,4 +60,4 @@ class BaseLLM(ABC):
             return json.loads(json_str)
         except json.JSONDecodeError:
             # If JSON parsing fails, return as text
-            return {"response": response}
\ No newline at end of file
+            return {"response": response}
@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Dict, Optional
+
+from app.config import Config
+from app.deadline import remaining
+from app.llm.base_llm import BaseLLM
+from app.llm.rate_limit import RateLimitTimeout
+from app.llm.usage import record_llm_call
+from app.metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker for one provider.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    calls fail immediately. Once ``recovery_timeout`` has passed it lets
+    ``half_open_calls`` trial calls through: a success closes it again, a
+    failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 recovery_timeout: Optional[float] = None, half_open_calls: Optional[int] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or Config.LLM_BREAKER_FAILURE_THRESHOLD
+        self.recovery_timeout = Config.LLM_BREAKER_RECOVERY_SECONDS if recovery_timeout is None else recovery_timeout
+        self.half_open_calls = half_open_calls or Config.LLM_BREAKER_HALF_OPEN_CALLS
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trials = 0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Open and still cooling down (no trial calls allowed yet)"""
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.recovery_timeout
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    metrics.incr(f"breaker_{self.name}_rejected")
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self.trials >= self.half_open_calls:
+                    metrics.incr(f"breaker_{self.name}_rejected")
+                    raise CircuitOpenError(f"{self.name} circuit is half-open, trial in progress")
+                self.trials += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def release(self) -> None:
+        """The call ended without saying anything about the provider's health"""
+        with self._lock:
+            if self.state == HALF_OPEN and self.trials > 0:
+                self.trials -= 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                if self.state != OPEN:
+                    self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        metrics.incr(f"breaker_{self.name}_to_{state}")
+        self.state = state
+        self.trials = 0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a provider"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+def breaker_states() -> Dict[str, Dict[str, object]]:
+    with _breakers_lock:
+        return {name: breaker.as_dict() for name, breaker in _breakers.items()}
+
+
+class BreakerLLM(BaseLLM):
+    """Wraps a provider so calls fail fast while its circuit breaker is open"""
+
+    def __init__(self, llm: BaseLLM, breaker: CircuitBreaker):
+        super().__init__(llm.api_key, llm.model, llm.temperature, llm.max_tokens)
+        self.llm = llm
+        self.breaker = breaker
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        self.breaker.before_call()
+        record_llm_call()
+        try:
+            response = self.llm.generate(prompt, system_prompt)
+        except RateLimitTimeout:
+            self.breaker.release()  # Our own queue was full; the provider wasn't called
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return response
+
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        self.breaker.before_call()
+        record_llm_call()
+        started = time.monotonic()
+        try:
+            response = await self.llm.agenerate(prompt, system_prompt)
+        except RateLimitTimeout:
+            self.breaker.release()  # Our own queue was full; the provider wasn't called
+            raise
+        except asyncio.CancelledError:
+            self._cancelled(started)
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return response
+
+    async def agenerate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        self.breaker.before_call()
+        record_llm_call()
+        started = time.monotonic()
+        try:
+            async for chunk in self.llm.agenerate_stream(prompt, system_prompt):
+                yield chunk
+        except (RateLimitTimeout, GeneratorExit):
+            self.breaker.release()
+            raise
+        except asyncio.CancelledError:
+            self._cancelled(started)
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+
+    def _cancelled(self, started: float) -> None:
+        """Count a cancelled call as a failure if it hung past the deadline or LLM_TIMEOUT"""
+        time_left = remaining()
+        if (time_left is not None and time_left <= 0) or time.monotonic() - started >= Config.LLM_TIMEOUT:
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()  # Hedge lost or client gone: says nothing about the provider
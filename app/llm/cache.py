@@ -0,0 +1,112 @@
+import hashlib
+import json
+import threading
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.cache import MemoryCache, SQLiteCache, TieredCache
+from app.config import Config
+from app.llm.base_llm import BaseLLM
+from app.llm.singleflight import SingleFlight, llm_flights
+
+_llm_cache: Optional[TieredCache] = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache() -> TieredCache:
+    """Process-wide LLM response cache (memory LRU + shared SQLite file)"""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            disk = SQLiteCache(Config.LLM_CACHE_PATH, table="llm_cache") if Config.LLM_CACHE_PATH else None
+            _llm_cache = TieredCache(MemoryCache(Config.LLM_CACHE_MAX_ENTRIES), disk)
+        return _llm_cache
+
+class CachedLLM(BaseLLM):
+    """Serves repeated prompts from the LLM response cache before calling the provider.
+    
+    Concurrent async calls for the same key are coalesced into one upstream
+    call; streams are cached but not coalesced, since each caller consumes
+    its own stream as it arrives. Pass ``cache=None`` to keep coalescing
+    without caching. Async calls read and write the shared SQLite tier in a
+    thread so the event loop never waits on its file lock.
+    """
+    
+    def __init__(self, llm: BaseLLM, cache: Optional[TieredCache], ttl: float,
+                 flights: SingleFlight = llm_flights):
+        super().__init__(llm.api_key, llm.model, llm.temperature, llm.max_tokens)
+        self.llm = llm
+        self.cache = cache if ttl > 0 else None
+        self.ttl = ttl
+        self.flights = flights
+    
+    def cache_key(self, kind: str, prompt: str, system_prompt: Optional[str]) -> str:
+        payload = json.dumps([kind, self.model, self.temperature, self.max_tokens, system_prompt, prompt])
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def cacheable(self, result: Any) -> bool:
+        # Unparseable JSON comes back as {"response": raw_text}; let it be retried
+        return not (isinstance(result, dict) and list(result) == ["response"])
+    
+    def lookup(self, key: str) -> Any:
+        return self.cache.get(key) if self.cache is not None else None
+    
+    def store(self, key: str, result: Any) -> Any:
+        if self.cache is not None and self.cacheable(result):
+            self.cache.set(key, result, self.ttl)
+        return result
+    
+    async def alookup(self, key: str) -> Any:
+        return await self.cache.aget(key) if self.cache is not None else None
+    
+    async def astore(self, key: str, result: Any) -> Any:
+        if self.cache is not None and self.cacheable(result):
+            await self.cache.aset(key, result, self.ttl)
+        return result
+    
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        key = self.cache_key("text", prompt, system_prompt)
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+        return self.store(key, self.llm.generate(prompt, system_prompt))
+    
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        key = self.cache_key("text", prompt, system_prompt)
+        cached = await self.alookup(key)
+        if cached is not None:
+            return cached
+        
+        async def call():
+            return await self.astore(key, await self.llm.agenerate(prompt, system_prompt))
+        
+        return await self.flights.do(key, call)
+    
+    async def agenerate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        key = self.cache_key("text", prompt, system_prompt)
+        cached = await self.alookup(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        async for chunk in self.llm.agenerate_stream(prompt, system_prompt):
+            chunks.append(chunk)
+            yield chunk
+        await self.astore(key, "".join(chunks))
+    
+    def generate_json(self, prompt: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        key = self.cache_key("json", prompt, system_prompt)
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+        return self.store(key, self.llm.generate_json(prompt, system_prompt))
+    
+    async def agenerate_json(self, prompt: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        key = self.cache_key("json", prompt, system_prompt)
+        cached = await self.alookup(key)
+        if cached is not None:
+            return cached
+        
+        async def call():
+            return await self.astore(key, await self.llm.agenerate_json(prompt, system_prompt))
+        
+        return await self.flights.do(key, call)
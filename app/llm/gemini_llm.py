@@ -0,0 +1,50 @@
+import google.generativeai as genai
+from app.llm.base_llm import BaseLLM
+from typing import Optional, Iterator, AsyncIterator
+
+class GeminiLLM(BaseLLM):
+    """Google Gemini LLM implementation"""
+    
+    def __init__(self, api_key: str, model: str = "gemini-1.5-flash",
+                 temperature: float = 0.7, max_tokens: int = 1000, timeout: Optional[float] = None):
+        super().__init__(api_key, model, temperature, max_tokens)
+        genai.configure(api_key=api_key)
+        self.client = genai.GenerativeModel(model)
+        self.request_options = {"timeout": timeout} if timeout else {}
+    
+    def build_prompt(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        return f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+    
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        response = self.client.generate_content(
+            self.build_prompt(prompt, system_prompt),
+            request_options=self.request_options
+        )
+        return response.text
+    
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        response = await self.client.generate_content_async(
+            self.build_prompt(prompt, system_prompt),
+            request_options=self.request_options
+        )
+        return response.text
+    
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        response = self.client.generate_content(
+            self.build_prompt(prompt, system_prompt),
+            stream=True,
+            request_options=self.request_options
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+    
+    async def agenerate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        response = await self.client.generate_content_async(
+            self.build_prompt(prompt, system_prompt),
+            stream=True,
+            request_options=self.request_options
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
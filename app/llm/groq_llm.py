@@ -1,35 +1,84 @@
-from groq import Groq
+from groq import Groq, AsyncGroq
 from app.llm.base_llm import BaseLLM
-from typing import Optional
-from tenacity import retry, stop_after_attempt, wait_exponential
+from typing import Optional, List, Dict, Iterator, AsyncIterator
+import httpx
+from app.llm.retry import RetryPolicy
 
 class GroqLLM(BaseLLM):
     """Groq LLM implementation - Fast inference with Llama and Mixtral models"""
     
     def __init__(self, api_key: str, model: str = "llama-3.3-70b-versatile", 
-                 temperature: float = 0.7, max_tokens: int = 1000):
+                 temperature: float = 0.7, max_tokens: int = 1000, base_url: Optional[str] = None,
+                 http_client: Optional[httpx.Client] = None,
+                 async_http_client: Optional[httpx.AsyncClient] = None,
+                 retry_policy: Optional[RetryPolicy] = None):
         super().__init__(api_key, model, temperature, max_tokens)
-        self.client = Groq(api_key=api_key)
+        # The SDK's own retries are disabled so the retry policy and budget see every attempt
+        self.client = Groq(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+        self.async_client = AsyncGroq(api_key=api_key, base_url=base_url, http_client=async_http_client,
+                                      max_retries=0)
+        self.retry_policy = retry_policy or RetryPolicy()
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def build_messages(self, prompt: str, system_prompt: Optional[str] = None) -> List[Dict[str, str]]:
         messages = []
         
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         
         messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        try:
+            completion = self.retry_policy.call(lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=self.build_messages(prompt, system_prompt),
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+            ))
+            
+            return completion.choices[0].message.content
         
+        except Exception as e:
+            print(f"Error with Groq API: {e}")
+            raise
+    
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         try:
-            completion = self.client.chat.completions.create(
+            completion = await self.retry_policy.acall(lambda: self.async_client.chat.completions.create(
                 model=self.model,
-                messages=messages,
+                messages=self.build_messages(prompt, system_prompt),
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
-            )
+            ))
             
             return completion.choices[0].message.content
         
         except Exception as e:
             print(f"Error with Groq API: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        # Only opening the stream is retried; a stream that fails midway can't be resumed
+        stream = self.retry_policy.call(lambda: self.client.chat.completions.create(
+            model=self.model,
+            messages=self.build_messages(prompt, system_prompt),
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True,
+        ))
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def agenerate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        stream = await self.retry_policy.acall(lambda: self.async_client.chat.completions.create(
+            model=self.model,
+            messages=self.build_messages(prompt, system_prompt),
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True,
+        ))
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
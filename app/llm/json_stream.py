@@ -0,0 +1,137 @@
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional
+
+STRING_SPECIAL = re.compile(r'["\\]')
+
+class IncrementalArrayParser:
+    """Pull complete elements out of a JSON array while the response is still streaming.
+
+    Feed raw LLM text chunk by chunk; each call returns the elements of the
+    array under ``key`` whose closing brace/bracket has arrived. Text outside
+    the JSON (preamble, ```json fences) is skipped: a bracket in prose such as
+    "your [3-day] plan" is abandoned when it closes without yielding anything,
+    or when a code fence shows it wasn't JSON, and the scan resumes after it.
+    String contents are skipped in one search and consumed text is discarded,
+    so the cost stays linear in the response length.
+    A bare top-level array is accepted as well.
+    """
+
+    def __init__(self, key: str = "itinerary"):
+        self.key = key
+        self.buffer = ""
+        self.pos = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.last_string: Optional[str] = None
+        self.current_key: Optional[str] = None
+        self.array_depth: Optional[int] = None
+        self.element_start: Optional[int] = None
+        self.found = 0
+        self.done = False
+
+    def _restart(self) -> None:
+        """Forget a value that turned out not to be the JSON, and look for the next one"""
+        self.stack = []
+        self.last_string = None
+        self.current_key = None
+        self.array_depth = None
+        self.element_start = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        self.buffer += chunk
+        items = []
+        buffer = self.buffer
+        pos = self.pos
+
+        while pos < len(buffer) and not self.done:
+            if self.in_string:
+                # Jump straight to the next quote or backslash
+                match = STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                pos = match.start()
+                if buffer[pos] == "\\":
+                    pos += 2  # Skip the escaped character
+                    continue
+                self.in_string = False
+                if len(self.stack) == 1:
+                    self.last_string = buffer[self.string_start:pos]
+                pos += 1
+                continue
+
+            ch = buffer[pos]
+            if not self.stack and ch not in "{[":
+                pos += 1
+                continue  # Preamble or code fence before the JSON starts
+
+            if ch == "`":
+                self._restart()  # A code fence: what came before was prose, not JSON
+            elif ch == '"':
+                self.in_string = True
+                self.string_start = pos + 1
+            elif ch == ":":
+                if len(self.stack) == 1:
+                    self.current_key = self.last_string
+            elif ch in "{[":
+                if self.array_depth is not None and len(self.stack) == self.array_depth:
+                    self.element_start = pos
+                self.stack.append(ch)
+                if ch == "[" and self.array_depth is None and (
+                        len(self.stack) == 1 or (len(self.stack) == 2 and self.current_key == self.key)):
+                    self.array_depth = len(self.stack)
+            elif ch in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if self.array_depth is not None and len(self.stack) == self.array_depth and self.element_start is not None:
+                    try:
+                        items.append(json.loads(buffer[self.element_start:pos + 1]))
+                        self.found += 1
+                    except json.JSONDecodeError:
+                        pass  # Skip a malformed element rather than losing the rest
+                    self.element_start = None
+                elif self.array_depth is not None and len(self.stack) < self.array_depth:
+                    if self.found:
+                        self.done = True
+                    else:
+                        self.array_depth = None  # Empty or not an array of elements; keep looking
+                if not self.stack and not self.done:
+                    self._restart()
+            pos += 1
+
+        self._compact(pos)
+        return items
+
+    def _compact(self, pos: int) -> None:
+        # Drop text that can no longer be part of an element or key
+        keep = pos
+        if self.element_start is not None:
+            keep = min(keep, self.element_start)
+        if self.in_string:
+            keep = min(keep, self.string_start)
+        if keep < len(self.buffer) // 2:
+            self.pos = pos  # Not worth copying yet; keeps compaction amortized linear
+            return
+        self.buffer = self.buffer[keep:]
+        self.pos = pos - keep
+        if self.element_start is not None:
+            self.element_start -= keep
+        self.string_start -= keep
+
+
+def iter_array_items(chunks: Iterable[str], key: str = "itinerary") -> Iterator[Any]:
+    """Yield array elements from a synchronous token stream as they complete"""
+    parser = IncrementalArrayParser(key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+
+
+async def aiter_array_items(chunks: AsyncIterable[str], key: str = "itinerary") -> AsyncIterator[Any]:
+    """Yield array elements from an async token stream as they complete"""
+    parser = IncrementalArrayParser(key)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
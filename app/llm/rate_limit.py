@@ -0,0 +1,263 @@
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from app.config import Config
+from app.deadline import remaining
+from app.llm.base_llm import BaseLLM
+from app.metrics import metrics
+
+class RateLimitTimeout(Exception):
+    """Raised when a call would have to queue longer than the limiter's max wait"""
+
+
+class BucketStore:
+    """Token-bucket balances in SQLite so every worker on the host shares one quota"""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits "
+            "(name TEXT PRIMARY KEY, requests REAL NOT NULL, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def get(self, name: str) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """(requests, tokens, updated_at) for a bucket, all None if unseen"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT requests, tokens, updated_at FROM rate_limits WHERE name = ?", (name,)
+            ).fetchone()
+        return row or (None, None, None)
+
+    def update(self, name: str, fn) -> float:
+        """Atomically apply ``fn(requests, tokens, updated_at) -> (requests, tokens, result)``.
+
+        ``fn`` gets None balances for an unseen bucket and may raise to leave
+        the stored state untouched.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # Serializes workers on the file lock
+            try:
+                row = self._conn.execute(
+                    "SELECT requests, tokens, updated_at FROM rate_limits WHERE name = ?", (name,)
+                ).fetchone()
+                requests, tokens, result = fn(*(row or (None, None, None)))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (name, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                    (name, requests, tokens, time.time())
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+
+class TokenBucketLimiter:
+    """Per-provider requests/min and tokens/min limiter where calls queue for capacity.
+
+    Each call reserves one request and its estimated tokens up front, letting
+    the balance go negative; the deficit is the queue, and the caller sleeps
+    until the refill covers its reservation. Reservations are FIFO across all
+    workers sharing the store, and a call that would wait longer than
+    ``max_wait`` raises RateLimitTimeout without reserving anything.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float = 0,
+                 max_wait: Optional[float] = None, store: Optional[BucketStore] = None):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = Config.LLM_RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        self.store = store or get_bucket_store()
+        self.waiting = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, requests: Optional[float], tokens: Optional[float],
+                updated_at: Optional[float]) -> Tuple[float, float]:
+        if requests is None:
+            return float(self.requests_per_minute), float(self.tokens_per_minute)
+        elapsed = max(0.0, time.time() - updated_at)
+        requests = min(self.requests_per_minute, requests + elapsed * self.requests_per_minute / 60)
+        tokens = min(self.tokens_per_minute, tokens + elapsed * self.tokens_per_minute / 60)
+        return requests, tokens
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve capacity for one call and return how long to wait before making it"""
+        time_left = remaining()
+        max_wait = self.max_wait if time_left is None else min(self.max_wait, time_left)
+
+        def take(requests, available_tokens, updated_at):
+            requests, available_tokens = self._refill(requests, available_tokens, updated_at)
+            requests -= 1
+            wait = max(0.0, -requests * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                available_tokens -= tokens
+                wait = max(wait, -available_tokens * 60 / self.tokens_per_minute)
+            if wait > max_wait:
+                raise RateLimitTimeout(
+                    f"{self.name} rate limit queue is {wait:.1f}s long (max {max_wait:.0f}s)"
+                )
+            return requests, available_tokens, wait
+
+        try:
+            return self.store.update(self.name, take)
+        except RateLimitTimeout:
+            metrics.incr("llm_rate_limit_timeouts")
+            raise
+
+    def refund(self, tokens: int = 0) -> None:
+        """Give back one call's reservation, for a call cancelled before it was made"""
+        def give(requests, available_tokens, updated_at):
+            requests, available_tokens = self._refill(requests, available_tokens, updated_at)
+            return (min(self.requests_per_minute, requests + 1),
+                    min(self.tokens_per_minute, available_tokens + tokens), None)
+
+        self.store.update(self.name, give)
+        metrics.incr("llm_rate_limit_refunds")
+
+    async def acquire(self, tokens: int = 0) -> None:
+        # The store waits on a file lock other workers hold, so it runs off the event loop
+        reserving = asyncio.ensure_future(asyncio.to_thread(self.reserve, tokens))
+        try:
+            wait = await asyncio.shield(reserving)
+            if wait > 0:
+                with self._queued(wait):
+                    await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            # The call never reached the provider, so its quota goes back to the queue
+            reserved = await asyncio.gather(reserving, return_exceptions=True)
+            if not isinstance(reserved[0], BaseException):
+                await asyncio.to_thread(self.refund, tokens)
+            raise
+
+    def acquire_sync(self, tokens: int = 0) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            with self._queued(wait):
+                time.sleep(wait)
+
+    @contextmanager
+    def _queued(self, wait: float) -> Iterator[None]:
+        with self._lock:
+            self.waiting += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        metrics.incr("llm_rate_limit_waits")
+        metrics.incr("llm_rate_limit_wait_seconds", wait)
+
+    def queue_depth(self) -> int:
+        """Calls queued for this provider across all workers sharing the store"""
+        requests, _ = self._refill(*self.store.get(self.name))
+        return max(0, math.ceil(-requests))
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "queue_depth": self.queue_depth(),
+            "waiting_in_worker": self.waiting
+        }
+
+
+_store: Optional[BucketStore] = None
+_limiters: Dict[str, TokenBucketLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_bucket_store() -> BucketStore:
+    global _store
+    with _limiters_lock:
+        if _store is None:
+            _store = BucketStore(Config.LLM_RATE_LIMIT_PATH or ":memory:")
+        return _store
+
+def get_limiter(name: str) -> Optional[TokenBucketLimiter]:
+    """Process-wide limiter for a provider, or None if it has no configured quota"""
+    limits = Config.LLM_RATE_LIMITS.get(name, {})
+    if not Config.LLM_RATE_LIMIT_ENABLED or not limits.get("rpm"):
+        return None
+    store = get_bucket_store()
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = TokenBucketLimiter(name, limits["rpm"], limits.get("tpm", 0), store=store)
+        return _limiters[name]
+
+# The rate-limited call in progress, so retries further down the stack queue for quota too
+_current_call: ContextVar[Optional[Tuple[TokenBucketLimiter, int]]] = ContextVar("rate_limited_call", default=None)
+
+async def acquire_retry() -> None:
+    """Reserve quota for a retry of the current rate-limited call (no-op outside one)"""
+    current = _current_call.get()
+    if current is not None:
+        limiter, tokens = current
+        await limiter.acquire(tokens)
+
+def acquire_retry_sync() -> None:
+    current = _current_call.get()
+    if current is not None:
+        limiter, tokens = current
+        limiter.acquire_sync(tokens)
+
+def limiter_stats() -> Dict[str, Dict[str, object]]:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.get_stats() for limiter in limiters}
+
+
+class RateLimitedLLM(BaseLLM):
+    """Waits for provider quota before each call instead of provoking 429s.
+
+    Retries made by the wrapped client's RetryPolicy queue for quota as well.
+    """
+
+    def __init__(self, llm: BaseLLM, limiter: TokenBucketLimiter):
+        super().__init__(llm.api_key, llm.model, llm.temperature, llm.max_tokens)
+        self.llm = llm
+        self.limiter = limiter
+
+    def estimate_tokens(self, prompt: str, system_prompt: Optional[str]) -> int:
+        # Roughly 4 characters per token, plus the most the completion can use
+        return (len(prompt) + len(system_prompt or "")) // 4 + self.max_tokens
+
+    @contextmanager
+    def _calling(self, tokens: int) -> Iterator[None]:
+        token = _current_call.set((self.limiter, tokens))
+        try:
+            yield
+        finally:
+            _current_call.reset(token)
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        tokens = self.estimate_tokens(prompt, system_prompt)
+        self.limiter.acquire_sync(tokens)
+        with self._calling(tokens):
+            return self.llm.generate(prompt, system_prompt)
+
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        tokens = self.estimate_tokens(prompt, system_prompt)
+        await self.limiter.acquire(tokens)
+        with self._calling(tokens):
+            return await self.llm.agenerate(prompt, system_prompt)
+
+    async def agenerate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        tokens = self.estimate_tokens(prompt, system_prompt)
+        await self.limiter.acquire(tokens)
+        with self._calling(tokens):
+            async for chunk in self.llm.agenerate_stream(prompt, system_prompt):
+                yield chunk
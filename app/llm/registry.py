@@ -0,0 +1,123 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import Config, LLMProvider
+from app.llm.base_llm import BaseLLM
+from app.llm.breaker import BreakerLLM, get_breaker
+from app.llm.cache import CachedLLM, get_llm_cache
+from app.llm.gemini_llm import GeminiLLM
+from app.llm.groq_llm import GroqLLM
+from app.llm.rate_limit import RateLimitedLLM, get_limiter
+from app.llm.router import RouterLLM
+
+class LLMClientRegistry:
+    """Process-wide cache of LLM clients keyed by provider, model and parameters.
+    
+    Clients are created once and shared by every agent and request, so their
+    HTTP connection pools (and TLS sessions) are reused across calls.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple, BaseLLM] = {}
+    
+    def get(self, provider: LLMProvider, model: str, temperature: float, max_tokens: int) -> BaseLLM:
+        key = (provider, model, temperature, max_tokens)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._create(provider, model, temperature, max_tokens)
+                # Quota and breaker are per provider, shared by all of its models
+                limiter = get_limiter(provider.value)
+                if limiter is not None:
+                    client = RateLimitedLLM(client, limiter)
+                client = BreakerLLM(client, get_breaker(provider.value))
+                self._clients[key] = client
+            return client
+    
+    def get_router(self, providers: List[LLMProvider], temperature: float, max_tokens: int) -> RouterLLM:
+        """Shared router over each provider's default model"""
+        key = ("router", tuple(providers), temperature, max_tokens)
+        with self._lock:
+            router = self._clients.get(key)
+        if router is None:
+            clients = [
+                (provider.value, self.get(provider, Config.MODELS[provider.value], temperature, max_tokens))
+                for provider in providers
+            ]
+            with self._lock:
+                router = self._clients.setdefault(key, RouterLLM(clients))
+        return router
+    
+    def routers(self) -> List[RouterLLM]:
+        with self._lock:
+            return [client for client in self._clients.values() if isinstance(client, RouterLLM)]
+    
+    def clear(self) -> None:
+        """Drop all cached clients (used by tests and after config changes)"""
+        with self._lock:
+            self._clients.clear()
+    
+    def __len__(self) -> int:
+        return len(self._clients)
+    
+    def _create(self, provider: LLMProvider, model: str, temperature: float, max_tokens: int) -> BaseLLM:
+        if provider == LLMProvider.GROQ:
+            limits = httpx.Limits(
+                max_connections=Config.LLM_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.LLM_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=Config.LLM_POOL_KEEPALIVE_EXPIRY
+            )
+            timeout = httpx.Timeout(Config.LLM_TIMEOUT, connect=Config.LLM_CONNECT_TIMEOUT)
+            return GroqLLM(
+                api_key=Config.GROQ_API_KEY,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                base_url=Config.GROQ_BASE_URL,
+                http_client=httpx.Client(limits=limits, timeout=timeout),
+                async_http_client=httpx.AsyncClient(limits=limits, timeout=timeout)
+            )
+        elif provider == LLMProvider.GEMINI:
+            return GeminiLLM(
+                api_key=Config.GEMINI_API_KEY,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=Config.LLM_TIMEOUT
+            )
+        
+        raise ValueError(f"Unsupported LLM provider: {provider}")
+
+registry = LLMClientRegistry()
+
+def get_llm_client(provider: Optional[LLMProvider] = None, model: Optional[str] = None,
+                   temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                   cache_policy: Optional[str] = None) -> BaseLLM:
+    """Get a shared LLM client, creating it on first use.
+    
+    When several providers are configured and no provider or model is forced,
+    the client is a RouterLLM that picks (and hedges) between them.
+    
+    ``cache_policy`` names an entry in ``Config.LLM_CACHE_TTLS`` (normally the
+    agent name); callers that pass none, such as chat, are never cached or
+    coalesced.
+    """
+    temperature = Config.MODEL_TEMPERATURE if temperature is None else temperature
+    max_tokens = Config.MAX_TOKENS if max_tokens is None else max_tokens
+    
+    available = Config.get_available_providers() if provider is None and model is None else []
+    if Config.LLM_ROUTING_ENABLED and len(available) > 1:
+        client = registry.get_router(available, temperature, max_tokens)
+    else:
+        provider = provider or Config.get_active_provider()
+        client = registry.get(provider, model or Config.MODELS[provider.value], temperature, max_tokens)
+    
+    if not cache_policy:
+        return client
+    
+    # Agent calls are coalesced when identical, and cached unless disabled
+    ttl = Config.LLM_CACHE_TTLS.get(cache_policy, 0) if Config.LLM_CACHE_ENABLED else 0
+    return CachedLLM(client, get_llm_cache() if ttl > 0 else None, ttl)
@@ -0,0 +1,148 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from groq import APIConnectionError
+
+from app.config import Config
+from app.deadline import remaining
+from app.llm.rate_limit import acquire_retry, acquire_retry_sync
+from app.metrics import metrics
+
+T = TypeVar("T")
+
+# Timeouts, conflicts, rate limits and server errors; other 4xx won't succeed on retry
+RETRYABLE_STATUS = {408, 409, 429}
+
+def status_of(error: BaseException) -> Optional[int]:
+    """HTTP status of a provider error (groq uses status_code, google api_core uses code)"""
+    for attr in ("status_code", "code"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int):
+            return status
+    return None
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (APIConnectionError, httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    status = status_of(error)
+    return status is not None and (status in RETRYABLE_STATUS or status >= 500)
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from Retry-After / retry-after-ms headers"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """Caps retries across the whole process within a sliding time window"""
+
+    def __init__(self, max_retries: int, window: float):
+        self.max_retries = max_retries
+        self.window = window
+        self._retries: deque = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._retries and self._retries[0] <= now - self.window:
+                self._retries.popleft()
+            if len(self._retries) >= self.max_retries:
+                return False
+            self._retries.append(now)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._retries)
+
+retry_budget = RetryBudget(Config.LLM_RETRY_BUDGET, Config.LLM_RETRY_BUDGET_WINDOW)
+
+
+class RetryPolicy:
+    """Retries transient provider errors with jittered backoff.
+
+    Auth and bad-request errors are raised immediately. A server-provided
+    Retry-After replaces the computed backoff (and is given up on if longer
+    than ``max_retry_after``); every retry spends from a shared budget so an
+    outage can't turn into a retry storm.
+    """
+
+    def __init__(self, attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, max_retry_after: Optional[float] = None,
+                 budget: Optional[RetryBudget] = None):
+        self.attempts = attempts or Config.LLM_RETRY_ATTEMPTS
+        self.base_delay = Config.LLM_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = Config.LLM_RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.max_retry_after = Config.LLM_RETRY_AFTER_MAX if max_retry_after is None else max_retry_after
+        self.budget = retry_budget if budget is None else budget
+
+    def next_delay(self, attempt: int, error: BaseException) -> Optional[float]:
+        """Seconds to wait before retrying after ``attempt`` failed, or None to give up"""
+        if attempt >= self.attempts:
+            return None
+        if not is_retryable(error):
+            metrics.incr("llm_errors_not_retried")
+            return None
+        server_delay = retry_after(error)
+        if server_delay is not None and server_delay > self.max_retry_after:
+            return None
+        time_left = remaining()
+        if time_left is not None and (server_delay or 0) >= time_left:
+            return None  # The request's deadline passes before the retry could run
+        if not self.budget.try_acquire():
+            metrics.incr("llm_retry_budget_exhausted")
+            return None
+        metrics.incr("llm_retries")
+        if server_delay is not None:
+            return server_delay + random.uniform(0, self.base_delay)
+        # Full jitter so concurrent callers don't retry in lockstep
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return delay if time_left is None else min(delay, time_left / 2)
+
+    def call(self, fn: Callable[[], T]) -> T:
+        attempt = 1
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                delay = self.next_delay(attempt, e)
+                if delay is None:
+                    raise
+                print(f"LLM call failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                acquire_retry_sync()  # A retry is another request against the provider's quota
+                attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[T]]) -> T:
+        attempt = 1
+        while True:
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self.next_delay(attempt, e)
+                if delay is None:
+                    raise
+                print(f"LLM call failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                await acquire_retry()
+                attempt += 1
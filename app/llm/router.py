@@ -0,0 +1,219 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.config import Config
+from app.llm.base_llm import BaseLLM
+
+class ProviderStats:
+    """Rolling latency and error window for one provider"""
+
+    def __init__(self, name: str, window: int):
+        self.name = name
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+
+    def record(self, latency: Optional[float], ok: bool) -> None:
+        self.calls += 1
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+        else:
+            self.errors += 1
+
+    def record_censored(self, elapsed: float) -> None:
+        """A call cancelled after ``elapsed`` took at least that long"""
+        self.calls += 1
+        self.outcomes.append(True)
+        self.latencies.append(elapsed)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 3),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "samples": len(self.latencies)
+        }
+
+
+class RouterLLM(BaseLLM):
+    """Routes each call to the best-performing provider and hedges slow calls.
+
+    Providers are ranked by rolling p50 latency, penalized by error rate;
+    providers without enough samples keep their configured order and those
+    with an open circuit breaker go last. If the
+    primary hasn't answered by its own p95, a duplicate request goes to the
+    next provider and whichever answers first wins; the other is cancelled.
+    """
+
+    def __init__(self, providers: List[Tuple[str, BaseLLM]], hedge_delay: Optional[float] = None,
+                 min_samples: Optional[int] = None, window: Optional[int] = None):
+        primary = providers[0][1]
+        super().__init__(primary.api_key, primary.model, primary.temperature, primary.max_tokens)
+        self.providers = providers
+        self.hedge_delay = Config.LLM_HEDGE_DELAY if hedge_delay is None else hedge_delay
+        self.min_samples = Config.LLM_ROUTER_MIN_SAMPLES if min_samples is None else min_samples
+        window = window or Config.LLM_ROUTER_WINDOW
+        self.stats = {name: ProviderStats(name, window) for name, _ in providers}
+        self.routed = {name: 0 for name, _ in providers}
+        self.hedge_wins = {name: 0 for name, _ in providers}
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def ranked(self) -> List[Tuple[str, BaseLLM]]:
+        def key(item):
+            index, (name, llm) = item
+            stats = self.stats[name]
+            breaker = getattr(llm, "breaker", None)
+            if breaker is not None and breaker.is_open:
+                return (3, index, index)  # Only tried once everything else has failed
+            if len(stats.latencies) < self.min_samples:
+                return (1, index, index)
+            if stats.error_rate > 0.5:
+                return (2, stats.percentile(0.5), index)
+            return (0, stats.percentile(0.5) * (1 + 4 * stats.error_rate), index)
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=key)]
+
+    def hedge_after(self, name: str) -> float:
+        stats = self.stats[name]
+        if len(stats.latencies) >= self.min_samples:
+            return stats.percentile(0.95)
+        return self.hedge_delay
+
+    def _route(self, name: str) -> None:
+        with self._lock:
+            self.routed[name] += 1
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        error = None
+        for name, llm in self.ranked():
+            self._route(name)
+            start = time.perf_counter()
+            try:
+                response = llm.generate(prompt, system_prompt)
+            except Exception as e:
+                self.stats[name].record(None, ok=False)
+                error = e
+                continue
+            self.stats[name].record(time.perf_counter() - start, ok=True)
+            return response
+        raise error
+
+    async def _call(self, name: str, llm: BaseLLM, prompt: str, system_prompt: Optional[str]) -> str:
+        start = time.perf_counter()
+        threshold = self.hedge_after(name)
+        try:
+            response = await llm.agenerate(prompt, system_prompt)
+        except asyncio.CancelledError:
+            # Cut off past its own hedge point (a lost hedge race or a deadline):
+            # record the elapsed time as a lower bound so a degraded provider's
+            # p50/p95 climb and it drops in the ranking. Earlier cancellations
+            # say nothing about the provider.
+            elapsed = time.perf_counter() - start
+            if elapsed >= threshold:
+                self.stats[name].record_censored(elapsed)
+            raise
+        except Exception:
+            self.stats[name].record(None, ok=False)
+            raise
+        self.stats[name].record(time.perf_counter() - start, ok=True)
+        return response
+
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        candidates = iter(self.ranked())
+        running: Dict[asyncio.Task, str] = {}
+        hedged = False
+        error: Optional[BaseException] = None
+
+        def launch() -> bool:
+            provider = next(candidates, None)
+            if provider is None:
+                return False
+            name, llm = provider
+            self._route(name)
+            running[asyncio.create_task(self._call(name, llm, prompt, system_prompt))] = name
+            return True
+
+        launch()
+        primary = next(iter(running.values()))
+        try:
+            while running:
+                timeout = None if hedged or len(self.providers) < 2 else self.hedge_after(primary)
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is slower than its p95: race a duplicate against it
+                    hedged = launch()
+                    if hedged:
+                        with self._lock:
+                            self.hedges += 1
+                    else:
+                        hedged = True
+                    continue
+
+                for task in done:
+                    name = running.pop(task)
+                    if task.exception() is None:
+                        if hedged:
+                            with self._lock:
+                                self.hedge_wins[name] += 1
+                        return task.result()
+                    error = task.exception()
+
+                # Everything in flight failed: fail over to the next provider
+                if not running and not launch():
+                    raise error
+        finally:
+            for task in running:
+                if task.done():
+                    task.exception()  # Retrieved so asyncio doesn't warn
+                else:
+                    task.cancel()
+
+    async def agenerate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        # Streams can't be hedged; use the best provider and fail over before the first chunk
+        error = None
+        for name, llm in self.ranked():
+            self._route(name)
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in llm.agenerate_stream(prompt, system_prompt):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self.stats[name].record(None, ok=False)
+                if started:
+                    raise
+                error = e
+                continue
+            self.stats[name].record(time.perf_counter() - start, ok=True)
+            return
+        raise error
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "order": [name for name, _ in self.ranked()],
+                "providers": {name: stats.as_dict() for name, stats in self.stats.items()},
+                "routed": dict(self.routed),
+                "hedges": self.hedges,
+                "hedge_wins": dict(self.hedge_wins)
+            }
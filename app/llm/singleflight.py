@@ -0,0 +1,59 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict
+
+from app.metrics import metrics
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls into a single upstream call.
+    
+    The first caller for a key starts the call; callers arriving while it is
+    in flight await the same task and share its result or exception. One
+    caller going away doesn't cancel the call for the others, but once every
+    caller has gone (deadline, client disconnect) the upstream call is
+    cancelled too.
+    """
+    
+    def __init__(self, metric: str = "llm_calls_coalesced"):
+        self.metric = metric
+        self._inflight: Dict[str, _Flight] = {}
+    
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda done: self._finish(key, flight))
+        else:
+            metrics.incr(self.metric)
+        
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)  # Later callers start a fresh call
+        # Every caller, the first included, gets its own copy to mutate
+        return copy.deepcopy(result)
+    
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+    
+    def _finish(self, key: str, flight: _Flight) -> None:
+        self._forget(key, flight)
+        if not flight.task.cancelled():
+            flight.task.exception()  # Mark retrieved even if every caller was cancelled
+    
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+llm_flights = SingleFlight()
@@ -0,0 +1,26 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+class CallLedger:
+    """Counts upstream LLM calls made on behalf of one request"""
+
+    def __init__(self):
+        self.calls = 0
+
+# Like the request deadline, the ledger is inherited by every task the request starts
+_ledger: ContextVar[Optional[CallLedger]] = ContextVar("llm_call_ledger", default=None)
+
+@contextmanager
+def track_llm_calls() -> Iterator[CallLedger]:
+    ledger = CallLedger()
+    token = _ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _ledger.reset(token)
+
+def record_llm_call() -> None:
+    ledger = _ledger.get()
+    if ledger is not None:
+        ledger.calls += 1
@@ -1,13 +1,20 @@
 # app/main.py - Complete version with Phase 2 authentication and database features
 
-from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi import FastAPI, HTTPException, Request, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import traceback
+import asyncio
+import hmac
+import json
+import math
+import time
+import uuid
 import os
 
 # Import rate limiting
@@ -15,17 +22,30 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-# Import agents
-from app.agents.destination_agent import DestinationAgent
-from app.agents.itinerary_agent import ItineraryAgent
-from app.agents.budget_agent import BudgetAgent
-from app.agents.safety_agent import SafetyAgent
+# Import agent pipeline
+from app.agents.orchestrator import plan_trip
+from app.metrics import metrics
+from app.admission import admission, Overloaded
+from app.config import Config
+from app.deadline import deadline
+from app.idempotency import IdempotencyConflict, get_idempotency_store
+from app.cache import MISSING
+from app.jobs import PlanJobWorkers
+from app.knowledge import get_safety_cache, get_budget_models
+from app.destinations import canonicalize, display_name
+from app.plan_cache import get_guest_plan_cache
+from app.llm.cache import get_llm_cache
+from app.llm.singleflight import llm_flights
+from app.llm.registry import registry
+from app.llm.breaker import breaker_states
+from app.llm.rate_limit import limiter_stats
+from app.llm.usage import track_llm_calls
 
 # Phase 2: Import authentication and database
 from app.auth.routes import router as auth_router
 from app.auth.routes import get_current_user
-from app.database import init_database, get_db
-from app.auth.models import User, Trip, Feedback
+from app.database import init_database, get_db, SessionLocal
+from app.auth.models import User, Trip, Feedback, PlanJob
 from sqlalchemy.orm import Session
 
 # Create rate limiter
@@ -74,6 +94,12 @@ app.add_middleware(
 async def startup_event():
     """Initialize database on startup"""
     init_database()
+    plan_jobs.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Hand running plan jobs back to the queue"""
+    await plan_jobs.stop()
 
 # Add request size validation middleware
 @app.middleware("http")
@@ -87,6 +113,12 @@ async def validate_content_length(request: Request, call_next):
     response = await call_next(request)
     return response
 
+# Stamp arrival time so request deadlines include time spent queueing
+@app.middleware("http")
+async def stamp_received_at(request: Request, call_next):
+    request.state.received_at = time.monotonic()
+    return await call_next(request)
+
 # Request/Response Models
 class TripRequest(BaseModel):
     traveler_name: str
@@ -120,6 +152,7 @@ class TripResponse(BaseModel):
     safety_info: Dict[str, Any]
     within_budget: bool
     agent_messages: List[Dict[str, str]]
+    degraded_sections: List[str] = []  # Sections filled with generic fallbacks
 
 # Root endpoint
 @app.get("/")
@@ -145,7 +178,8 @@ def health_check():
         "status": "healthy",
         "service": "multi-agent-travel-planner",
         "version": "2.0.0",
-        "database": "connected"
+        "database": "connected",
+        "llm_load": admission.get_stats()
     }
 
 # Model info endpoint
@@ -168,6 +202,183 @@ def get_model_info():
             "message": str(e)
         }
 
+# Metrics endpoint
+@app.get("/metrics")
+def get_metrics():
+    """Process-wide performance counters (speculation hits/misses, LLM cache, etc.)"""
+    return {
+        "counters": metrics.snapshot(),
+        "llm_cache": get_llm_cache().get_stats(),
+        "llm_inflight": len(llm_flights),
+        "llm_router": [router.get_stats() for router in registry.routers()],
+        "llm_breakers": breaker_states(),
+        "llm_rate_limits": limiter_stats(),
+        "plan_jobs": plan_jobs.get_stats(),
+        "safety_cache": safety_cache.get_stats() if (safety_cache := get_safety_cache()) else None,
+        "budget_models": budget_models.get_stats() if (budget_models := get_budget_models()) else None,
+        "guest_plan_cache": guest_plans.get_stats() if (guest_plans := get_guest_plan_cache()) else None
+    }
+
+def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Allow /admin endpoints only with the configured X-Admin-Key"""
+    if not Config.ADMIN_API_KEY:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, Config.ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+
+def enabled_safety_cache():
+    cache = get_safety_cache()
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Safety cache is disabled")
+    return cache
+
+@app.get("/admin/safety-cache", dependencies=[Depends(require_admin)])
+def list_safety_cache():
+    """Shared SafetyAgent results with their hit rate"""
+    cache = enabled_safety_cache()
+    return {"stats": cache.get_stats(), "entries": cache.entries()}
+
+@app.delete("/admin/safety-cache", dependencies=[Depends(require_admin)])
+def purge_safety_cache(destination: Optional[str] = None, passport: Optional[str] = None, month: Optional[str] = None):
+    """Drop cached safety info, e.g. after a travel advisory changes. No filters purges everything."""
+    purged = enabled_safety_cache().purge(destination, passport, month)
+    print(f"Purged {purged} safety cache entries (destination={destination}, passport={passport}, month={month})")
+    return {"purged": purged}
+
+BUSY_DETAIL = "The travel planner is busy right now. Please try again in a moment."
+
+def overloaded(e: Overloaded) -> HTTPException:
+    """503 that tells the client (and proxy) when to come back"""
+    return HTTPException(status_code=503, detail=BUSY_DETAIL, headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+def guest_principal(request: Request) -> str:
+    return f"ip:{get_remote_address(request)}"
+
+def member_principal(user: User) -> str:
+    return f"user:{user.id}"
+
+@asynccontextmanager
+async def admitted(job_class: str, principal: str):
+    """Hold an admission slot, or fail fast with 503"""
+    try:
+        await admission.acquire(job_class, principal)
+    except Overloaded as e:
+        raise overloaded(e)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        admission.release(time.perf_counter() - start, job_class)
+
+def member_slot(job_class: str):
+    """Dependency holding an admission slot, queued fairly per user, while the endpoint runs"""
+    async def dependency(current_user: User = Depends(get_current_user)):
+        async with admitted(job_class, member_principal(current_user)):
+            yield
+    return dependency
+
+def guest_slot(job_class: str):
+    """Dependency holding an admission slot, queued fairly per client IP, while the endpoint runs"""
+    async def dependency(request: Request):
+        async with admitted(job_class, guest_principal(request)):
+            yield
+    return dependency
+
+def plan_deadline(request: Request):
+    """Deadline for a plan answered in one response, counted from the request's arrival"""
+    return deadline(Config.PLAN_DEADLINE_SECONDS, getattr(request.state, "received_at", None))
+
+DISCONNECT_POLL_SECONDS = 1.0
+
+class ClientDisconnected(HTTPException):
+    """The client went away before its response was ready (nginx logs these as 499)"""
+    
+    def __init__(self):
+        super().__init__(status_code=499, detail="Client closed request")
+
+def record_abandoned(llm_calls: int, work: str) -> None:
+    metrics.incr("client_disconnects")
+    metrics.incr("llm_calls_wasted", llm_calls)
+    print(f"Client disconnected during {work}; cancelled after {llm_calls} LLM calls")
+
+async def unless_disconnected(request: Request, work, description: str):
+    """Await ``work``, cancelling it (and its LLM calls) if the client disconnects first"""
+    with track_llm_calls() as ledger:
+        task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                record_abandoned(ledger.calls, description)
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+async def run_once(request: Request, idempotency_key: Optional[str], principal: str,
+                   payload: Dict[str, Any], compute, description: str):
+    """Run ``compute`` once per Idempotency-Key.
+    
+    A repeat with the same key waits for the computation already running or
+    gets its stored result; without a key every request computes.
+    """
+    if not idempotency_key:
+        return await unless_disconnected(request, compute(), description)
+    if len(idempotency_key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be at most 255 characters")
+    
+    store = get_idempotency_store()
+    key = f"{principal}:{request.url.path}:{idempotency_key}"
+    try:
+        stored = await store.lookup(key, payload)
+        if stored is not MISSING:
+            return stored
+        flight = store.flight(key, payload, compute)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    return await unless_disconnected(request, flight.wait(), description)
+
+def validate_trip_request(trip_request: TripRequest):
+    """Reject trip requests outside the supported ranges"""
+    if trip_request.days < 1 or trip_request.days > 30:
+        raise HTTPException(status_code=400, detail="Days must be between 1 and 30")
+    
+    if trip_request.budget_total < 100 or trip_request.budget_total > 100000:
+        raise HTTPException(status_code=400, detail="Budget must be between $100 and $100,000")
+    
+    if len(trip_request.interests) == 0:
+        raise HTTPException(status_code=400, detail="At least one interest must be selected")
+
+def add_trip(db: Session, user_id, trip_request: TripRequest, complete_plan: Dict[str, Any]) -> Trip:
+    """Add a generated plan to the user's trip history, leaving the commit to the caller"""
+    destination = display_name(complete_plan['destination'])
+    db_trip = Trip(
+        user_id=user_id,
+        title=f"{trip_request.days}-day trip to {destination}",
+        destination=destination,
+        origin_city=trip_request.origin_city,
+        days=trip_request.days,
+        month=trip_request.month,
+        budget_total=trip_request.budget_total,
+        interests=trip_request.interests,
+        visa_passport=trip_request.visa_passport,
+        preferred_destination=trip_request.preferred_destination,
+        trip_data=complete_plan  # Store complete AI response as JSONB
+    )
+    
+    db.add(db_trip)
+    db.flush()
+    return db_trip
+
+def save_trip(db: Session, user_id, trip_request: TripRequest, complete_plan: Dict[str, Any]) -> Trip:
+    """Persist a generated plan to the user's trip history"""
+    db_trip = add_trip(db, user_id, trip_request, complete_plan)
+    db.commit()
+    db.refresh(db_trip)
+    return db_trip
+
 # Phase 2: Enhanced trip planning endpoint with authentication and database
 @app.post("/plan", response_model=TripResponse)
 @limiter.limit("5 per minute")  # Rate limit: 5 requests per minute
@@ -175,7 +386,8 @@ async def generate_trip_plan(
     request: Request, 
     trip_request: TripRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    _slot: None = Depends(member_slot("plan")),
+    idempotency_key: Optional[str] = Header(None)
 ):
     """
     Generate a complete trip plan using multiple AI agents.
@@ -184,116 +396,38 @@ async def generate_trip_plan(
     - Requires user authentication
     - Saves trip to user's personal database
     - Rate limited to 5 requests per minute per IP address
+    - Repeats with the same ``Idempotency-Key`` header return the first result
     """
     
-    agent_messages = []
-    
     # Validate input
-    if trip_request.days < 1 or trip_request.days > 30:
-        raise HTTPException(status_code=400, detail="Days must be between 1 and 30")
-    
-    if trip_request.budget_total < 100 or trip_request.budget_total > 100000:
-        raise HTTPException(status_code=400, detail="Budget must be between $100 and $100,000")
-    
-    if len(trip_request.interests) == 0:
-        raise HTTPException(status_code=400, detail="At least one interest must be selected")
+    validate_trip_request(trip_request)
     
     try:
         # Convert request to dict for easier passing
         context = trip_request.dict()
         
-        # Step 1: Destination Selection
+        # Run the agent pipeline (independent agents run concurrently)
         print(f"Processing trip request for {trip_request.traveler_name} (User: {current_user.name}, ID: {current_user.id})")
-        dest_agent = DestinationAgent()
-        destination_info = dest_agent.process(context)
-        context['destination'] = destination_info['destination']
-        
-        agent_messages.append({
-            "agent": "DestinationAgent",
-            "role": "Destination Expert",
-            "content": f"Selected {destination_info['destination']}: {destination_info.get('reason', '')}"
-        })
-        
-        # Step 2: Itinerary Planning
-        itin_agent = ItineraryAgent()
-        itinerary = itin_agent.process(context)
-        
-        agent_messages.append({
-            "agent": "ItineraryAgent",
-            "role": "Itinerary Planner",
-            "content": f"Created {len(itinerary)}-day detailed itinerary"
-        })
-        
-        # Step 3: Budget Analysis
-        budget_agent = BudgetAgent()
-        budget_analysis = budget_agent.process(context)
-        
-        # Calculate total cost and check if within budget
-        if 'breakdown' in budget_analysis:
-            total_cost = sum(budget_analysis['breakdown'].values())
-        else:
-            total_cost = budget_analysis.get('total', 0)
-        
-        within_budget = total_cost <= trip_request.budget_total
-        
-        agent_messages.append({
-            "agent": "BudgetAgent",
-            "role": "Budget Analyst",
-            "content": f"Estimated total cost: ${total_cost:.2f} (Budget: ${trip_request.budget_total})"
-        })
-        
-        # Step 4: Safety Advisory
-        safety_agent = SafetyAgent()
-        safety_info = safety_agent.process(context)
-        
-        agent_messages.append({
-            "agent": "SafetyAgent",
-            "role": "Safety Advisor",
-            "content": f"Safety level: {safety_info.get('safety_level', 'Unknown')}, Visa required: {safety_info.get('visa_required', 'Check requirements')}"
-        })
         
-        # Create complete trip plan
-        complete_plan = {
-            "destination": destination_info['destination'],
-            "destination_info": destination_info,
-            "itinerary": itinerary,
-            "budget_analysis": budget_analysis,
-            "safety_info": safety_info,
-            "within_budget": within_budget,
-            "agent_messages": agent_messages
-        }
-        
-        # Phase 2: Save trip to database instead of JSON file
-        db_trip = Trip(
-            user_id=current_user.id,
-            title=f"{trip_request.days}-day trip to {destination_info['destination']}",
-            destination=destination_info['destination'],
-            origin_city=trip_request.origin_city,
-            days=trip_request.days,
-            month=trip_request.month,
-            budget_total=trip_request.budget_total,
-            interests=trip_request.interests,
-            visa_passport=trip_request.visa_passport,
-            preferred_destination=trip_request.preferred_destination,
-            trip_data=complete_plan  # Store complete AI response as JSONB
-        )
-        
-        db.add(db_trip)
-        db.commit()
-        db.refresh(db_trip)
+        async def plan_and_save():
+            complete_plan = await plan_trip(context)
+            
+            # Phase 2: Save trip to database instead of JSON file (skipped if the client left).
+            # Uses its own session: with an Idempotency-Key the plan may outlive this request.
+            db = SessionLocal()
+            try:
+                db_trip = save_trip(db, current_user.id, trip_request, complete_plan)
+            finally:
+                db.close()
+            print(f"✅ Trip saved to database with ID: {db_trip.id} for user: {current_user.email}")
+            return complete_plan
         
-        print(f"✅ Trip saved to database with ID: {db_trip.id} for user: {current_user.email}")
+        with plan_deadline(request):
+            complete_plan = await run_once(request, idempotency_key, member_principal(current_user),
+                                           context, plan_and_save, "trip planning")
         
         # Return the complete trip plan
-        return TripResponse(
-            destination=destination_info['destination'],
-            destination_info=destination_info,
-            itinerary=itinerary,
-            budget_analysis=budget_analysis,
-            safety_info=safety_info,
-            within_budget=within_budget,
-            agent_messages=agent_messages
-        )
+        return TripResponse(**complete_plan)
         
     except HTTPException:
         raise
@@ -447,13 +581,15 @@ async def get_user_stats(
     feedbacks = db.query(Feedback).filter(Feedback.user_id == current_user.id).all()
     avg_rating = sum([f.rating for f in feedbacks]) / max(len(feedbacks), 1)
     
-    # Get favorite destinations
+    # Get favorite destinations, counting different spellings of a place together
     destinations = {}
+    names = {}
     for trip in trips:
-        dest = trip.destination
+        dest = canonicalize(trip.destination)
         destinations[dest] = destinations.get(dest, 0) + 1
+        names.setdefault(dest, display_name(trip.destination))
     
-    top_destinations = sorted(destinations.items(), key=lambda x: x[1], reverse=True)[:5]
+    top_destinations = [(names[dest], count) for dest, count in sorted(destinations.items(), key=lambda x: x[1], reverse=True)[:5]]
     
     return {
         "total_trips": total_trips,
@@ -470,85 +606,48 @@ async def get_user_stats(
 # Add this new endpoint for guest users
 @app.post("/plan-guest", response_model=TripResponse)
 @limiter.limit("10 per minute")  # Higher limit for guests
-async def generate_trip_plan_guest(request: Request, trip_request: TripRequest):
+async def generate_trip_plan_guest(request: Request, trip_request: TripRequest,
+                                   _slot: None = Depends(guest_slot("guest_plan")),
+                                   idempotency_key: Optional[str] = Header(None),
+                                   fresh: bool = False):
     """
     Generate a trip plan for guest users (no authentication required)
-    """
     
-    agent_messages = []
+    Requests identical apart from ``traveler_name`` may get a recently generated
+    plan (plans never mention the traveler); pass ``?fresh=true`` to always plan anew.
+    """
     
     # Same validation as authenticated endpoint
-    if trip_request.days < 1 or trip_request.days > 30:
-        raise HTTPException(status_code=400, detail="Days must be between 1 and 30")
-    
-    if trip_request.budget_total < 100 or trip_request.budget_total > 100000:
-        raise HTTPException(status_code=400, detail="Budget must be between $100 and $100,000")
-    
-    if len(trip_request.interests) == 0:
-        raise HTTPException(status_code=400, detail="At least one interest must be selected")
+    validate_trip_request(trip_request)
     
     try:
         # Same AI agent processing as authenticated users
         context = trip_request.dict()
         
-        # AI agents (same as authenticated)
-        dest_agent = DestinationAgent()
-        destination_info = dest_agent.process(context)
-        context['destination'] = destination_info['destination']
+        cache = get_guest_plan_cache()
         
-        agent_messages.append({
-            "agent": "DestinationAgent",
-            "role": "Destination Expert",
-            "content": f"Selected {destination_info['destination']}: {destination_info.get('reason', '')}"
-        })
-        
-        itin_agent = ItineraryAgent()
-        itinerary = itin_agent.process(context)
-        
-        agent_messages.append({
-            "agent": "ItineraryAgent",
-            "role": "Itinerary Planner",
-            "content": f"Created {len(itinerary)}-day detailed itinerary"
-        })
-        
-        budget_agent = BudgetAgent()
-        budget_analysis = budget_agent.process(context)
+        async def cached_plan():
+            if cache is not None and not fresh:
+                cached = await cache.aget(context)
+                if cached is not None:
+                    return cached
+            # AI agents (same pipeline as authenticated)
+            complete_plan = await plan_trip(context)
+            if cache is not None:
+                await cache.aset(context, complete_plan)
+            return complete_plan
         
-        if 'breakdown' in budget_analysis:
-            total_cost = sum(budget_analysis['breakdown'].values())
-        else:
-            total_cost = budget_analysis.get('total', 0)
-        
-        within_budget = total_cost <= trip_request.budget_total
-        
-        agent_messages.append({
-            "agent": "BudgetAgent",
-            "role": "Budget Analyst",
-            "content": f"Estimated total cost: ${total_cost:.2f} (Budget: ${trip_request.budget_total})"
-        })
+        with plan_deadline(request):
+            complete_plan = await run_once(request, idempotency_key, guest_principal(request),
+                                           dict(context, fresh=fresh), cached_plan, "guest trip planning")
         
-        safety_agent = SafetyAgent()
-        safety_info = safety_agent.process(context)
-        
-        agent_messages.append({
-            "agent": "SafetyAgent",
-            "role": "Safety Advisor",
-            "content": f"Safety level: {safety_info.get('safety_level', 'Unknown')}"
-        })
-        
-        print(f"Guest trip plan generated for {trip_request.traveler_name} to {destination_info['destination']}")
+        print(f"Guest trip plan generated for {trip_request.traveler_name} to {complete_plan['destination']}")
         
         # Return plan (not saved to database)
-        return TripResponse(
-            destination=destination_info['destination'],
-            destination_info=destination_info,
-            itinerary=itinerary,
-            budget_analysis=budget_analysis,
-            safety_info=safety_info,
-            within_budget=within_budget,
-            agent_messages=agent_messages
-        )
+        return TripResponse(**complete_plan)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in guest trip planning: {str(e)}")
         raise HTTPException(status_code=500, detail="An error occurred while generating your trip plan. Please try again.")
@@ -594,24 +693,11 @@ class ChatResponse(BaseModel):
     response: str
     agent: str = "🤖 AI Assistant"
 
-@app.post("/chat", response_model=ChatResponse)
-@limiter.limit("20 per minute")  # Rate limit: 20 chat messages per minute
-async def chat_with_ai(
-    request: Request,
-    chat_request: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Real LLM-powered chat endpoint for travel assistance
-    """
+def build_chat_prompts(chat_request: ChatRequest):
+    """Build (user_prompt, system_prompt) for an authenticated chat turn"""
     
-    try:
-        # Get LLM client (Groq/Gemini)
-        llm = get_llm_client()
-        
-        # Prepare context-aware system prompt
-        system_prompt = """You are an expert travel assistant. You provide helpful, accurate, and specific travel advice.
+    # Prepare context-aware system prompt
+    system_prompt = """You are an expert travel assistant. You provide helpful, accurate, and specific travel advice.
 
 IMPORTANT INSTRUCTIONS:
 - Be conversational and friendly
@@ -622,14 +708,14 @@ IMPORTANT INSTRUCTIONS:
 
 Response format: Provide direct, helpful answers without unnecessary introductions."""
 
-        # Add trip context if available
-        if chat_request.trip_context:
-            destination = chat_request.trip_context.get('destination', 'the destination')
-            budget_info = chat_request.trip_context.get('budget_analysis', {})
-            itinerary = chat_request.trip_context.get('itinerary', [])
-            safety_info = chat_request.trip_context.get('safety_info', {})
-            
-            context_prompt = f"""
+    # Add trip context if available
+    if chat_request.trip_context:
+        destination = chat_request.trip_context.get('destination', 'the destination')
+        budget_info = chat_request.trip_context.get('budget_analysis', {})
+        itinerary = chat_request.trip_context.get('itinerary', [])
+        safety_info = chat_request.trip_context.get('safety_info', {})
+        
+        context_prompt = f"""
 CURRENT TRIP CONTEXT:
 - Destination: {destination}
 - Duration: {len(itinerary)} days
@@ -638,52 +724,101 @@ CURRENT TRIP CONTEXT:
 
 Use this context to provide specific, personalized advice about their {destination} trip.
 """
-            
-            system_prompt += context_prompt
         
-        # Prepare user prompt with context awareness
-        if chat_request.trip_context:
-            destination = chat_request.trip_context.get('destination', 'your destination')
-            user_prompt = f"User is asking about their {destination} trip: {chat_request.message}"
-        else:
-            user_prompt = f"User question: {chat_request.message}"
+        system_prompt += context_prompt
+    
+    # Prepare user prompt with context awareness
+    if chat_request.trip_context:
+        destination = chat_request.trip_context.get('destination', 'your destination')
+        user_prompt = f"User is asking about their {destination} trip: {chat_request.message}"
+    else:
+        user_prompt = f"User question: {chat_request.message}"
+    
+    return user_prompt, system_prompt
+
+def chat_agent_for(message: str) -> str:
+    """Determine agent type based on question content"""
+    message_lower = message.lower()
+    
+    if any(word in message_lower for word in ['budget', 'cost', 'money', 'price']):
+        return "💰 Budget Analyst"
+    elif any(word in message_lower for word in ['day', 'itinerary', 'plan', 'schedule']):
+        return "🗓️ Itinerary Planner"
+    elif any(word in message_lower for word in ['safe', 'safety', 'visa', 'danger']):
+        return "🛡️ Safety Advisor"
+    elif any(word in message_lower for word in ['food', 'restaurant', 'eat', 'cuisine']):
+        return "🍽️ Food Expert"
+    elif any(word in message_lower for word in ['weather', 'climate', 'pack', 'clothes']):
+        return "🌤️ Weather Expert"
+    return "🤖 AI Travel Assistant"
+
+CHAT_FALLBACK_RESPONSE = "I'm having trouble processing your request right now. Please try rephrasing your question or try again in a moment."
+
+def build_guest_chat_prompts(chat_request: ChatRequest):
+    """Build (user_prompt, system_prompt) for a guest chat turn"""
+    
+    # Basic system prompt for guests
+    system_prompt = """You are a travel assistant. Provide helpful travel advice.
+
+INSTRUCTIONS:
+- Be friendly and conversational
+- Keep responses under 250 words
+- Use emojis appropriately
+- Be encouraging about travel planning
+
+For guests without accounts, focus on general travel advice and encourage them to create an account for personalized trip planning."""
+
+    # Add context if available
+    if chat_request.trip_context:
+        destination = chat_request.trip_context.get('destination', 'the destination')
+        context_info = f"\nUser has a planned trip to {destination}. Provide specific advice about this destination."
+        system_prompt += context_info
+    
+    return chat_request.message, system_prompt
+
+def guest_chat_fallback(chat_request: ChatRequest) -> str:
+    return f"I understand you're asking about: '{chat_request.message}'\n\nI'm having some technical difficulties right now. For the best travel planning experience with personalized AI assistance, consider creating an account!"
+
+@app.post("/chat", response_model=ChatResponse)
+@limiter.limit("20 per minute")  # Rate limit: 20 chat messages per minute
+async def chat_with_ai(
+    request: Request,
+    chat_request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    _slot: None = Depends(member_slot("chat"))
+):
+    """
+    Real LLM-powered chat endpoint for travel assistance
+    """
+    
+    try:
+        # Get LLM client (Groq/Gemini)
+        llm = get_llm_client()
+        user_prompt, system_prompt = build_chat_prompts(chat_request)
         
         # Call the real LLM
         try:
-            ai_response = llm.generate(user_prompt, system_prompt)
-            
-            # Determine agent type based on question content
-            message_lower = chat_request.message.lower()
-            
-            if any(word in message_lower for word in ['budget', 'cost', 'money', 'price']):
-                agent = "💰 Budget Analyst"
-            elif any(word in message_lower for word in ['day', 'itinerary', 'plan', 'schedule']):
-                agent = "🗓️ Itinerary Planner"
-            elif any(word in message_lower for word in ['safe', 'safety', 'visa', 'danger']):
-                agent = "🛡️ Safety Advisor"
-            elif any(word in message_lower for word in ['food', 'restaurant', 'eat', 'cuisine']):
-                agent = "🍽️ Food Expert"
-            elif any(word in message_lower for word in ['weather', 'climate', 'pack', 'clothes']):
-                agent = "🌤️ Weather Expert"
-            else:
-                agent = "🤖 AI Travel Assistant"
+            ai_response = await unless_disconnected(request, llm.agenerate(user_prompt, system_prompt), "chat")
             
             return ChatResponse(
                 response=ai_response,
-                agent=agent
+                agent=chat_agent_for(chat_request.message)
             )
             
+        except HTTPException:
+            raise
         except Exception as llm_error:
             # Fallback if LLM fails
             print(f"LLM Error: {llm_error}")
             
-            fallback_response = "I'm having trouble processing your request right now. Please try rephrasing your question or try again in a moment."
-            
             return ChatResponse(
-                response=fallback_response,
+                response=CHAT_FALLBACK_RESPONSE,
                 agent="🤖 AI Assistant"
             )
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Chat endpoint error: {str(e)}")
         raise HTTPException(status_code=500, detail="Chat service temporarily unavailable")
@@ -693,7 +828,8 @@ Use this context to provide specific, personalized advice about their {destinati
 @limiter.limit("10 per minute")  # Lower limit for guests
 async def chat_with_ai_guest(
     request: Request,
-    chat_request: ChatRequest
+    chat_request: ChatRequest,
+    _slot: None = Depends(guest_slot("guest_chat"))
 ):
     """
     Chat endpoint for guest users (no authentication required)
@@ -702,45 +838,307 @@ async def chat_with_ai_guest(
     try:
         # Get LLM client
         llm = get_llm_client()
-        
-        # Basic system prompt for guests
-        system_prompt = """You are a travel assistant. Provide helpful travel advice.
-
-INSTRUCTIONS:
-- Be friendly and conversational
-- Keep responses under 250 words
-- Use emojis appropriately
-- Be encouraging about travel planning
-
-For guests without accounts, focus on general travel advice and encourage them to create an account for personalized trip planning."""
-
-        # Add context if available
-        if chat_request.trip_context:
-            destination = chat_request.trip_context.get('destination', 'the destination')
-            context_info = f"\nUser has a planned trip to {destination}. Provide specific advice about this destination."
-            system_prompt += context_info
+        user_prompt, system_prompt = build_guest_chat_prompts(chat_request)
         
         # Generate response
         try:
-            ai_response = llm.generate(chat_request.message, system_prompt)
+            ai_response = await unless_disconnected(request, llm.agenerate(user_prompt, system_prompt), "guest chat")
             
             return ChatResponse(
                 response=ai_response,
                 agent="🤖 AI Travel Assistant"
             )
             
+        except HTTPException:
+            raise
         except Exception as llm_error:
             # Fallback for guests
-            fallback_response = f"I understand you're asking about: '{chat_request.message}'\n\nI'm having some technical difficulties right now. For the best travel planning experience with personalized AI assistance, consider creating an account!"
-            
             return ChatResponse(
-                response=fallback_response,
+                response=guest_chat_fallback(chat_request),
                 agent="🤖 Travel Assistant"
             )
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Guest chat error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Chat service temporarily unavailable")
+
+# ==========================================
+# STREAMING ENDPOINTS (Server-Sent Events)
+# ==========================================
+
+def sse_event(data: Dict[str, Any], event: str = None) -> str:
+    """Format one Server-Sent Event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+async def stream_chat_events(llm, user_prompt: str, system_prompt: str, agent: str,
+                             fallback_response: str, fallback_agent: str):
+    """Relay LLM tokens as SSE ``data`` events, then a final ``done`` event"""
+    start = time.perf_counter()
+    first_token_at = None
+    finished = False
+    
+    try:
+        try:
+            async for token in llm.agenerate_stream(user_prompt, system_prompt):
+                if not token:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter() - start
+                    metrics.incr("chat_stream_first_token_seconds", first_token_at)
+                    metrics.incr("chat_streams")
+                    print(f"Chat stream time-to-first-token: {first_token_at:.2f}s")
+                yield sse_event({"token": token})
+        except Exception as llm_error:
+            print(f"LLM Error: {llm_error}")
+            if first_token_at is None:
+                # Nothing sent yet - behave like the non-streaming fallback
+                yield sse_event({"token": fallback_response})
+                agent = fallback_agent
+            else:
+                yield sse_event({"detail": "The response was interrupted. Please try again."}, event="error")
+        
+        yield sse_event({"agent": agent}, event="done")
+        finished = True
+    finally:
+        if not finished:
+            # The client disconnected; closing this generator cancelled the LLM stream
+            record_abandoned(1, "chat streaming")
+
+async def admitted_stream(events, job_class: str, principal: str):
+    """Hold an admission slot while a stream runs; the endpoint has already checked for overload"""
+    try:
+        async with admission.slot(job_class, principal):
+            async for event in events:
+                yield event
+    except Overloaded:
+        # The queue grew between the endpoint's check and the first event
+        yield sse_event({"detail": BUSY_DETAIL}, event="error")
+
+def sse_response(events, job_class: str, principal: str) -> StreamingResponse:
+    """Stream LLM-backed events under admission control (503 up front when overloaded)"""
+    try:
+        admission.check()
+    except Overloaded as e:
+        raise overloaded(e)
+    return StreamingResponse(
+        admitted_stream(events, job_class, principal),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/chat/stream")
+@limiter.limit("20 per minute")  # Same limit as /chat
+async def chat_with_ai_stream(
+    request: Request,
+    chat_request: ChatRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Streaming version of /chat: emits tokens as Server-Sent Events
+    """
+    
+    try:
+        llm = get_llm_client()
+        user_prompt, system_prompt = build_chat_prompts(chat_request)
+    except Exception as e:
+        print(f"Chat endpoint error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Chat service temporarily unavailable")
+    
+    return sse_response(stream_chat_events(
+        llm, user_prompt, system_prompt,
+        agent=chat_agent_for(chat_request.message),
+        fallback_response=CHAT_FALLBACK_RESPONSE,
+        fallback_agent="🤖 AI Assistant"
+    ), "chat", member_principal(current_user))
+
+@app.post("/chat-guest/stream")
+@limiter.limit("10 per minute")  # Same limit as /chat-guest
+async def chat_with_ai_guest_stream(
+    request: Request,
+    chat_request: ChatRequest
+):
+    """
+    Streaming version of /chat-guest: emits tokens as Server-Sent Events
+    """
+    
+    try:
+        llm = get_llm_client()
+        user_prompt, system_prompt = build_guest_chat_prompts(chat_request)
     except Exception as e:
         print(f"Guest chat error: {str(e)}")
         raise HTTPException(status_code=500, detail="Chat service temporarily unavailable")
+    
+    return sse_response(stream_chat_events(
+        llm, user_prompt, system_prompt,
+        agent="🤖 AI Travel Assistant",
+        fallback_response=guest_chat_fallback(chat_request),
+        fallback_agent="🤖 Travel Assistant"
+    ), "guest_chat", guest_principal(request))
+
+PLAN_STREAM_HEARTBEAT_SECONDS = 15
+
+async def stream_plan_events(context: Dict[str, Any], trip_request: TripRequest, user_id, user_email: str):
+    """Emit SSE events as the plan is built.
+    
+    ``partial`` events carry single itinerary days as they are parsed, ``agent``
+    events each finished section, and a final ``plan`` event the saved trip.
+    A later ``agent`` event for a section supersedes its earlier partials.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    def on_complete(agent, ctx):
+        result = ctx[agent.produces]
+        queue.put_nowait(sse_event({
+            "agent": agent.name,
+            "section": agent.produces,
+            "message": agent.summarize(result, ctx),
+            "data": result
+        }, event="agent"))
+    
+    def on_partial(agent, item):
+        queue.put_nowait(sse_event({"agent": agent.name, "section": agent.produces, "data": item}, event="partial"))
+    
+    with track_llm_calls() as ledger:
+        task = asyncio.create_task(plan_trip(context, on_complete, on_partial))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    finished = False
+    
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=PLAN_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # SSE comment keeps the proxy from timing out between agents
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield item
+        
+        complete_plan = task.result()
+        db = SessionLocal()
+        try:
+            db_trip = save_trip(db, user_id, trip_request, complete_plan)
+            trip_id = str(db_trip.id)
+        finally:
+            db.close()
+        
+        print(f"✅ Streamed trip saved to database with ID: {trip_id} for user: {user_email}")
+        yield sse_event(dict(TripResponse(**complete_plan).dict(), trip_id=trip_id), event="plan")
+        finished = True
+        
+    except Exception as e:
+        print(f"Error in streamed trip planning: {str(e)}")
+        print(traceback.format_exc())
+        yield sse_event({"detail": "An error occurred while generating your trip plan. Please try again."}, event="error")
+        finished = True
+    finally:
+        if not finished:
+            # The client disconnected: stop the agents and don't save a trip nobody will see
+            record_abandoned(ledger.calls, "streamed trip planning")
+        if not task.done():
+            task.cancel()
+
+@app.post("/plan/stream")
+@limiter.limit("5 per minute")  # Same limit as /plan
+async def generate_trip_plan_stream(
+    request: Request,
+    trip_request: TripRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Progressive version of /plan: streams each agent's section as it completes,
+    then a final ``plan`` event with the full TripResponse and saved trip id.
+    """
+    
+    validate_trip_request(trip_request)
+    print(f"Streaming trip request for {trip_request.traveler_name} (User: {current_user.name}, ID: {current_user.id})")
+    
+    return sse_response(stream_plan_events(
+        trip_request.dict(), trip_request, current_user.id, current_user.email
+    ), "plan", member_principal(current_user))
+
+async def run_plan_job(job: PlanJob, on_section) -> tuple:
+    """Plan a queued trip, reporting each section as it completes.
+    
+    The trip is saved by the worker, in the transaction that completes the job.
+    """
+    trip_request = TripRequest(**job.request_data)
+    context = trip_request.dict()
+    
+    def on_complete(agent, ctx):
+        on_section(agent.produces, ctx[agent.produces])
+    
+    # No proxy is waiting on a job, so it gets far longer than /plan before falling back
+    with deadline(Config.PLAN_JOB_DEADLINE_SECONDS):
+        complete_plan = await plan_trip(context, on_complete)
+    
+    def save(db: Session):
+        return add_trip(db, job.user_id, trip_request, complete_plan).id
+    
+    return TripResponse(**complete_plan).dict(), save
+
+plan_jobs = PlanJobWorkers(run_plan_job, lambda: SessionLocal())
+
+def job_status(job: PlanJob) -> Dict[str, Any]:
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "attempts": job.attempts,
+        "sections": job.partial_result or {},
+        "result": job.result,
+        "trip_id": str(job.trip_id) if job.trip_id else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+@app.post("/plan/jobs", status_code=202)
+@limiter.limit("5 per minute")  # Same limit as /plan
+async def submit_plan_job(
+    request: Request,
+    trip_request: TripRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Queue a trip plan and return its job id straight away.
+    
+    Poll ``GET /plan/jobs/{job_id}`` for progress: ``sections`` fills in as
+    agents finish and ``result`` holds the TripResponse once ``status`` is
+    ``completed``. The trip is saved to the user's history like /plan.
+    """
+    
+    validate_trip_request(trip_request)
+    context = trip_request.dict()
+    
+    async def submit():
+        job = plan_jobs.submit(db, current_user.id, context)
+        print(f"Queued plan job {job.id} for {trip_request.traveler_name} (User: {current_user.name}, ID: {current_user.id})")
+        return {"job_id": str(job.id), "status": job.status, "poll_url": f"/plan/jobs/{job.id}"}
+    
+    return await run_once(request, idempotency_key, member_principal(current_user), context, submit, "plan job submission")
+
+@app.get("/plan/jobs/{job_id}")
+async def get_plan_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Status, finished sections and (once completed) the full plan of a queued trip"""
+    try:
+        job_uuid = uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    job = db.query(PlanJob).filter(PlanJob.id == job_uuid, PlanJob.user_id == current_user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
 
 # Chat history endpoint (for authenticated users)
 @app.get("/chat/history")
@@ -0,0 +1,28 @@
+import threading
+from collections import defaultdict
+from typing import Dict
+
+class Metrics:
+    """Process-wide counters reported by the /metrics endpoint"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+    
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+    
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+    
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+metrics = Metrics()
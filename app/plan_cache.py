@@ -0,0 +1,66 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from app.cache import MemoryCache, SQLiteCache, TieredCache
+from app.config import Config
+from app.destinations import canonicalize, normalize
+from app.metrics import metrics
+
+def plan_key(request: Dict[str, Any]) -> str:
+    """Key for a trip request with personal fields (the traveler's name) left out"""
+    normalized = {
+        "origin_city": canonicalize(request["origin_city"]),
+        "days": request["days"],
+        "month": normalize(request["month"]),
+        "budget_total": round(float(request["budget_total"]), 2),
+        "interests": sorted({normalize(interest) for interest in request["interests"]}),
+        "visa_passport": normalize(request["visa_passport"]),
+        "preferred_destination": canonicalize(request.get("preferred_destination") or "")
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+class GuestPlanCache:
+    """Whole plans for guest requests that differ only in the traveler's name.
+
+    The agents never see the name, so a plan can be handed to any guest as is.
+    """
+
+    def __init__(self, cache: TieredCache, ttl: float):
+        self.cache = cache
+        self.ttl = ttl
+
+    async def aget(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        plan = await self.cache.aget(plan_key(request))
+        if plan is None:
+            metrics.incr("guest_plan_cache_misses")
+            return None
+        metrics.incr("guest_plan_cache_hits")
+        return plan
+
+    async def aset(self, request: Dict[str, Any], plan: Dict[str, Any]) -> None:
+        if plan.get("degraded_sections"):
+            return  # Don't hand fallback sections to everyone else who asks
+        await self.cache.aset(plan_key(request), plan, self.ttl)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.cache.get_stats()
+
+
+_guest_plan_cache: Optional[GuestPlanCache] = None
+_lock = threading.Lock()
+
+def get_guest_plan_cache() -> Optional[GuestPlanCache]:
+    """Process-wide guest plan cache (memory LRU + shared SQLite file), or None when disabled"""
+    global _guest_plan_cache
+    if not Config.GUEST_PLAN_CACHE_ENABLED:
+        return None
+    with _lock:
+        if _guest_plan_cache is None:
+            disk = None
+            if Config.GUEST_PLAN_CACHE_PATH:
+                disk = SQLiteCache(Config.GUEST_PLAN_CACHE_PATH, table="guest_plans", max_entries=Config.GUEST_PLAN_CACHE_MAX_ENTRIES)
+            _guest_plan_cache = GuestPlanCache(TieredCache(MemoryCache(Config.GUEST_PLAN_CACHE_MAX_ENTRIES), disk), Config.GUEST_PLAN_CACHE_TTL)
+        return _guest_plan_cache
@@ -0,0 +1,143 @@
+"""Pre-warm the shared destination knowledge caches off-peak.
+
+Reads destinations, passports, months, origins and trip lengths from a JSON
+file and fills the safety cache (destination x passport x month) and the
+budget cost models (origin x destination x month, at each trip length, so
+later requests of any length can be rescaled). Destinations are resolved
+through the alias index first so entries land on the keys requests use.
+
+LLM calls go through the normal client stack, so the shared per-provider
+token buckets keep the job inside provider quotas alongside live traffic;
+``--concurrency`` bounds how many calls it has queued at once. Finished
+tasks are appended to a checkpoint file and skipped when the job is re-run.
+
+    python -m app.prewarm --input app/data/prewarm.json --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Set
+
+from app.agents.budget_agent import BudgetAgent
+from app.agents.safety_agent import SafetyAgent
+from app.config import Config
+from app.destinations import display_name
+from app.knowledge import get_budget_models, get_safety_cache
+from app.llm.usage import track_llm_calls
+
+DEFAULT_INPUT = os.path.join(os.path.dirname(__file__), "data", "prewarm.json")
+DEFAULT_CHECKPOINT = "./cache/prewarm_checkpoint.txt"
+
+
+def build_tasks(targets: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One task per safety entry and per budget sample to fill"""
+    destinations = list(dict.fromkeys(display_name(d) for d in targets["destinations"]))
+    tasks = []
+    for destination in destinations:
+        for month in targets["months"]:
+            for passport in targets.get("passports", []):
+                tasks.append({
+                    "id": f"safety|{destination}|{passport}|{month}",
+                    "kind": "safety",
+                    "context": {"destination": destination, "visa_passport": passport, "month": month, "days": 7}
+                })
+            for origin in targets.get("origins", []):
+                for days in targets.get("days", [3, 7]):
+                    tasks.append({
+                        "id": f"budget|{origin}|{destination}|{month}|{days}",
+                        "kind": "budget",
+                        "context": {"origin_city": origin, "destination": destination, "month": month, "days": days,
+                                    "budget_total": targets.get("budget_total", 2000)}
+                    })
+    return tasks
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+class Prewarmer:
+    """Runs pre-warm tasks with bounded concurrency and records progress"""
+
+    def __init__(self, concurrency: int, checkpoint_path: str):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.checkpoint_path = checkpoint_path
+        self.stats = {"done": 0, "failed": 0, "llm_calls": 0}
+
+    async def run_task(self, task: Dict[str, Any]) -> None:
+        agent = SafetyAgent() if task["kind"] == "safety" else BudgetAgent()
+        async with self.semaphore:
+            with track_llm_calls() as ledger:
+                try:
+                    await agent.process(dict(task["context"]))
+                    ok = not agent.degraded  # Fallbacks aren't cached, so try again next run
+                except Exception as e:
+                    print(f"  {task['id']} failed: {e}")
+                    ok = False
+            self.stats["llm_calls"] += ledger.calls
+
+        if ok:
+            self.stats["done"] += 1
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(task["id"] + "\n")
+        else:
+            self.stats["failed"] += 1
+
+    async def run(self, tasks: List[Dict[str, Any]]) -> None:
+        # Budget samples for one route are learned in order, so its trip lengths run one after another
+        routes: Dict[str, List[Dict[str, Any]]] = {}
+        for task in tasks:
+            route = task["id"].rsplit("|", 1)[0] if task["kind"] == "budget" else task["id"]
+            routes.setdefault(route, []).append(task)
+
+        async def run_route(route_tasks):
+            for task in route_tasks:
+                await self.run_task(task)
+
+        await asyncio.gather(*(run_route(route_tasks) for route_tasks in routes.values()))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="JSON file with destinations, passports, months, origins and days")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="File of finished task ids; re-runs skip them")
+    parser.add_argument("--concurrency", type=int, default=4, help="Most LLM-backed tasks in flight at once")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and warm everything again")
+    args = parser.parse_args(argv)
+
+    if get_safety_cache() is None or get_budget_models() is None:
+        parser.error("the safety cache and budget models must be enabled (SAFETY_CACHE_ENABLED, BUDGET_MODEL_ENABLED, KNOWLEDGE_CACHE_PATH)")
+
+    with open(args.input, encoding="utf-8") as f:
+        tasks = build_tasks(json.load(f))
+    directory = os.path.dirname(args.checkpoint)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    finished = load_checkpoint(args.checkpoint)
+    pending = [task for task in tasks if task["id"] not in finished]
+
+    print(f"Pre-warming {len(pending)} of {len(tasks)} tasks ({len(tasks) - len(pending)} already in checkpoint), "
+          f"concurrency {args.concurrency}, LLM rate limiting {'on' if Config.LLM_RATE_LIMIT_ENABLED else 'OFF'}")
+    prewarmer = Prewarmer(args.concurrency, args.checkpoint)
+    start = time.perf_counter()
+    asyncio.run(prewarmer.run(pending))
+    elapsed = time.perf_counter() - start
+
+    stats = prewarmer.stats
+    print(f"{'tasks done':>16}: {stats['done']}")
+    print(f"{'tasks failed':>16}: {stats['failed']} (re-run to retry)")
+    print(f"{'LLM calls':>16}: {stats['llm_calls']}")
+    print(f"{'elapsed':>16}: {elapsed:.1f}s")
+    print(f"{'throughput':>16}: {stats['done'] / elapsed if elapsed else 0:.2f} tasks/s, "
+          f"{stats['llm_calls'] * 60 / elapsed if elapsed else 0:.1f} LLM calls/min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark: incremental itinerary parsing vs split-and-json.loads.
+
+Builds LLM-style responses (preamble, ```json fence, N-day itinerary),
+replays them as a token stream and reports, for each approach, how much
+of the stream must arrive before day 1 is available and the CPU time
+spent parsing.
+
+    python -m benchmarks.bench_json_stream --days 14 30
+"""
+import argparse
+import json
+import time
+
+from app.llm.base_llm import BaseLLM
+from app.llm.json_stream import IncrementalArrayParser
+
+CHUNK_CHARS = 4  # Roughly one token
+
+
+def recorded_response(days):
+    itinerary = [
+        {
+            "day": day,
+            "title": f"Day {day}: Old town, markets and the waterfront",
+            "morning": "Guided walking tour of the historic quarter, including the cathedral and the spice market.",
+            "afternoon": "Cooking class with a local chef, then free time to explore the {artisan} district.",
+            "evening": "Sunset cruise along the river followed by dinner at a family-run \"taverna\".",
+            "meal_suggestions": ["Cafe Central", "Mercado [food hall]", "Taverna do Rio"]
+        }
+        for day in range(1, days + 1)
+    ]
+    body = json.dumps({"itinerary": itinerary}, indent=2)
+    return f"Sure! Here is a {days}-day itinerary for your trip.\n\n```json\n{body}\n```\nEnjoy!"
+
+
+def chunks(text):
+    return [text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)]
+
+
+class Replay(BaseLLM):
+    def __init__(self, text):
+        super().__init__(api_key="bench", model="bench")
+        self.text = text
+
+    def generate(self, prompt, system_prompt=None):
+        return self.text
+
+
+def bench_split(stream, text):
+    # Current approach: wait for the whole response, then split on fences and parse
+    start = time.perf_counter()
+    result = Replay(text).parse_json(text)
+    parse = time.perf_counter() - start
+    assert len(result["itinerary"]) > 0
+    return len(stream), parse
+
+
+def bench_incremental(stream):
+    parser = IncrementalArrayParser("itinerary")
+    first_day_chunk = None
+    total = 0
+    start = time.perf_counter()
+    for index, chunk in enumerate(stream, 1):
+        items = parser.feed(chunk)
+        total += len(items)
+        if items and first_day_chunk is None:
+            first_day_chunk = index
+    parse = time.perf_counter() - start
+    return first_day_chunk, parse, total
+
+
+def main(args):
+    print(f"{'days':>4} {'chunks':>7} | {'split: day1 after':>18} {'parse ms':>9} | "
+          f"{'incremental: day1 after':>24} {'parse ms':>9}")
+    for days in args.days:
+        text = recorded_response(days)
+        stream = chunks(text)
+        split_first, split_parse = min(
+            (bench_split(stream, text) for _ in range(args.repeat)), key=lambda r: r[1])
+        inc_first, inc_parse, total = min(
+            (bench_incremental(stream) for _ in range(args.repeat)), key=lambda r: r[1])
+        assert total == days
+        print(f"{days:>4} {len(stream):>7} | {split_first:>11} chunks {split_parse * 1000:>9.3f} | "
+              f"{inc_first:>17} chunks {inc_parse * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 14, 30])
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
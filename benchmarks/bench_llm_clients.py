@@ -0,0 +1,121 @@
+"""Benchmark: fresh LLM client per agent vs the shared client registry.
+
+Runs a local stand-in for the Groq chat completions API that charges a
+fixed cost for every new connection (standing in for TCP + TLS setup),
+then times simulated /plan requests (four agent calls each) both ways.
+
+    python -m benchmarks.bench_llm_clients --plans 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from app.config import Config, LLMProvider
+from app.llm.groq_llm import GroqLLM
+from app.llm.registry import LLMClientRegistry
+
+COMPLETION = json.dumps({
+    "id": "bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "bench-model",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "{\"ok\": true}"},
+        "finish_reason": "stop"
+    }],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+}).encode()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connect_cost = 0.0
+    response_cost = 0.0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StandInHandler.connections += 1
+        time.sleep(self.connect_cost)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        time.sleep(self.response_cost)
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def plan_with_fresh_clients(base_url):
+    # Old behaviour: every agent constructs its own client and pool
+    for _ in range(4):
+        llm = GroqLLM(api_key="bench", model="bench-model", base_url=base_url)
+        await llm.agenerate("prompt", "system")
+        await llm.async_client.close()
+
+
+async def plan_with_registry(registry):
+    # Registry clients also pass through an in-memory circuit breaker, which costs no I/O
+    for _ in range(4):
+        llm = registry.get(LLMProvider.GROQ, "bench-model", 0.7, 1000)
+        await llm.agenerate("prompt", "system")
+
+
+async def measure(label, plans, make_plan):
+    StandInHandler.connections = 0
+    latencies = []
+    for _ in range(plans):
+        start = time.perf_counter()
+        await make_plan()
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<16} mean {statistics.mean(latencies):7.1f} ms  "
+          f"p50 {statistics.median(latencies):7.1f} ms  "
+          f"max {max(latencies):7.1f} ms  connections {StandInHandler.connections}")
+
+
+async def main(args):
+    StandInHandler.connect_cost = args.connect_ms / 1000
+    StandInHandler.response_cost = args.response_ms / 1000
+    server = start_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    Config.GROQ_API_KEY = "bench"
+    Config.GROQ_BASE_URL = base_url
+    # Compare connection handling only: the fresh clients have no quota to queue
+    # for, and the limiter would otherwise share ./cache/rate_limits.db with the app
+    Config.LLM_RATE_LIMIT_ENABLED = False
+    registry = LLMClientRegistry()
+
+    print(f"{args.plans} plans x 4 agent calls, connect cost {args.connect_ms} ms, "
+          f"response cost {args.response_ms} ms")
+    await measure("fresh clients", args.plans, lambda: plan_with_fresh_clients(base_url))
+    await measure("shared registry", args.plans, lambda: plan_with_registry(registry))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--connect-ms", type=float, default=30, help="simulated TCP+TLS setup cost")
+    parser.add_argument("--response-ms", type=float, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -48,6 +48,23 @@ CREATE TABLE trips (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Plan jobs table (asynchronous trip planning, see POST /plan/jobs)
+CREATE TABLE plan_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued', -- queued, running, completed, failed
+    request_data JSONB NOT NULL, -- TripRequest as submitted
+    partial_result JSONB DEFAULT '{}', -- Sections finished so far
+    result JSONB, -- TripResponse once completed
+    trip_id UUID REFERENCES trips(id) ON DELETE SET NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_expires_at TIMESTAMP WITH TIME ZONE, -- Renewed by the worker running the job
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
 -- Feedback table
 CREATE TABLE feedback (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -74,6 +91,8 @@ CREATE TABLE user_sessions (
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_trips_user_id ON trips(user_id);
 CREATE INDEX idx_trips_created_at ON trips(created_at DESC);
+CREATE INDEX idx_plan_jobs_user_id ON plan_jobs(user_id);
+CREATE INDEX idx_plan_jobs_status_created_at ON plan_jobs(status, created_at);
 CREATE INDEX idx_feedback_trip_id ON feedback(trip_id);
 CREATE INDEX idx_feedback_user_id ON feedback(user_id);
 CREATE INDEX idx_user_sessions_user_id ON user_sessions(user_id);
@@ -101,6 +120,10 @@ CREATE TRIGGER update_trips_updated_at
     BEFORE UPDATE ON trips 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_plan_jobs_updated_at 
+    BEFORE UPDATE ON plan_jobs 
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 -- Insert sample data for testing (optional)
 INSERT INTO users (email, name, password_hash) VALUES 
 ('demo@example.com', 'Demo User', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewsqyxoJ5DXBpHpS'); -- password: "demo123"
@@ -147,11 +147,13 @@ def init_session_state():
 init_session_state()
 
 # Helper Functions
-def make_api_request(endpoint, method="GET", data=None, auth_required=True):
+def make_api_request(endpoint, method="GET", data=None, auth_required=True, extra_headers=None):
     """Make API request to backend"""
     headers = {"Content-Type": "application/json"}
     if auth_required and st.session_state.access_token:
         headers["Authorization"] = f"Bearer {st.session_state.access_token}"
+    if extra_headers:
+        headers.update(extra_headers)
     
     url = f"{BACKEND_URL}{endpoint}"
     try:
@@ -164,6 +166,30 @@ def make_api_request(endpoint, method="GET", data=None, auth_required=True):
         st.error(f"Connection error: {str(e)}")
         return None
 
+PLAN_JOB_POLL_SECONDS = 2
+PLAN_JOB_MAX_WAIT_SECONDS = 600
+
+def wait_for_plan_job(job_id):
+    """Poll a queued trip plan until it finishes; returns the plan or None"""
+    progress = st.empty()
+    started = time.time()
+    while time.time() - started < PLAN_JOB_MAX_WAIT_SECONDS:
+        response = make_api_request(f"/plan/jobs/{job_id}")
+        if response is None or response.status_code != 200:
+            return None
+        job = response.json()
+        if job["status"] == "completed":
+            progress.empty()
+            return job["result"]
+        if job["status"] == "failed":
+            progress.empty()
+            return None
+        done = ", ".join(section.replace("_", " ") for section in job["sections"]) or "none yet"
+        progress.caption(f"⏳ Status: {job['status']} — sections ready: {done}")
+        time.sleep(PLAN_JOB_POLL_SECONDS)
+    progress.empty()
+    return None
+
 def login_user(email, password):
     """Login user"""
     try:
@@ -630,6 +656,11 @@ def render_trip_planning():
              "wildlife", "shopping", "nightlife", "relaxation", "photography"],
             default=["culture", "food"])
         
+        fresh = False
+        if st.session_state.guest_mode:
+            fresh = st.checkbox("🔄 Generate a fresh plan", value=False,
+                                help="Guests may get a recent plan made for the same trip; tick this to always plan anew")
+        
         submitted = st.form_submit_button("🚀 Generate Trip Plan", use_container_width=True)
         
         if submitted:
@@ -652,14 +683,30 @@ def render_trip_planning():
                     # Store request for PDF
                     st.session_state.current_trip_request = trip_request
                     
-                    # API call
-                    endpoint = "/plan-guest" if st.session_state.guest_mode else "/plan"
-                    response = make_api_request(endpoint, "POST", trip_request, 
-                                              auth_required=not st.session_state.guest_mode)
+                    # One key per submission: resubmitting the same form after a timeout
+                    # or double click picks up the plan already being generated
+                    pending = st.session_state.get("pending_plan_submission")
+                    if not pending or pending["request"] != trip_request or pending.get("fresh") != fresh:
+                        pending = {"request": trip_request, "fresh": fresh, "key": str(uuid.uuid4())}
+                        st.session_state.pending_plan_submission = pending
                     
-                    if response and response.status_code == 200:
-                        plan = response.json()
+                    # API call: members queue a background job and poll it, guests wait for the plan
+                    plan = None
+                    headers = {"Idempotency-Key": pending["key"]}
+                    if st.session_state.guest_mode:
+                        endpoint = "/plan-guest?fresh=true" if fresh else "/plan-guest"
+                        response = make_api_request(endpoint, "POST", trip_request,
+                                                  auth_required=False, extra_headers=headers)
+                        if response and response.status_code == 200:
+                            plan = response.json()
+                    else:
+                        response = make_api_request("/plan/jobs", "POST", trip_request, extra_headers=headers)
+                        if response and response.status_code == 202:
+                            plan = wait_for_plan_job(response.json()["job_id"])
+                    
+                    if plan:
                         st.session_state.current_trip_plan = plan
+                        st.session_state.pending_plan_submission = None  # Next submission is a new plan
                         
                         # Save to guest trips if in guest mode
                         if st.session_state.guest_mode:
@@ -718,6 +765,11 @@ def display_trip_plan():
                     use_container_width=True
                 )
     
+    # Sections the backend had to fill with generic suggestions (slow or unavailable AI)
+    if plan.get('degraded_sections'):
+        sections = ", ".join(section.replace('_', ' ') for section in plan['degraded_sections'])
+        st.warning(f"⚠️ Some sections use general suggestions because the AI was slow or unavailable: {sections}")
+    
     # Summary metrics
     col1, col2, col3 = st.columns(3)
     
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.config import Config
+from app.main import app, limiter
+from app.auth.routes import get_current_user
+from app.database import get_db
+from app.llm import breaker, rate_limit
+from app.llm.base_llm import BaseLLM
+from app.llm.registry import registry
+
+PLAN_PAYLOAD = {
+    "traveler_name": "Alex",
+    "origin_city": "Hyderabad",
+    "days": 3,
+    "month": "June",
+    "budget_total": 900,
+    "interests": ["beach", "food"],
+    "visa_passport": "Indian"
+}
+
+
+class FakeTripLLM(BaseLLM):
+    """Fake provider answering each agent's prompt after ``delay`` seconds"""
+
+    def __init__(self, delay=0.0):
+        super().__init__(api_key="test", model="fake")
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    def generate(self, prompt, system_prompt=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.respond(prompt, system_prompt)
+
+    async def agenerate(self, prompt, system_prompt=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.respond(prompt, system_prompt)
+
+    def respond(self, prompt, system_prompt):
+        if "itinerary expert" in system_prompt:
+            return json.dumps({"itinerary": [{"day": 1, "title": "Arrival"}]})
+        if "budget expert" in system_prompt:
+            return json.dumps({"breakdown": {"flights": 300}, "total": 300})
+        if "safety expert" in system_prompt:
+            return json.dumps({"safety_level": "Low", "safety_tips": ["Stay hydrated"]})
+        return json.dumps({"destination": "Goa, India", "reason": "Beaches"})
+
+
+@pytest.fixture(autouse=True)
+def no_shared_knowledge(monkeypatch):
+    """Keep the on-disk destination knowledge caches out of tests unless a test opts in"""
+    monkeypatch.setattr(Config, "SAFETY_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "BUDGET_MODEL_ENABLED", False)
+    monkeypatch.setattr(Config, "GUEST_PLAN_CACHE_ENABLED", False)
+
+
+@pytest.fixture
+def llm_stack(monkeypatch):
+    """Fake provider behind the real client stack agents get from get_llm_client.
+
+    Only the provider is faked: calls still go through CachedLLM's
+    single-flight, the circuit breaker and a (fresh, in-memory) rate limiter.
+    """
+    provider = FakeTripLLM()
+    monkeypatch.setattr(Config, "LLM_PROVIDER", "groq")
+    monkeypatch.setattr(Config, "GROQ_API_KEY", "test")
+    monkeypatch.setattr(Config, "GEMINI_API_KEY", None)
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "LLM_RATE_LIMIT_PATH", "")
+    monkeypatch.setattr(rate_limit, "_store", None)
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    monkeypatch.setattr(breaker, "_breakers", {})
+    monkeypatch.setattr(registry, "_create", lambda *args: provider)
+    registry.clear()
+    yield provider
+    registry.clear()
+
+
+class FakeUser:
+    id = "00000000-0000-0000-0000-000000000001"
+    name = "Test User"
+    email = "test@example.com"
+
+
+class FakeSession:
+    def __init__(self):
+        self.added = []
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def refresh(self, obj):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    """Run the app against a fake LLM, a fake user and an in-memory session"""
+    llm = FakeTripLLM()
+    session = FakeSession()
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+    monkeypatch.setattr("app.main.SessionLocal", lambda: session)
+    monkeypatch.setattr(limiter, "enabled", False)
+    app.dependency_overrides[get_current_user] = lambda: FakeUser()
+    app.dependency_overrides[get_db] = lambda: session
+    yield llm, session
+    app.dependency_overrides.clear()
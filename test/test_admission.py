@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.admission import AdmissionController, Overloaded
+from app.main import app
+from conftest import PLAN_PAYLOAD
+
+client = TestClient(app)
+
+
+def test_requests_beyond_capacity_wait_in_order():
+    controller = AdmissionController(max_concurrent=1, max_queue_wait=60, initial_service_time=1)
+    order = []
+
+    async def request(name):
+        async with controller.slot():
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(request(n) for n in range(4)))
+
+    asyncio.run(main())
+    assert order == [0, 1, 2, 3]
+    assert controller.in_flight == 0 and not controller.waiters
+
+
+def test_fails_fast_when_estimated_wait_too_long():
+    controller = AdmissionController(max_concurrent=2, max_queue_wait=10, initial_service_time=8)
+
+    async def main():
+        await controller.acquire()
+        await controller.acquire()
+        queued = asyncio.create_task(controller.acquire())  # Waits ~4s: accepted
+        await asyncio.sleep(0)
+        assert controller.estimated_wait() == pytest.approx(8.0)
+        controller.max_queue_wait = 5
+        with pytest.raises(Overloaded) as error:
+            await controller.acquire()
+        queued.cancel()
+        return error.value
+
+    assert asyncio.run(main()).retry_after == pytest.approx(8.0)
+
+
+def test_cancelled_waiter_leaves_queue():
+    controller = AdmissionController(max_concurrent=1, max_queue_wait=60, initial_service_time=1)
+
+    async def main():
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        controller.release()
+
+    asyncio.run(main())
+    assert controller.in_flight == 0 and not controller.waiters
+
+
+def test_overloaded_endpoint_returns_503_with_retry_after(fake_backend, monkeypatch):
+    busy = AdmissionController(max_concurrent=1, max_queue_wait=5, initial_service_time=30)
+    busy.in_flight = 1
+    monkeypatch.setattr("app.main.admission", busy)
+
+    response = client.post("/plan-guest", json=PLAN_PAYLOAD)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+
+    assert client.post("/plan/stream", json=PLAN_PAYLOAD).status_code == 503
+    assert client.get("/health").json()["llm_load"]["in_flight"] == 1
+
+
+def test_slot_released_after_plan(fake_backend, monkeypatch):
+    controller = AdmissionController(max_concurrent=2, max_queue_wait=30, initial_service_time=1)
+    monkeypatch.setattr("app.main.admission", controller)
+
+    assert client.post("/plan-guest", json=PLAN_PAYLOAD).status_code == 200
+    assert client.post("/plan/stream", json=PLAN_PAYLOAD).status_code == 200
+    assert controller.in_flight == 0
+
+
+def serve_order(controller, requests):
+    """Queue ``requests`` of (job_class, principal) behind one running request and return serve order"""
+    order = []
+
+    async def request(index, job_class, principal):
+        async with controller.slot(job_class, principal):
+            order.append(index)
+
+    async def main():
+        await controller.acquire()
+        tasks = [asyncio.create_task(request(i, *r)) for i, r in enumerate(requests)]
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    return order
+
+
+def test_burst_from_one_principal_does_not_starve_others():
+    controller = AdmissionController(max_concurrent=1, max_queue_wait=600, initial_service_time=1,
+                                     weights={"plan": 1})
+    requests = [("plan", "user:heavy")] * 5 + [("plan", "user:light")]
+
+    order = serve_order(controller, requests)
+
+    assert order.index(5) <= 1
+
+
+def test_member_chat_overtakes_guest_plans():
+    controller = AdmissionController(max_concurrent=1, max_queue_wait=600, initial_service_time=1,
+                                     weights={"chat": 4, "guest_plan": 1})
+    requests = [("guest_plan", f"ip:{n}") for n in range(3)] + [("chat", "user:1")]
+
+    order = serve_order(controller, requests)
+
+    assert order[0] == 3
+    classes = controller.get_stats()["classes"]
+    assert classes["chat"]["admitted"] == 1 and classes["guest_plan"]["admitted"] == 3
@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+import httpx
+
+from app.main import app
+from conftest import PLAN_PAYLOAD
+
+PROVIDER_DELAY = 0.3
+
+
+def test_concurrent_plans_do_not_block_event_loop(fake_backend):
+    llm, _ = fake_backend
+    llm.delay = PROVIDER_DELAY
+
+    async def run(n):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[client.post("/plan", json=PLAN_PAYLOAD) for _ in range(n)])
+            return responses, time.perf_counter() - start
+
+    single, single_elapsed = asyncio.run(run(1))
+    many, many_elapsed = asyncio.run(run(5))
+
+    assert all(r.status_code == 200 for r in single + many)
+    assert many[0].json()["destination"] == "Goa, India"
+    # Five concurrent plans should take about as long as one, not five times as long
+    assert many_elapsed < single_elapsed * 2
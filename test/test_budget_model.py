@@ -0,0 +1,106 @@
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app.knowledge as knowledge
+from app.agents.budget_agent import BudgetAgent
+from app.cache import SQLiteCache
+from app.config import Config
+from app.knowledge import BudgetModelCache
+from conftest import PLAN_PAYLOAD, FakeTripLLM
+
+ROUTE = ("Hyderabad", "Goa, India", "June")
+
+
+def breakdown(days, noise=0):
+    return {"breakdown": {"flights": 300, "accommodation": 80 * days + noise, "food": 30 * days}, "budget_tips": ["Go early"]}
+
+
+@pytest.fixture
+def models():
+    return BudgetModelCache(SQLiteCache(":memory:", table="budget_models"), ttl=60)
+
+
+def test_rescales_fixed_and_per_day_costs(models):
+    for days in (3, 7, 10):
+        models.observe(*ROUTE, days, breakdown(days))
+
+    estimate = models.estimate("hyderabad", "goa", "june", 5)
+
+    assert estimate["breakdown"] == {"flights": 300, "accommodation": 400, "food": 150}
+    assert estimate["total"] == 850
+    assert estimate["daily_average"] == 170
+    assert estimate["budget_tips"] == ["Go early"]
+
+
+def test_low_confidence_falls_back(models):
+    models.observe(*ROUTE, 3, breakdown(3))
+    assert models.estimate(*ROUTE, 3) is None  # A single sample
+
+    models.observe(*ROUTE, 7, breakdown(7, noise=900))
+    assert models.estimate(*ROUTE, 5) is None  # Two trip lengths fit any line exactly
+
+    models.observe(*ROUTE, 10, breakdown(10))
+    assert models.estimate(*ROUTE, 5) is None  # Samples don't fit a line
+
+    models.observe(*ROUTE, 7, breakdown(7))
+    assert models.estimate(*ROUTE, 30) is None  # Too far beyond the trips seen
+    assert models.get_stats()["hit_rate"] == 0.0
+
+
+def test_stale_samples_are_ignored(models, monkeypatch):
+    for days in (3, 7, 10):
+        models.observe(*ROUTE, days, breakdown(days))
+    monkeypatch.setattr(knowledge.time, "time", lambda: 10 ** 10)
+
+    assert models.estimate(*ROUTE, 5) is None
+
+
+def test_non_numeric_answers_are_not_learned(models):
+    models.observe(*ROUTE, 3, {"breakdown": {"flights": "about 300"}})
+    assert models.samples(*ROUTE) == []
+
+
+class DayPricedLLM(FakeTripLLM):
+    def respond(self, prompt, system_prompt):
+        days = int(re.search(r"a (\d+)-day trip", prompt).group(1))
+        return json.dumps(breakdown(days))
+
+
+def test_agent_answers_from_model_once_confident(models, monkeypatch):
+    llm = DayPricedLLM()
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+    monkeypatch.setattr(Config, "BUDGET_MODEL_ENABLED", True)
+    monkeypatch.setattr(knowledge, "_budget_models", models)
+    agent = BudgetAgent()
+
+    for days in (3, 7, 10, 5):
+        result = asyncio.run(agent.process(dict(PLAN_PAYLOAD, destination="Goa, India", days=days)))
+
+    assert llm.calls == 3
+    assert result["total"] == 850
+    assert not agent.degraded
+
+
+def test_repeated_trip_length_is_not_confidence(models):
+    for _ in range(3):
+        models.observe(*ROUTE, 5, breakdown(5))
+
+    assert len(models.samples(*ROUTE)) == 1
+    assert models.estimate(*ROUTE, 5) is None  # Three identical answers fit any line
+
+
+def test_concurrent_workers_keep_every_sample(tmp_path):
+    path = str(tmp_path / "knowledge.db")
+    workers = [BudgetModelCache(SQLiteCache(path, table="budget_models"), ttl=60, max_samples=20) for _ in range(4)]
+
+    def observe(worker, days):
+        worker.observe(*ROUTE, days, breakdown(days))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(observe, workers * 4, range(1, 17)))
+
+    assert sorted(sample["days"] for sample in workers[0].samples(*ROUTE)) == list(range(1, 17))
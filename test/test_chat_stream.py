@@ -0,0 +1,56 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app, limiter
+from app.llm.base_llm import BaseLLM
+
+client = TestClient(app)
+
+
+class StreamingFakeLLM(BaseLLM):
+    def __init__(self, tokens=None, error=None):
+        super().__init__(api_key="test", model="fake")
+        self.tokens = tokens or []
+        self.error = error
+
+    def generate(self, prompt, system_prompt=None):
+        return "".join(self.tokens)
+
+    async def agenerate_stream(self, prompt, system_prompt=None):
+        for token in self.tokens:
+            yield token
+        if self.error:
+            raise self.error
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines.get("event", "message"), json.loads(lines["data"])))
+    return events
+
+
+def test_guest_chat_stream_emits_tokens_then_done(monkeypatch):
+    monkeypatch.setattr(limiter, "enabled", False)
+    monkeypatch.setattr("app.main.get_llm_client", lambda: StreamingFakeLLM(["Pack ", "light", "!"]))
+
+    response = client.post("/chat-guest/stream", json={"message": "What should I pack?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    assert "".join(data["token"] for event, data in events if event == "message") == "Pack light!"
+    assert events[-1] == ("done", {"agent": "🤖 AI Travel Assistant"})
+
+
+def test_guest_chat_stream_falls_back_when_provider_fails(monkeypatch):
+    monkeypatch.setattr(limiter, "enabled", False)
+    monkeypatch.setattr("app.main.get_llm_client", lambda: StreamingFakeLLM(error=RuntimeError("down")))
+
+    response = client.post("/chat-guest/stream", json={"message": "Is Bali safe?"})
+
+    events = parse_events(response.text)
+    assert "technical difficulties" in events[0][1]["token"]
+    assert events[-1] == ("done", {"agent": "🤖 Travel Assistant"})
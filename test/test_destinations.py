@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+import pytest
+
+from app.agents.destination_agent import DestinationAgent
+from app.destinations import canonicalize, display_name, same_destination
+from conftest import PLAN_PAYLOAD, FakeTripLLM
+
+
+@pytest.mark.parametrize("text", ["Bali", "bali, indonesia", "Bali, Indonesia ", "Denpasar, Bali", "BÁLI", "Bali Indonesia"])
+def test_spellings_resolve_to_one_destination(text):
+    assert canonicalize(text) == "bali"
+    assert display_name(text) == "Bali, Indonesia"
+
+
+def test_country_synonyms_qualify_known_places():
+    assert canonicalize("London, United Kingdom") == canonicalize("London, UK")
+    assert same_destination("Lisboa", "Lisbon, Portugal")
+
+
+@pytest.mark.parametrize("text, elsewhere", [
+    ("Paris, Texas", "Paris, France"),
+    ("London, Ontario", "London, UK"),
+    ("Sydney, Nova Scotia, Canada", "Sydney, Australia"),
+    ("Paris Texas", "Paris"),
+])
+def test_same_name_cities_elsewhere_stay_distinct(text, elsewhere):
+    assert not same_destination(text, elsewhere)
+    assert display_name(text) == text
+
+
+def test_unknown_places_keep_their_whole_name():
+    assert canonicalize("Hoi An, Vietnam") == "hoi an, vietnam"
+    assert canonicalize("Tbilisi, Georgia") != canonicalize("Tbilisi, Chile")
+    assert display_name(" Hoi An, Vietnam") == "Hoi An, Vietnam"
+
+
+class TexasLLM(FakeTripLLM):
+    def respond(self, prompt, system_prompt):
+        return json.dumps({"destination": "Paris, Texas", "reason": "Small-town charm"})
+
+
+def test_agent_keeps_the_destination_it_validated(monkeypatch):
+    llm = TexasLLM()
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+
+    result = asyncio.run(DestinationAgent().process(dict(PLAN_PAYLOAD, preferred_destination="Paris, Texas")))
+
+    assert result["destination"] == "Paris, Texas"
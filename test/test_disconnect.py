@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+import app.main as main
+from app.agents.orchestrator import plan_trip
+from app.llm.breaker import BreakerLLM, CircuitBreaker
+from app.main import ClientDisconnected, TripRequest, stream_plan_events, unless_disconnected
+from app.metrics import metrics
+from conftest import PLAN_PAYLOAD, FakeTripLLM
+
+
+class FakeRequest:
+    """Request whose client disconnects after ``polls`` checks"""
+
+    def __init__(self, polls=1):
+        self.polls = polls
+
+    async def is_disconnected(self):
+        self.polls -= 1
+        return self.polls < 0
+
+
+def upstream(delay):
+    # Wrapped like registry clients so upstream calls are counted
+    return BreakerLLM(FakeTripLLM(delay=delay), CircuitBreaker("fake", failure_threshold=100))
+
+
+def test_disconnect_cancels_plan_and_counts_wasted_calls(monkeypatch):
+    metrics.reset()
+    monkeypatch.setattr(main, "DISCONNECT_POLL_SECONDS", 0.02)
+    llm = upstream(delay=5)
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+
+    async def run():
+        task_count = len(asyncio.all_tasks())
+        with pytest.raises(ClientDisconnected):
+            await unless_disconnected(FakeRequest(polls=1), plan_trip(dict(PLAN_PAYLOAD)), "trip planning")
+        await asyncio.sleep(0.01)
+        return len(asyncio.all_tasks()) - task_count
+
+    assert asyncio.run(run()) == 0  # Agent tasks were cancelled, not left running
+    assert metrics.get("client_disconnects") == 1
+    assert metrics.get("llm_calls_wasted") >= 1
+
+
+def test_disconnect_cancels_upstream_calls_through_client_stack(llm_stack, monkeypatch):
+    metrics.reset()
+    monkeypatch.setattr(main, "DISCONNECT_POLL_SECONDS", 0.02)
+    llm_stack.delay = 5
+
+    async def run():
+        with pytest.raises(ClientDisconnected):
+            await unless_disconnected(FakeRequest(polls=1), plan_trip(dict(PLAN_PAYLOAD)), "trip planning")
+        await asyncio.sleep(0.01)
+        # Checked before asyncio.run cancels whatever is left at shutdown
+        return llm_stack.cancelled
+
+    cancelled = asyncio.run(run())
+    # Single-flight must not keep the provider call alive once its only caller is gone
+    assert llm_stack.calls >= 1
+    assert cancelled == llm_stack.calls
+    assert metrics.get("llm_calls_wasted") == llm_stack.calls
+
+
+def test_connected_client_gets_result(monkeypatch):
+    monkeypatch.setattr(main, "DISCONNECT_POLL_SECONDS", 0.01)
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "plan"
+
+    assert asyncio.run(unless_disconnected(FakeRequest(polls=100), work(), "test")) == "plan"
+
+
+def test_abandoned_plan_stream_is_not_saved(fake_backend, monkeypatch):
+    _, session = fake_backend
+    metrics.reset()
+    llm = upstream(delay=0.05)
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+    trip_request = TripRequest(**PLAN_PAYLOAD)
+
+    async def run():
+        events = stream_plan_events(trip_request.dict(), trip_request, "user-1", "test@example.com")
+        first = await events.__anext__()
+        await events.aclose()  # What the server does when the client goes away
+        await asyncio.sleep(0.2)
+        return first
+
+    assert "destination_info" in asyncio.run(run())
+    assert session.added == []
+    assert metrics.get("client_disconnects") == 1
+    assert metrics.get("llm_calls_wasted") >= 1
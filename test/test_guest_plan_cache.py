@@ -0,0 +1,83 @@
+import asyncio
+import json
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.plan_cache as plan_cache
+from app.cache import MemoryCache, TieredCache
+from app.config import Config
+from app.main import app
+from app.plan_cache import GuestPlanCache, plan_key
+from conftest import PLAN_PAYLOAD, FakeTripLLM
+
+
+class PersonalLLM(FakeTripLLM):
+    """Records prompts and answers with the month, as the real destination answers do"""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def respond(self, prompt, system_prompt):
+        self.prompts.append(prompt)
+        if "destination expert" in system_prompt:
+            month = re.search(r"Month: (.+)", prompt).group(1).strip()
+            return json.dumps({"destination": "Goa, India", "reason": f"Quiet beaches in {month}"})
+        if "itinerary expert" in system_prompt:
+            return json.dumps({"itinerary": [{"day": day, "title": f"Day {day}"} for day in range(1, 4)]})
+        return super().respond(prompt, system_prompt)
+
+
+@pytest.fixture
+def guest_plans(fake_backend, monkeypatch):
+    llm = PersonalLLM()
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+    monkeypatch.setattr(Config, "GUEST_PLAN_CACHE_ENABLED", True)
+    monkeypatch.setattr(plan_cache, "_guest_plan_cache", GuestPlanCache(TieredCache(MemoryCache(10)), ttl=60))
+    return llm
+
+
+def test_same_trip_for_another_guest_is_served_from_cache(guest_plans):
+    client = TestClient(app)
+    first = client.post("/plan-guest", json=PLAN_PAYLOAD).json()
+    calls = guest_plans.calls
+
+    second = client.post("/plan-guest", json=dict(PLAN_PAYLOAD, traveler_name="Sam")).json()
+
+    assert guest_plans.calls == calls
+    assert second == first
+    assert not any("Alex" in prompt for prompt in guest_plans.prompts)
+
+
+def test_name_that_appears_in_the_plan_is_left_alone(guest_plans):
+    # A guest called June travelling in June used to get every "June" rewritten
+    client = TestClient(app)
+    first = client.post("/plan-guest", json=dict(PLAN_PAYLOAD, traveler_name="June")).json()
+    second = client.post("/plan-guest", json=dict(PLAN_PAYLOAD, traveler_name="Al")).json()
+
+    assert first["destination_info"]["reason"] == "Quiet beaches in June"
+    assert second["destination_info"]["reason"] == "Quiet beaches in June"
+
+
+def test_fresh_plan_skips_cache(guest_plans):
+    client = TestClient(app)
+    client.post("/plan-guest", json=PLAN_PAYLOAD)
+    calls = guest_plans.calls
+
+    client.post("/plan-guest", params={"fresh": "true"}, json=PLAN_PAYLOAD)
+
+    assert guest_plans.calls == 2 * calls
+
+
+def test_key_ignores_name_and_formatting():
+    reordered = dict(PLAN_PAYLOAD, traveler_name="Sam", interests=["Food", "beach"], month=" june ", origin_city="hyderabad")
+    assert plan_key(reordered) == plan_key(PLAN_PAYLOAD)
+    assert plan_key(dict(PLAN_PAYLOAD, days=4)) != plan_key(PLAN_PAYLOAD)
+
+
+def test_degraded_plans_are_not_cached():
+    cache = GuestPlanCache(TieredCache(MemoryCache(10)), ttl=60)
+    asyncio.run(cache.aset(PLAN_PAYLOAD, {"destination": "Goa, India", "degraded_sections": ["safety_info"]}))
+    assert asyncio.run(cache.aget(PLAN_PAYLOAD)) is None
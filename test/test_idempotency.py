@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+
+import app.idempotency as idempotency
+from app.cache import MemoryCache, SQLiteCache, TieredCache
+from app.idempotency import IdempotencyStore
+from app.main import app
+from conftest import PLAN_PAYLOAD
+
+
+def memory_store(monkeypatch):
+    store = IdempotencyStore(TieredCache(MemoryCache(100), None), ttl=60)
+    monkeypatch.setattr(idempotency, "_store", store)
+    return store
+
+
+def post_concurrently(path, bodies, key):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post(path, json=body, headers={"Idempotency-Key": key}) for body in bodies
+            ])
+    return asyncio.run(run())
+
+
+def test_concurrent_repeats_share_one_plan(fake_backend, monkeypatch):
+    llm, _ = fake_backend
+    memory_store(monkeypatch)
+    llm.delay = 0.05
+
+    first, second = post_concurrently("/plan-guest", [PLAN_PAYLOAD, PLAN_PAYLOAD], "submit-1")
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert llm.calls == 4  # One run of the four agents
+
+
+def test_repeat_after_completion_replays_and_saves_once(fake_backend, monkeypatch):
+    llm, session = fake_backend
+    memory_store(monkeypatch)
+
+    first, = post_concurrently("/plan", [PLAN_PAYLOAD], "submit-2")
+    calls = llm.calls
+    second, = post_concurrently("/plan", [PLAN_PAYLOAD], "submit-2")
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert llm.calls == calls
+    assert len(session.added) == 1
+
+
+def test_key_reused_for_different_request_is_rejected(fake_backend, monkeypatch):
+    memory_store(monkeypatch)
+
+    post_concurrently("/plan-guest", [PLAN_PAYLOAD], "submit-3")
+    response, = post_concurrently("/plan-guest", [dict(PLAN_PAYLOAD, days=5)], "submit-3")
+
+    assert response.status_code == 422
+
+
+def test_requests_without_key_are_not_deduplicated(fake_backend, monkeypatch):
+    llm, _ = fake_backend
+    memory_store(monkeypatch)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for _ in range(2):
+                await client.post("/plan-guest", json=PLAN_PAYLOAD)
+    asyncio.run(run())
+
+    assert llm.calls == 8
+
+
+def test_result_is_replayed_by_another_worker(fake_backend, monkeypatch, tmp_path):
+    llm, _ = fake_backend
+    path = str(tmp_path / "idempotency.db")
+    monkeypatch.setattr(idempotency, "_store", IdempotencyStore(TieredCache(MemoryCache(100), SQLiteCache(path)), ttl=60))
+
+    first, = post_concurrently("/plan-guest", [PLAN_PAYLOAD], "submit-4")
+    calls = llm.calls
+    monkeypatch.setattr(idempotency, "_store", IdempotencyStore(TieredCache(MemoryCache(100), SQLiteCache(path)), ttl=60))
+    second, = post_concurrently("/plan-guest", [PLAN_PAYLOAD], "submit-4")
+
+    assert second.json() == first.json()
+    assert llm.calls == calls
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import re
+
+from app.agents.itinerary_agent import ItineraryAgent
+from app.config import Config
+from app.llm.base_llm import BaseLLM
+
+MAX_DAYS_PER_CALL = 6  # Stand-in for MAX_TOKENS: longer responses get cut off
+
+
+class TokenLimitedLLM(BaseLLM):
+    def __init__(self):
+        super().__init__(api_key="test", model="fake")
+        self.prompts = []
+
+    def generate(self, prompt, system_prompt=None):
+        self.prompts.append(prompt)
+        if "outline" in system_prompt:
+            days = int(re.search(r"(\d+)-day trip", prompt).group(1))
+            return json.dumps({"outline": [{"day": d, "theme": f"Theme {d}"} for d in range(1, days + 1)]})
+
+        match = re.search(r"Create days (\d+) to (\d+)", prompt)
+        if match:
+            first, last = int(match.group(1)), int(match.group(2))
+        else:
+            first, last = 1, int(re.search(r"Create a (\d+)-day", prompt).group(1))
+        itinerary = [{"day": d, "title": f"Sightseeing {d}", "morning": "Museum"} for d in range(first, last + 1)]
+        text = json.dumps({"itinerary": itinerary})
+        if last - first + 1 > MAX_DAYS_PER_CALL:
+            text = text[:len(text) * MAX_DAYS_PER_CALL // (last - first + 1)]  # Truncated output
+        return text
+
+
+def plan(days, monkeypatch, chunk_days=5):
+    monkeypatch.setattr(Config, "ITINERARY_CHUNK_DAYS", chunk_days)
+    llm = TokenLimitedLLM()
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+    context = {"days": days, "destination": "Lisbon, Portugal", "interests": ["food"],
+               "month": "May", "budget_total": 3000}
+    return asyncio.run(ItineraryAgent().process(context)), llm
+
+
+def test_thirty_day_trip_gets_thirty_valid_days(monkeypatch):
+    itinerary, llm = plan(30, monkeypatch)
+
+    assert [day["day"] for day in itinerary] == list(range(1, 31))
+    assert all(day["title"].startswith("Sightseeing") for day in itinerary)
+    # One outline call plus six chunks, each sharing the outline
+    assert len(llm.prompts) == 7
+    assert all("Theme 30" in prompt for prompt in llm.prompts[1:])
+
+
+def test_truncated_single_call_is_padded_with_fallback_days(monkeypatch):
+    itinerary, _ = plan(10, monkeypatch, chunk_days=30)
+
+    assert [day["day"] for day in itinerary] == list(range(1, 11))
+    assert itinerary[-1]["title"] == "Day 10"
+
+
+class ChattyLLM(BaseLLM):
+    """Leaves a brace and a quote open in its preamble, which throws off the streaming parser"""
+
+    def generate(self, prompt, system_prompt=None):
+        itinerary = [{"day": d, "title": f"Sightseeing {d}"} for d in range(1, 4)]
+        return 'Here is the plan {v2, "final draft:\n```json\n' + json.dumps({"itinerary": itinerary}) + "\n```"
+
+
+def test_response_the_stream_parser_misses_is_parsed_whole(monkeypatch):
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: ChattyLLM(api_key="test", model="fake"))
+    agent = ItineraryAgent()
+    context = {"days": 3, "destination": "Lisbon, Portugal", "interests": ["food"], "month": "May", "budget_total": 900}
+
+    itinerary = asyncio.run(agent.process(context))
+
+    assert [day["title"] for day in itinerary] == ["Sightseeing 1", "Sightseeing 2", "Sightseeing 3"]
+    assert not agent.degraded
@@ -0,0 +1,43 @@
+import json
+
+from app.llm.json_stream import IncrementalArrayParser, iter_array_items
+
+DAYS = [
+    {"day": 1, "title": "Arrival {and} \"check-in\"", "meal_suggestions": ["Cafe [1]"]},
+    {"day": 2, "title": "Temples", "meal_suggestions": []},
+]
+
+RESPONSE = "Here is your plan:\n```json\n" + json.dumps({"itinerary": DAYS, "notes": [{"x": 1}]}, indent=2) + "\n```"
+
+
+def test_yields_each_day_when_its_closing_brace_arrives():
+    parser = IncrementalArrayParser("itinerary")
+    first_day_end = RESPONSE.index("}", RESPONSE.index('"Cafe [1]"')) + 1
+
+    assert parser.feed(RESPONSE[:first_day_end - 1]) == []
+    assert parser.feed(RESPONSE[first_day_end - 1:first_day_end]) == [DAYS[0]]
+    assert parser.feed(RESPONSE[first_day_end:]) == [DAYS[1]]
+
+
+def test_single_character_chunks_match_full_parse():
+    assert list(iter_array_items(iter(RESPONSE), "itinerary")) == DAYS
+
+
+def test_bare_array_and_truncated_output():
+    truncated = json.dumps(DAYS)[:-20]
+
+    assert list(iter_array_items([json.dumps(DAYS)], "itinerary")) == DAYS
+    assert list(iter_array_items([truncated], "itinerary")) == DAYS[:1]
+
+
+def test_bracketed_preamble_is_skipped():
+    response = "Here is your [3-day] plan:\n```json\n" + json.dumps({"itinerary": DAYS}) + "\n```"
+
+    assert list(iter_array_items(iter(response), "itinerary")) == DAYS
+    assert list(iter_array_items([response], "itinerary")) == DAYS
+
+
+def test_unclosed_bracket_before_fence_is_abandoned():
+    response = "Plan (see [notes below:\n```json\n" + json.dumps({"itinerary": DAYS}) + "\n```"
+
+    assert list(iter_array_items([response], "itinerary")) == DAYS
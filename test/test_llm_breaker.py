@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+
+from app.agents.safety_agent import SafetyAgent
+from app.deadline import deadline, remaining
+from app.llm.base_llm import BaseLLM
+from app.llm.breaker import CLOSED, HALF_OPEN, OPEN, BreakerLLM, CircuitBreaker, CircuitOpenError
+from app.llm.router import RouterLLM
+from app.metrics import metrics
+
+
+class FlakyLLM(BaseLLM):
+    def __init__(self, name="flaky", fail=True, delay=0.0):
+        super().__init__(api_key="test", model=name)
+        self.fail = fail
+        self.delay = delay
+        self.calls = 0
+
+    def generate(self, prompt, system_prompt=None):
+        return self.model
+
+    async def agenerate(self, prompt, system_prompt=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("provider down")
+        return '{"safety_tips": ["ok"], "safety_level": "Low"}'
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    metrics.reset()
+    inner = FlakyLLM()
+    llm = BreakerLLM(inner, CircuitBreaker("test", failure_threshold=3, recovery_timeout=60))
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            asyncio.run(llm.agenerate("prompt"))
+    assert llm.breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(llm.agenerate("prompt"))
+    assert inner.calls == 3
+    assert metrics.get("breaker_test_to_open") == 1
+    assert metrics.get("breaker_test_rejected") == 1
+
+
+def test_half_open_trial_closes_or_reopens():
+    breaker = CircuitBreaker("trial", failure_threshold=1, recovery_timeout=0.01)
+    inner = FlakyLLM()
+    llm = BreakerLLM(inner, breaker)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(llm.agenerate("prompt"))
+    time.sleep(0.02)
+    with pytest.raises(RuntimeError):
+        asyncio.run(llm.agenerate("prompt"))  # Trial call fails: straight back to open
+    assert breaker.state == OPEN
+
+    time.sleep(0.02)
+    inner.fail = False
+    asyncio.run(llm.agenerate("prompt"))
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_half_open_allows_limited_trials():
+    breaker = CircuitBreaker("limited", failure_threshold=1, recovery_timeout=0, half_open_calls=1)
+    breaker.record_failure()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_agent_uses_fallback_instantly_while_open(monkeypatch):
+    breaker = CircuitBreaker("agent", failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    inner = FlakyLLM(fail=False, delay=1.0)
+    llm = BreakerLLM(inner, breaker)
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+    agent = SafetyAgent()
+
+    start = time.perf_counter()
+    result = asyncio.run(agent.process({"destination": "Goa", "visa_passport": "IN", "month": "May", "days": 3}))
+
+    assert time.perf_counter() - start < 0.1
+    assert inner.calls == 0
+    assert result["safety_tips"][0] == "Keep copies of important documents"
+
+
+def test_router_skips_open_provider():
+    down = BreakerLLM(FlakyLLM("groq"), CircuitBreaker("groq_r", failure_threshold=1, recovery_timeout=60))
+    down.breaker.record_failure()
+    up = BreakerLLM(FlakyLLM("gemini", fail=False), CircuitBreaker("gemini_r"))
+    router = RouterLLM([("groq", down), ("gemini", up)], hedge_delay=10)
+
+    assert router.get_stats()["order"] == ["gemini", "groq"]
+    assert "safety_tips" in asyncio.run(router.agenerate("prompt"))
+    assert down.llm.calls == 0
+
+
+def test_provider_hanging_past_the_deadline_trips_breaker():
+    llm = BreakerLLM(FlakyLLM(fail=False, delay=10), CircuitBreaker("hanging", failure_threshold=2, recovery_timeout=60))
+
+    async def call():
+        with deadline(0.02):
+            await asyncio.wait_for(llm.agenerate("prompt"), remaining())
+
+    for _ in range(2):
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(call())
+    assert llm.breaker.state == OPEN
+
+
+def test_cancellation_before_the_deadline_is_not_a_failure():
+    llm = BreakerLLM(FlakyLLM(fail=False, delay=10), CircuitBreaker("hedged", failure_threshold=1, recovery_timeout=60))
+
+    async def call():
+        with deadline(10):
+            task = asyncio.ensure_future(llm.agenerate("prompt"))
+            await asyncio.sleep(0.01)
+            task.cancel()  # Lost a hedge race
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(call())
+    assert llm.breaker.state == CLOSED and llm.breaker.failures == 0
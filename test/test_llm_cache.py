@@ -0,0 +1,198 @@
+import asyncio
+import time
+
+from app.cache import MemoryCache, SQLiteCache, TieredCache
+from app.llm.base_llm import BaseLLM
+from app.llm.cache import CachedLLM
+from app.llm.singleflight import SingleFlight
+from app.metrics import metrics
+
+
+class CountingLLM(BaseLLM):
+    def __init__(self, response='{"destination": "Goa, India"}'):
+        super().__init__(api_key="test", model="fake")
+        self.response = response
+        self.calls = 0
+
+    def generate(self, prompt, system_prompt=None):
+        self.calls += 1
+        return self.response
+
+
+def test_repeated_prompt_is_served_from_cache():
+    provider = CountingLLM()
+    llm = CachedLLM(provider, TieredCache(MemoryCache(10)), ttl=60)
+
+    first = asyncio.run(llm.agenerate_json("prompt", "system"))
+    first["destination"] = "mutated"
+    second = asyncio.run(llm.agenerate_json("prompt", "system"))
+
+    assert provider.calls == 1
+    assert second == {"destination": "Goa, India"}
+    assert llm.cache.get_stats()["memory"]["hits"] == 1
+
+
+def test_disk_tier_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    provider = CountingLLM()
+    worker_a = CachedLLM(provider, TieredCache(MemoryCache(10), SQLiteCache(path)), ttl=60)
+    worker_b = CachedLLM(provider, TieredCache(MemoryCache(10), SQLiteCache(path)), ttl=60)
+
+    worker_a.generate_json("prompt", "system")
+    worker_b.generate_json("prompt", "system")
+
+    assert provider.calls == 1
+    assert worker_b.cache.get_stats()["disk"]["hits"] == 1
+
+
+class SlowDisk(SQLiteCache):
+    """Disk tier whose reads and writes wait, like a file lock held by another worker"""
+
+    def get_entry(self, key):
+        time.sleep(0.1)
+        return super().get_entry(key)
+
+    def set(self, key, value, ttl):
+        time.sleep(0.1)
+        super().set(key, value, ttl)
+
+
+def test_disk_tier_is_used_off_the_event_loop(tmp_path):
+    provider = CountingLLM()
+    llm = CachedLLM(provider, TieredCache(MemoryCache(10), SlowDisk(str(tmp_path / "llm_cache.db"))), ttl=60)
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        result = await llm.agenerate_json("prompt", "system")
+        ticker.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(run())
+    assert result == {"destination": "Goa, India"}
+    assert ticks >= 10  # The loop kept running through a slow disk read and write
+    assert llm.cache.disk.get(llm.cache_key("json", "prompt", "system")) == result
+
+
+def test_unparseable_responses_are_not_cached():
+    provider = CountingLLM(response="not json")
+    llm = CachedLLM(provider, TieredCache(MemoryCache(10)), ttl=60)
+
+    llm.generate_json("prompt")
+    llm.generate_json("prompt")
+
+    assert provider.calls == 2
+
+
+def test_memory_cache_evicts_lru_and_expires():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    cache.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get("b") is None
+    assert cache.get("d") is None
+    assert cache.stats["evictions"] == 2
+    assert cache.stats["expirations"] == 1
+
+
+class SlowLLM(CountingLLM):
+    def __init__(self, error=None, delay=0.05):
+        super().__init__()
+        self.error = error
+        self.delay = delay
+        self.cancelled = 0
+
+    async def agenerate(self, prompt, system_prompt=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.response
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    metrics.reset()
+    provider = SlowLLM()
+    llm = CachedLLM(provider, None, ttl=0, flights=SingleFlight())
+
+    async def burst():
+        return await asyncio.gather(*[llm.agenerate_json("prompt", "system") for _ in range(5)])
+
+    results = asyncio.run(burst())
+
+    assert provider.calls == 1
+    assert all(r == {"destination": "Goa, India"} for r in results)
+    assert metrics.get("llm_calls_coalesced") == 4
+
+
+def test_coalesced_calls_share_the_exception():
+    provider = SlowLLM(error=RuntimeError("rate limited"))
+    llm = CachedLLM(provider, None, ttl=0, flights=SingleFlight())
+
+    async def burst():
+        return await asyncio.gather(*[llm.agenerate("prompt") for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(burst())
+
+    assert provider.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_upstream_call_is_cancelled_when_every_caller_gives_up():
+    provider = SlowLLM(delay=5)
+    llm = CachedLLM(provider, None, ttl=0, flights=SingleFlight())
+
+    async def impatient():
+        callers = [asyncio.wait_for(llm.agenerate_json("prompt", "system"), timeout) for timeout in (0.05, 0.1)]
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        return results
+
+    results = asyncio.run(impatient())
+
+    assert all(isinstance(r, asyncio.TimeoutError) for r in results)
+    assert provider.calls == 1
+    assert provider.cancelled == 1
+    assert len(llm.flights) == 0
+
+
+def test_upstream_call_continues_while_a_caller_waits():
+    provider = SlowLLM(delay=0.1)
+    llm = CachedLLM(provider, None, ttl=0, flights=SingleFlight())
+
+    async def mixed():
+        impatient = asyncio.wait_for(llm.agenerate_json("prompt", "system"), 0.02)
+        return await asyncio.gather(impatient, llm.agenerate_json("prompt", "system"), return_exceptions=True)
+
+    timed_out, result = asyncio.run(mixed())
+
+    assert isinstance(timed_out, asyncio.TimeoutError)
+    assert result == {"destination": "Goa, India"}
+    assert provider.cancelled == 0
+
+
+def test_every_caller_gets_its_own_copy():
+    llm = CachedLLM(SlowLLM(), None, ttl=0, flights=SingleFlight())
+
+    async def burst():
+        return await asyncio.gather(*[llm.agenerate_json("prompt", "system") for _ in range(2)])
+
+    leader, follower = asyncio.run(burst())
+    leader["destination"] = "mutated"
+
+    assert follower == {"destination": "Goa, India"}
@@ -0,0 +1,146 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.llm.base_llm import BaseLLM
+from app.llm.rate_limit import BucketStore, RateLimitedLLM, RateLimitTimeout, TokenBucketLimiter
+from app.llm.retry import RetryBudget, RetryPolicy
+
+
+class EchoLLM(BaseLLM):
+    def generate(self, prompt, system_prompt=None):
+        return prompt
+
+
+def test_burst_then_queue_in_order():
+    limiter = TokenBucketLimiter("groq", requests_per_minute=60, max_wait=10, store=BucketStore(":memory:"))
+
+    waits = [limiter.reserve() for _ in range(62)]
+
+    assert waits[:60] == [0.0] * 60
+    assert waits[60] == pytest.approx(1.0, abs=0.05)
+    assert waits[61] == pytest.approx(2.0, abs=0.05)
+    assert limiter.queue_depth() == 2
+
+
+def test_queue_longer_than_max_wait_fails_without_reserving():
+    limiter = TokenBucketLimiter("groq", requests_per_minute=60, max_wait=1.5, store=BucketStore(":memory:"))
+    for _ in range(61):
+        limiter.reserve()
+
+    with pytest.raises(RateLimitTimeout):
+        limiter.reserve()
+    assert limiter.queue_depth() == 1
+
+
+def test_tokens_per_minute_limits_large_calls():
+    limiter = TokenBucketLimiter("gemini", requests_per_minute=1000, tokens_per_minute=6000,
+                                 max_wait=30, store=BucketStore(":memory:"))
+
+    assert limiter.reserve(6000) == 0.0
+    assert limiter.reserve(1000) == pytest.approx(10.0, abs=0.1)
+
+
+def test_workers_share_quota_through_file(tmp_path):
+    path = str(tmp_path / "rate_limits.db")
+    worker_a = TokenBucketLimiter("groq", requests_per_minute=2, max_wait=60, store=BucketStore(path))
+    worker_b = TokenBucketLimiter("groq", requests_per_minute=2, max_wait=60, store=BucketStore(path))
+
+    assert worker_a.reserve() == 0.0
+    assert worker_b.reserve() == 0.0
+    assert worker_a.reserve() == pytest.approx(30.0, abs=0.5)
+    assert worker_b.queue_depth() == 1
+
+
+def test_rate_limited_llm_waits_instead_of_failing():
+    limiter = TokenBucketLimiter("groq", requests_per_minute=600, max_wait=5, store=BucketStore(":memory:"))
+    llm = RateLimitedLLM(EchoLLM(api_key="test", model="echo", max_tokens=0), limiter)
+    start = time.perf_counter()  # The 601st call needs a tenth of a second of refill since the bucket was full
+    for _ in range(600):
+        limiter.reserve()
+
+    assert asyncio.run(llm.agenerate("hi")) == "hi"
+    assert time.perf_counter() - start >= 0.09
+
+
+def test_acquire_waits_for_the_store_lock_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "rate_limits.db")
+    limiter = TokenBucketLimiter("groq", requests_per_minute=60, max_wait=10, store=BucketStore(path))
+    other_worker = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    other_worker.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.3, lambda: other_worker.execute("COMMIT")).start()
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        await limiter.acquire()
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 10  # The loop kept running while the reservation waited
+
+
+def test_cancelled_queued_call_gives_its_reservation_back():
+    limiter = TokenBucketLimiter("groq", requests_per_minute=60, max_wait=10, store=BucketStore(":memory:"))
+    for _ in range(60):
+        limiter.reserve()
+
+    async def run():
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.05)
+        assert limiter.queue_depth() == 1
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+
+    asyncio.run(run())
+    assert limiter.queue_depth() == 0
+    assert limiter.reserve() < 1.0  # Next in line doesn't wait behind the cancelled call
+
+
+class FlakyLLM(BaseLLM):
+    """Fails its first attempt with a transient error, retried by its own RetryPolicy"""
+
+    def __init__(self):
+        super().__init__(api_key="test", model="flaky", max_tokens=0)
+        self.retry_policy = RetryPolicy(attempts=3, base_delay=0, budget=RetryBudget(10, 60))
+        self.attempts = 0
+
+    def generate(self, prompt, system_prompt=None):
+        return self.retry_policy.call(lambda: self.attempt(prompt))
+
+    async def agenerate(self, prompt, system_prompt=None):
+        async def call():
+            return self.attempt(prompt)
+
+        return await self.retry_policy.acall(call)
+
+    def attempt(self, prompt):
+        self.attempts += 1
+        if self.attempts == 1:
+            raise ConnectionError("reset")
+        return prompt
+
+
+def test_retries_draw_from_the_bucket():
+    limiter = TokenBucketLimiter("groq", requests_per_minute=60, max_wait=10, store=BucketStore(":memory:"))
+    flaky = FlakyLLM()
+
+    assert asyncio.run(RateLimitedLLM(flaky, limiter).agenerate("hi")) == "hi"
+    assert flaky.attempts == 2
+    requests, _, _ = limiter.store.get("groq")
+    assert requests == pytest.approx(58, abs=0.1)
+
+    RateLimitedLLM(FlakyLLM(), limiter).generate("hi")
+    requests, _, _ = limiter.store.get("groq")
+    assert requests == pytest.approx(56, abs=0.1)
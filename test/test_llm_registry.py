@@ -0,0 +1,16 @@
+from app.config import Config, LLMProvider
+from app.llm.registry import LLMClientRegistry
+
+
+def test_registry_reuses_clients_per_key(monkeypatch):
+    monkeypatch.setattr(Config, "GROQ_API_KEY", "test")
+    monkeypatch.setattr(Config, "LLM_RATE_LIMIT_ENABLED", False)  # Keep the shared bucket file out of it
+    registry = LLMClientRegistry()
+
+    first = registry.get(LLMProvider.GROQ, "llama", 0.7, 1000)
+    second = registry.get(LLMProvider.GROQ, "llama", 0.7, 1000)
+    other = registry.get(LLMProvider.GROQ, "llama", 0.2, 1000)
+
+    assert first is second
+    assert first is not other
+    assert len(registry) == 2
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from groq import AuthenticationError, RateLimitError
+
+from app.llm.groq_llm import GroqLLM
+from app.llm.retry import RetryBudget, RetryPolicy, is_retryable, retry_after
+
+COMPLETION = {
+    "id": "test", "object": "chat.completion", "created": 0, "model": "test",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}]
+}
+
+
+def groq_with(responses, policy):
+    """GroqLLM whose HTTP calls are answered from ``responses`` in order"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return responses[min(len(requests), len(responses)) - 1]
+
+    llm = GroqLLM(api_key="test", model="test", base_url="http://groq.test",
+                  async_http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+                  retry_policy=policy)
+    return llm, requests
+
+
+def test_rate_limit_honours_retry_after():
+    policy = RetryPolicy(attempts=3, base_delay=0.01, budget=RetryBudget(10, 60))
+    llm, requests = groq_with([
+        httpx.Response(429, headers={"retry-after": "0.2"}, json={"error": {"message": "slow down"}}),
+        httpx.Response(200, json=COMPLETION)
+    ], policy)
+
+    start = time.perf_counter()
+    assert asyncio.run(llm.agenerate("prompt")) == "ok"
+    assert len(requests) == 2
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_auth_errors_are_not_retried():
+    policy = RetryPolicy(attempts=3, base_delay=0.01, budget=RetryBudget(10, 60))
+    llm, requests = groq_with([httpx.Response(401, json={"error": {"message": "bad key"}})], policy)
+
+    with pytest.raises(AuthenticationError):
+        asyncio.run(llm.agenerate("prompt"))
+    assert len(requests) == 1
+
+
+def test_retry_budget_caps_retries():
+    policy = RetryPolicy(attempts=5, base_delay=0.001, budget=RetryBudget(2, 60))
+    llm, requests = groq_with([httpx.Response(503, json={"error": {"message": "down"}})], policy)
+
+    with pytest.raises(Exception):
+        asyncio.run(llm.agenerate("prompt"))
+    assert len(requests) == 3  # First attempt plus the two budgeted retries
+
+
+def test_long_retry_after_gives_up():
+    policy = RetryPolicy(attempts=3, max_retry_after=1, budget=RetryBudget(10, 60))
+    llm, requests = groq_with([httpx.Response(429, headers={"retry-after": "120"}, json={})], policy)
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(llm.agenerate("prompt"))
+    assert len(requests) == 1
+
+
+def test_classification():
+    response = httpx.Response(429, headers={"retry-after-ms": "1500"}, request=httpx.Request("POST", "http://x"))
+    error = RateLimitError("slow down", response=response, body=None)
+    assert is_retryable(error)
+    assert retry_after(error) == 1.5
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert not is_retryable(ValueError("bad json"))
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from app.llm.base_llm import BaseLLM
+from app.llm.router import RouterLLM
+
+
+class TimedLLM(BaseLLM):
+    def __init__(self, name, delay, error=None):
+        super().__init__(api_key="test", model=name)
+        self.delay = delay
+        self.error = error
+        self.cancelled = 0
+
+    def generate(self, prompt, system_prompt=None):
+        return self.model
+
+    async def agenerate(self, prompt, system_prompt=None):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.model
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled():
+    slow, fast = TimedLLM("groq", 1.0), TimedLLM("gemini", 0.05)
+    router = RouterLLM([("groq", slow), ("gemini", fast)], hedge_delay=0.05, min_samples=5)
+
+    async def call():
+        result = await router.agenerate("prompt")
+        await asyncio.sleep(0)  # Let the cancellation land
+        return result
+
+    start = time.perf_counter()
+    result = asyncio.run(call())
+
+    assert result == "gemini"
+    assert time.perf_counter() - start < 0.5
+    assert slow.cancelled == 1
+    stats = router.get_stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"]["gemini"] == 1
+
+
+def test_routes_to_fastest_provider_once_measured():
+    router = RouterLLM([("groq", TimedLLM("groq", 0.03)), ("gemini", TimedLLM("gemini", 0.001))],
+                       hedge_delay=10, min_samples=2)
+    for _ in range(2):
+        router.stats["groq"].record(0.03, ok=True)
+        router.stats["gemini"].record(0.001, ok=True)
+
+    assert asyncio.run(router.agenerate("prompt")) == "gemini"
+    assert router.get_stats()["order"][0] == "gemini"
+
+
+def test_fails_over_to_next_provider_on_error():
+    router = RouterLLM([("groq", TimedLLM("groq", 0, error=RuntimeError("429"))),
+                        ("gemini", TimedLLM("gemini", 0))], hedge_delay=10)
+
+    assert asyncio.run(router.agenerate("prompt")) == "gemini"
+    assert router.get_stats()["providers"]["groq"]["errors"] == 1
+
+
+def test_raises_last_error_when_all_providers_fail():
+    router = RouterLLM([("groq", TimedLLM("groq", 0, error=RuntimeError("down"))),
+                        ("gemini", TimedLLM("gemini", 0, error=ValueError("bad key")))], hedge_delay=10)
+
+    with pytest.raises(ValueError):
+        asyncio.run(router.agenerate("prompt"))
+
+
+def test_degraded_primary_is_demoted_after_losing_hedges():
+    groq, gemini = TimedLLM("groq", 0.001), TimedLLM("gemini", 0.03)
+    router = RouterLLM([("groq", groq), ("gemini", gemini)], hedge_delay=0.01, min_samples=3, window=6)
+    for _ in range(3):
+        router.stats["groq"].record(0.001, ok=True)
+        router.stats["gemini"].record(0.03, ok=True)
+    groq.delay = 1.0  # Groq degrades; each call now loses the hedge to gemini
+
+    async def calls():
+        for _ in range(4):
+            await router.agenerate("prompt")
+            await asyncio.sleep(0)
+
+    asyncio.run(calls())
+
+    assert router.get_stats()["order"][0] == "gemini"
+    assert router.stats["groq"].percentile(0.5) > router.stats["gemini"].percentile(0.5)
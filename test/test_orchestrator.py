@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import pytest
+
+from app.agents.base_agent import BaseAgent
+from app.agents.orchestrator import AgentOrchestrator
+from app.destinations import same_destination
+from app.metrics import metrics
+
+STEP = 0.2
+
+
+class SleepyAgent(BaseAgent):
+    def __init__(self, name, consumes, produces):
+        self.name = name
+        self.role = name
+        self.consumes = consumes
+        self.produces = produces
+
+    async def process(self, context):
+        await asyncio.sleep(STEP)
+        return f"{self.name} done"
+
+    def fallback(self, context):
+        return f"{self.name} fallback"
+
+
+def test_independent_agents_run_concurrently():
+    agents = [
+        SleepyAgent("Destination", [], "destination"),
+        SleepyAgent("Itinerary", ["destination"], "itinerary"),
+        SleepyAgent("Budget", ["destination"], "budget_analysis"),
+        SleepyAgent("Safety", ["destination"], "safety_info"),
+    ]
+    orchestrator = AgentOrchestrator(agents)
+
+    start = time.perf_counter()
+    context = asyncio.run(orchestrator.run({}))
+    elapsed = time.perf_counter() - start
+
+    assert context["safety_info"] == "Safety done"
+    # Two rounds of agents, not four
+    assert elapsed < STEP * 3
+    assert set(orchestrator.timings) == {"Destination", "Itinerary", "Budget", "Safety"}
+
+
+def test_unresolvable_dependencies_raise():
+    orchestrator = AgentOrchestrator([SleepyAgent("Budget", ["destination"], "budget_analysis")])
+
+    with pytest.raises(ValueError):
+        asyncio.run(orchestrator.run({}))
+
+
+class EchoDestinationAgent(SleepyAgent):
+    def __init__(self, validated):
+        super().__init__("Destination", [], "destination_info")
+        self.validated = validated
+
+    async def process(self, context):
+        await asyncio.sleep(STEP)
+        return {"destination": self.validated}
+
+    def publish(self, context, result):
+        context["destination_info"] = result
+        context["destination"] = result["destination"]
+
+
+class RecordingAgent(SleepyAgent):
+    async def process(self, context):
+        await asyncio.sleep(STEP)
+        return context["destination"]
+
+
+def run_speculative(validated):
+    agents = [EchoDestinationAgent(validated), RecordingAgent("Safety", ["destination"], "safety_info")]
+    context = {"preferred_destination": "bali"}
+    start = time.perf_counter()
+    asyncio.run(AgentOrchestrator(agents).run_speculative(
+        context, "destination", "bali", same_destination))
+    return context, time.perf_counter() - start
+
+
+def test_speculation_hit_keeps_early_results():
+    metrics.reset()
+    context, elapsed = run_speculative("Bali, Indonesia")
+
+    assert context["safety_info"] == "bali"
+    assert elapsed < STEP * 1.5
+    assert metrics.get("speculation_hits") == 1
+
+
+def test_speculation_miss_reruns_dependent_agents():
+    metrics.reset()
+    context, _ = run_speculative("Lisbon, Portugal")
+
+    assert context["safety_info"] == "Lisbon, Portugal"
+    assert metrics.get("speculation_misses") == 1
+
+
+class SlowRecordingAgent(RecordingAgent):
+    async def process(self, context):
+        await asyncio.sleep(STEP * 2)
+        return context["destination"]
+
+
+def test_speculation_miss_reruns_as_soon_as_destination_is_known():
+    agents = [EchoDestinationAgent("Lisbon, Portugal"), SlowRecordingAgent("Safety", ["destination"], "safety_info")]
+    context = {"preferred_destination": "bali"}
+
+    start = time.perf_counter()
+    asyncio.run(AgentOrchestrator(agents).run_speculative(context, "destination", "bali", same_destination))
+    elapsed = time.perf_counter() - start
+
+    assert context["safety_info"] == "Lisbon, Portugal"
+    # Destination then the re-run, without waiting out the wrong guess's run
+    assert elapsed < STEP * 3.5
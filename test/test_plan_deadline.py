@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app.agents.orchestrator import plan_trip
+from app.config import Config
+from app.deadline import deadline, remaining
+from app.main import app
+from conftest import PLAN_PAYLOAD, FakeTripLLM
+
+client = TestClient(app)
+
+
+class SlowSafetyLLM(FakeTripLLM):
+    """Answers every agent at once except safety, which hangs"""
+
+    def __init__(self):
+        super().__init__()
+        self.cancelled = 0
+
+    async def agenerate(self, prompt, system_prompt=None):
+        if "safety expert" in system_prompt:
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return await super().agenerate(prompt, system_prompt)
+
+
+def test_agent_past_deadline_is_cancelled_and_marked_degraded(monkeypatch):
+    llm = SlowSafetyLLM()
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+
+    async def run():
+        with deadline(0.2):
+            return await plan_trip(dict(PLAN_PAYLOAD))
+
+    start = time.perf_counter()
+    plan = asyncio.run(run())
+
+    assert time.perf_counter() - start < 1
+    # The fake returns one day, so the rest of the itinerary is padded too
+    assert plan["degraded_sections"] == ["itinerary", "safety_info"]
+    assert plan["safety_info"]["safety_tips"][0] == "Keep copies of important documents"
+    assert plan["destination"] == "Goa, India"
+    assert llm.cancelled == 1
+
+
+def test_deadline_cancels_upstream_calls_through_client_stack(llm_stack):
+    llm_stack.delay = 30
+
+    async def run():
+        with deadline(0.2):
+            plan = await plan_trip(dict(PLAN_PAYLOAD))
+        await asyncio.sleep(0.01)
+        # Checked before asyncio.run cancels whatever is left at shutdown
+        return plan, llm_stack.cancelled
+
+    start = time.perf_counter()
+    plan, cancelled = asyncio.run(run())
+
+    assert time.perf_counter() - start < 1
+    assert "destination_info" in plan["degraded_sections"]
+    # The deadline bounds cost as well as latency: no provider call outlives it
+    assert llm_stack.calls >= 1
+    assert cancelled == llm_stack.calls
+
+
+def test_nested_deadline_keeps_the_earlier_expiry():
+    assert remaining() is None
+    with deadline(1):
+        with deadline(10):
+            assert remaining() <= 1
+    assert remaining() is None
+
+
+def test_plan_endpoint_answers_by_deadline(fake_backend, monkeypatch):
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: SlowSafetyLLM())
+    monkeypatch.setattr(Config, "PLAN_DEADLINE_SECONDS", 0.3)
+
+    response = client.post("/plan-guest", json=PLAN_PAYLOAD)
+
+    assert response.status_code == 200
+    assert "safety_info" in response.json()["degraded_sections"]
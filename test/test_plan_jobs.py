@@ -0,0 +1,201 @@
+import asyncio
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.main as main
+from app.auth.models import PlanJob
+from app.auth.routes import get_current_user
+from app.database import get_db
+from app.jobs import COMPLETED, FAILED, QUEUED, RUNNING, PlanJobWorkers, utcnow
+from app.main import app
+from app.metrics import metrics
+from conftest import PLAN_PAYLOAD
+
+USER_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    # A file, so the workers' threads each get their own connection and transaction
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    PlanJob.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+def load(sessions, job_id):
+    db = sessions()
+    try:
+        return db.query(PlanJob).filter(PlanJob.id == job_id).one()
+    finally:
+        db.close()
+
+
+async def until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def workers(sessions, handler, **kwargs):
+    return PlanJobWorkers(handler, sessions, workers=kwargs.pop("workers", 1), poll_interval=0.01, **kwargs)
+
+
+def save_stand_in_trip(db):
+    # Trips use Postgres-only column types, so another job row stands in for one
+    trip = PlanJob(user_id=USER_ID, status="trip", request_data={})
+    db.add(trip)
+    db.flush()
+    return trip.id
+
+
+async def sectioned_handler(job, on_section):
+    on_section("destination", job.request_data["origin_city"])
+    await asyncio.sleep(0.01)
+    return {"destination": "Goa, India"}, save_stand_in_trip
+
+
+def saved_trips(sessions):
+    db = sessions()
+    try:
+        return db.query(PlanJob).filter(PlanJob.status == "trip").all()
+    finally:
+        db.close()
+
+
+def test_worker_runs_queued_job_and_records_sections(sessions):
+    metrics.reset()
+    pool = workers(sessions, sectioned_handler)
+
+    async def run():
+        job = pool.submit(sessions(), USER_ID, dict(PLAN_PAYLOAD))
+        pool.start()
+        await until(lambda: load(sessions, job.id).status == COMPLETED)
+        await pool.stop()
+        return load(sessions, job.id)
+
+    job = asyncio.run(run())
+    assert job.result == {"destination": "Goa, India"}
+    assert job.partial_result == {"destination": "Hyderabad"}
+    assert job.attempts == 1
+    assert [trip.id for trip in saved_trips(sessions)] == [job.trip_id]
+    assert metrics.get("plan_jobs_completed") == 1
+
+
+def test_worker_that_lost_its_lease_saves_nothing(sessions):
+    metrics.reset()
+
+    async def outlived_lease(job, on_section):
+        # Meanwhile the lease lapsed and another worker claimed the job
+        db = sessions()
+        db.query(PlanJob).filter(PlanJob.id == job.id).update({PlanJob.attempts: job.attempts + 1})
+        db.commit()
+        db.close()
+        return {"destination": "Goa, India"}, save_stand_in_trip
+
+    pool = workers(sessions, outlived_lease)
+
+    async def run():
+        job = pool.submit(sessions(), USER_ID, dict(PLAN_PAYLOAD))
+        pool.start()
+        await until(lambda: metrics.get("plan_jobs_lease_lost") == 1)
+        await pool.stop()
+        return load(sessions, job.id)
+
+    job = asyncio.run(run())
+    assert job.status == RUNNING  # Still the other worker's to finish
+    assert job.attempts == 2
+    assert job.result is None and job.trip_id is None
+    assert saved_trips(sessions) == []
+    assert metrics.get("plan_jobs_completed") == 0
+
+
+def test_job_with_lapsed_lease_is_resumed_or_failed(sessions):
+    db = sessions()
+    lapsed = utcnow() - timedelta(seconds=1)
+    resumable = PlanJob(user_id=USER_ID, status=RUNNING, request_data=PLAN_PAYLOAD, attempts=1, lease_expires_at=lapsed)
+    exhausted = PlanJob(user_id=USER_ID, status=RUNNING, request_data=PLAN_PAYLOAD, attempts=3, lease_expires_at=lapsed)
+    db.add_all([resumable, exhausted])
+    db.commit()
+    pool = workers(sessions, sectioned_handler, max_attempts=3)
+
+    async def run():
+        pool.start()
+        await until(lambda: load(sessions, resumable.id).status == COMPLETED)
+        await pool.stop()
+
+    asyncio.run(run())
+    assert load(sessions, resumable.id).attempts == 2
+    assert load(sessions, exhausted.id).status == FAILED
+
+
+def test_failing_job_is_marked_failed(sessions):
+    async def broken(job, on_section):
+        raise RuntimeError("boom")
+
+    pool = workers(sessions, broken)
+
+    async def run():
+        job = pool.submit(sessions(), USER_ID, dict(PLAN_PAYLOAD))
+        pool.start()
+        await until(lambda: load(sessions, job.id).status == FAILED)
+        await pool.stop()
+        return load(sessions, job.id)
+
+    assert "error occurred" in asyncio.run(run()).error
+
+
+def test_stopping_workers_requeues_running_job(sessions):
+    async def slow(job, on_section):
+        await asyncio.sleep(10)
+
+    pool = workers(sessions, slow)
+
+    async def run():
+        job = pool.submit(sessions(), USER_ID, dict(PLAN_PAYLOAD))
+        pool.start()
+        await until(lambda: load(sessions, job.id).status == RUNNING)
+        await pool.stop()
+        return load(sessions, job.id)
+
+    job = asyncio.run(run())
+    assert job.status == QUEUED
+    assert job.lease_expires_at is None
+
+
+def test_submit_and_poll_plan_job(fake_backend, sessions, monkeypatch):
+    class Member:
+        id = USER_ID
+        name = "Test User"
+        email = "test@example.com"
+
+    pool = workers(sessions, main.run_plan_job)
+    monkeypatch.setattr(main, "plan_jobs", pool)
+    monkeypatch.setattr(main, "add_trip", lambda db, *args: SimpleNamespace(id=save_stand_in_trip(db)))
+    app.dependency_overrides[get_current_user] = lambda: Member()
+    app.dependency_overrides[get_db] = lambda: sessions()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            submitted = await client.post("/plan/jobs", json=PLAN_PAYLOAD)
+            assert submitted.status_code == 202
+            job_id = submitted.json()["job_id"]
+            pool.start()
+            await until(lambda: load(sessions, uuid.UUID(job_id)).status == COMPLETED)
+            await pool.stop()
+            return await client.get(f"/plan/jobs/{job_id}"), await client.get(f"/plan/jobs/{uuid.uuid4()}")
+
+    polled, missing = asyncio.run(run())
+    body = polled.json()
+    assert body["status"] == COMPLETED
+    assert body["result"]["destination"] == "Goa, India"
+    assert set(body["sections"]) == {"destination_info", "itinerary", "budget_analysis", "safety_info"}
+    assert body["trip_id"] == str(saved_trips(sessions)[0].id)
+    assert missing.status_code == 404
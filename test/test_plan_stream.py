@@ -0,0 +1,30 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from conftest import PLAN_PAYLOAD
+
+client = TestClient(app)
+
+
+def test_plan_stream_emits_agent_sections_then_saved_plan(fake_backend):
+    _, session = fake_backend
+
+    response = client.post("/plan/stream", json=PLAN_PAYLOAD)
+
+    assert response.status_code == 200
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+
+    sections = [data["section"] for event, data in events if event == "agent"]
+    assert sections[0] == "destination_info"
+    assert set(sections) == {"destination_info", "itinerary", "budget_analysis", "safety_info"}
+
+    event, plan = events[-1]
+    assert event == "plan"
+    assert plan["destination"] == "Goa, India"
+    assert "trip_id" in plan and len(plan["agent_messages"]) == 4
+    assert len(session.added) == 1
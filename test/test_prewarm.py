@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import app.knowledge as knowledge
+from app.cache import SQLiteCache
+from app.config import Config
+from app.knowledge import BudgetModelCache, SafetyCache
+from app.prewarm import build_tasks, main
+from conftest import FakeTripLLM
+
+TARGETS = {"destinations": ["bali", "Goa, India"], "passports": ["Indian"], "origins": ["Hyderabad"],
+           "months": ["June"], "days": [3, 7]}
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    monkeypatch.setattr(Config, "SAFETY_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "BUDGET_MODEL_ENABLED", True)
+    safety = SafetyCache(SQLiteCache(":memory:", table="safety_info"), ttl=60)
+    budgets = BudgetModelCache(SQLiteCache(":memory:", table="budget_models"), ttl=60)
+    monkeypatch.setattr(knowledge, "_safety_cache", safety)
+    monkeypatch.setattr(knowledge, "_budget_models", budgets)
+    return safety, budgets
+
+
+def test_tasks_use_canonical_destinations():
+    ids = [task["id"] for task in build_tasks(TARGETS)]
+    assert ids == [
+        "safety|Bali, Indonesia|Indian|June",
+        "budget|Hyderabad|Bali, Indonesia|June|3",
+        "budget|Hyderabad|Bali, Indonesia|June|7",
+        "safety|Goa, India|Indian|June",
+        "budget|Hyderabad|Goa, India|June|3",
+        "budget|Hyderabad|Goa, India|June|7",
+    ]
+
+
+def test_fills_caches_and_resumes_from_checkpoint(caches, tmp_path, monkeypatch, capsys):
+    safety, budgets = caches
+    llm = FakeTripLLM()
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+    targets = tmp_path / "targets.json"
+    targets.write_text(json.dumps(TARGETS))
+    checkpoint = tmp_path / "checkpoint.txt"
+
+    main(["--input", str(targets), "--checkpoint", str(checkpoint), "--concurrency", "2"])
+
+    assert llm.calls == 6
+    assert safety.get("Bali", "indian", "june") is not None
+    assert len(budgets.samples("Hyderabad", "Goa", "June")) == 2
+    assert len(checkpoint.read_text().splitlines()) == 6
+    assert "tasks/s" in capsys.readouterr().out
+
+    main(["--input", str(targets), "--checkpoint", str(checkpoint)])
+    assert llm.calls == 6  # Everything was already in the checkpoint
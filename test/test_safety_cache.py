@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.knowledge as knowledge
+from app.agents.safety_agent import SafetyAgent
+from app.cache import SQLiteCache
+from app.config import Config
+from app.knowledge import SafetyCache
+from app.main import app
+from conftest import PLAN_PAYLOAD, FakeTripLLM
+
+
+@pytest.fixture
+def safety_cache(monkeypatch):
+    cache = SafetyCache(SQLiteCache(":memory:", table="safety_info"), ttl=60)
+    monkeypatch.setattr(Config, "SAFETY_CACHE_ENABLED", True)
+    monkeypatch.setattr(knowledge, "_safety_cache", cache)
+    return cache
+
+
+def safety_context(**overrides):
+    return dict(PLAN_PAYLOAD, **dict({"destination": "Bali, Indonesia"}, **overrides))
+
+
+def test_safety_info_is_shared_across_trips(safety_cache, monkeypatch):
+    llm = FakeTripLLM()
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+    agent = SafetyAgent()
+
+    first = asyncio.run(agent.process(safety_context()))
+    # Different traveler, duration and spelling of the destination
+    second = asyncio.run(agent.process(safety_context(destination=" bali ", days=7, traveler_name="Sam")))
+
+    assert second == first
+    assert llm.calls == 1
+    assert safety_cache.get_stats()["hit_rate"] == 0.5
+
+
+def test_other_passport_or_month_misses(safety_cache, monkeypatch):
+    llm = FakeTripLLM()
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: llm)
+    agent = SafetyAgent()
+
+    asyncio.run(agent.process(safety_context()))
+    asyncio.run(agent.process(safety_context(visa_passport="US")))
+    asyncio.run(agent.process(safety_context(month="July")))
+
+    assert llm.calls == 3
+
+
+def test_fallback_is_not_cached(safety_cache, monkeypatch):
+    class Failing(FakeTripLLM):
+        async def agenerate(self, prompt, system_prompt=None):
+            raise ConnectionError("down")
+
+    monkeypatch.setattr("app.agents.base_agent.get_llm_client", lambda **kwargs: Failing())
+    asyncio.run(SafetyAgent().process(safety_context()))
+
+    assert safety_cache.entries() == []
+
+
+def test_admin_lists_and_purges_entries(safety_cache, monkeypatch):
+    monkeypatch.setattr(Config, "ADMIN_API_KEY", "secret")
+    safety_cache.set("Bali, Indonesia", "Indian", "June", {"safety_tips": []})
+    safety_cache.set("Bali", "US", "June", {"safety_tips": []})
+    safety_cache.set("Goa", "Indian", "June", {"safety_tips": []})
+    client = TestClient(app)
+
+    assert client.get("/admin/safety-cache").status_code == 403
+    listed = client.get("/admin/safety-cache", headers={"X-Admin-Key": "secret"}).json()
+    assert [entry["destination"] for entry in listed["entries"]] == ["bali", "bali", "goa"]
+
+    purged = client.delete("/admin/safety-cache", params={"destination": "BALI"}, headers={"X-Admin-Key": "secret"})
+    assert purged.json() == {"purged": 2}
+    assert [entry["destination"] for entry in safety_cache.entries()] == ["goa"]
+
+
+def test_admin_endpoints_disabled_without_key(safety_cache):
+    assert TestClient(app).get("/admin/safety-cache", headers={"X-Admin-Key": ""}).status_code == 404